@@ -0,0 +1,67 @@
+"""
+Throughput benchmark: fused BUILTIN_AD_PATTERNS matcher vs one re.search per pattern and line variant.
+
+Usage: python -m src.benchmarks.bench_ad_patterns [--repeat N]
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.cleaner.corpus import load_captions
+from src.cleaner.engine import BUILTIN_AD_PATTERNS, match_builtin_ad
+
+
+def legacy_is_builtin_ad(line: str) -> bool:
+    """The old check: every pattern against raw, cleaned and generic-cleaned variants."""
+    raw_line = line.strip()
+    cleaned_line = re.sub(r"^[>\s\-\*•·\d\w_]+-", "", raw_line).strip()
+    cleaned_line_generic = re.sub(r"^[>\s\-\*•·]+", "", raw_line).strip()
+    for pat in BUILTIN_AD_PATTERNS:
+        if (
+            re.search(pat, raw_line, flags=re.IGNORECASE)
+            or re.search(pat, cleaned_line, flags=re.IGNORECASE)
+            or re.search(pat, cleaned_line_generic, flags=re.IGNORECASE)
+        ):
+            return True
+    return False
+
+
+def fused_is_builtin_ad(line: str) -> bool:
+    return match_builtin_ad(line.strip()) is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    captions = load_captions()
+    lines = [line for caption in captions for line in caption.split("\n") if line.strip()]
+
+    mismatches = [line for line in lines if legacy_is_builtin_ad(line) != fused_is_builtin_ad(line)]
+    if mismatches:
+        print(f"❌ {len(mismatches)} line(s) disagree, e.g. {mismatches[0]!r}")
+        sys.exit(1)
+
+    hits = sum(fused_is_builtin_ad(line) for line in lines)
+    print(f"corpus: {len(captions)} captions, {len(lines)} lines, {hits} builtin ad lines\n")
+
+    for name, fn in (("legacy", legacy_is_builtin_ad), ("fused", fused_is_builtin_ad)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for line in lines:
+                fn(line)
+        elapsed = time.perf_counter() - start
+        total = args.repeat * len(lines)
+        print(f"{name:<8}{total / elapsed:>12,.0f} lines/s{elapsed / total * 1e6:>10.2f} µs/line")
+
+
+if __name__ == "__main__":
+    main()
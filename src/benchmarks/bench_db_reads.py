@@ -0,0 +1,86 @@
+"""
+Latency benchmark: hot-path SELECTs under a concurrent write load, read pool off (every read on the writer
+connection) vs on.
+
+Usage: python -m src.benchmarks.bench_db_reads [--seconds S] [--readers N] [--pool-sizes 0,4]
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+from statistics import quantiles
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.bot.core import config
+from src.bot.data.database import db_manager
+from src.bot.data.repositories import MediaRepository
+
+
+async def run_load(seconds: float, readers: int) -> dict:
+    """Readers poll is_outbound_message/is_processed_inbound while one task keeps writing queue batches."""
+    stop = time.perf_counter() + seconds
+    latencies = []
+    writes = 0
+
+    async def writer():
+        nonlocal writes
+        n = 0
+        while time.perf_counter() < stop:
+            items = [
+                {"tid": "-100", "mt": "photo", "fid": f"f{n}-{i}", "fuid": f"u{n}-{i}", "cap": "x" * 200}
+                for i in range(50)
+            ]
+            await MediaRepository.enqueue_batch(items)
+            await MediaRepository.record_outbound_message("-100", str(n))
+            writes += 1
+            n += 1
+
+    async def reader(rid: int):
+        i = 0
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            await MediaRepository.is_outbound_message("-100", str(i))
+            await MediaRepository.is_processed_inbound("-100", str(i), f"u{i}")
+            latencies.append(time.perf_counter() - start)
+            i += rid + 1
+
+    await asyncio.gather(writer(), *(reader(r) for r in range(readers)))
+    cuts = quantiles(latencies, n=100)
+    return {"reads": len(latencies), "writes": writes, "p50_ms": cuts[49] * 1e3, "p99_ms": cuts[98] * 1e3}
+
+
+async def main_async(args):
+    print(f"{'pool':>5}{'reads/s':>11}{'batches/s':>11}{'p50 ms':>9}{'p99 ms':>9}")
+    for size in args.pool_sizes:
+        with tempfile.TemporaryDirectory(prefix="bench-db-") as tmp:
+            config.DB_FILE = str(Path(tmp) / "bench.db")
+            config.DB_READ_POOL_SIZE = size
+            await db_manager.get_db()
+            try:
+                r = await run_load(args.seconds, args.readers)
+            finally:
+                await db_manager.close()
+        print(
+            f"{size:>5}{r['reads'] / args.seconds:>11,.0f}{r['writes'] / args.seconds:>11,.1f}"
+            f"{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration per pool size")
+    parser.add_argument("--readers", type=int, default=8, help="concurrent reading tasks")
+    parser.add_argument("--pool-sizes", default="0,4", help="DB_READ_POOL_SIZE values to compare")
+    args = parser.parse_args()
+    args.pool_sizes = [int(s) for s in args.pool_sizes.split(",") if s.strip()]
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Throughput benchmark: is_ad_line with the trigger-character prefilter vs running every pattern family on each line.
+
+Usage: python -m src.benchmarks.bench_prefilter [--repeat N]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.cleaner import engine
+from src.cleaner.corpus import load_captions
+
+
+def unfiltered_is_ad_line(line: str) -> bool:
+    """The old check: link, mention and builtin ad regexes on every line."""
+    raw_line = line.strip()
+    if not raw_line:
+        return False
+    return bool(
+        engine._AD_LINK_RE.search(raw_line) or engine._MENTION_RE.search(raw_line) or engine.match_builtin_ad(raw_line)
+    )
+
+
+def prefiltered_is_ad_line(line: str) -> bool:
+    return engine.is_ad_line(line, check_kws=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    captions = load_captions()
+    lines = [line for caption in captions for line in caption.split("\n") if line.strip()]
+    # Upper-cased copies exercise the case-insensitive link triggers
+    variants = lines + [line.upper() for line in lines]
+
+    mismatches = [line for line in variants if unfiltered_is_ad_line(line) != prefiltered_is_ad_line(line)]
+    if mismatches:
+        print(f"❌ {len(mismatches)} line(s) disagree, e.g. {mismatches[0]!r}")
+        sys.exit(1)
+
+    skipped = sum(engine._scan_features(line.strip()) == 0 for line in lines)
+    print(f"corpus: {len(captions)} captions, {len(lines)} lines, {skipped} lines without any trigger\n")
+
+    for name, fn in (("unfiltered", unfiltered_is_ad_line), ("prefilter", prefiltered_is_ad_line)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for line in lines:
+                fn(line)
+        elapsed = time.perf_counter() - start
+        total = args.repeat * len(lines)
+        print(f"{name:<12}{total / elapsed:>12,.0f} lines/s{elapsed / total * 1e6:>10.2f} µs/line")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Micro-benchmark: /addreplace rules applied by the single-pass trie Replacer vs one str.replace per rule.
+
+Usage: python -m src.benchmarks.bench_replacements [--repeat N]
+"""
+
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.cleaner.corpus import load_captions
+from src.cleaner.replacer import Replacer
+
+RULE_COUNTS = (1, 10, 100, 500)
+
+
+def legacy_replace(text: str, replacements: list) -> str:
+    """The old implementation: one str.replace (and one string copy) per rule."""
+    for old, new in replacements:
+        text = text.replace(old, new)
+    return text
+
+
+def make_replacements(count: int, seed: int = 7) -> list:
+    """Brand-name style substitutions; the first few occur in the corpus."""
+    rng = random.Random(seed)
+    pairs = [("高清", "HD"), ("免费", "限免"), ("更新", "连载"), ("第", "Ep")][:count]
+    seen = {old for old, _ in pairs}
+    while len(pairs) < count:
+        old = "".join(chr(rng.randint(0x4E00, 0x9FA5)) for _ in range(rng.randint(2, 4)))
+        if old not in seen:
+            seen.add(old)
+            pairs.append((old, f"品牌{len(pairs)}"))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200, help="passes over the corpus per measurement")
+    args = parser.parse_args()
+
+    captions = load_captions()
+
+    def per_caption_us(fn):
+        total = timeit.timeit(lambda: [fn(c) for c in captions], number=args.repeat)
+        return total / (args.repeat * len(captions)) * 1e6
+
+    print(f"{'rules':>6}{'legacy µs':>12}{'replacer µs':>14}{'speedup':>10}")
+    for count in RULE_COUNTS:
+        pairs = make_replacements(count)
+        replacer = Replacer(pairs)
+        legacy = per_caption_us(lambda text: legacy_replace(text, pairs))
+        current = per_caption_us(replacer.apply)
+        print(f"{count:>6}{legacy:>12.2f}{current:>14.2f}{legacy / current:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
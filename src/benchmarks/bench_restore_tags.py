@@ -0,0 +1,70 @@
+"""
+Benchmark: restore_all_tags (hashtag set + compiled keyword matcher + single join) vs the old per-tag scan.
+
+Usage: python -m src.benchmarks.bench_restore_tags [--repeat N]
+"""
+
+import argparse
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.cleaner.engine import restore_all_tags
+
+
+def legacy_restore_all_tags(original: str, cleaned: str, keywords: list = None) -> str:
+    """The old implementation: uncompiled regexes, a substring scan and a string copy per tag."""
+    if not cleaned or not cleaned.strip():
+        return ""
+    tags = re.findall(r"#[\w\u4e00-\u9fff]+", original)
+    for tag in tags:
+        is_bad = False
+        for word, is_regex in keywords or ():
+            try:
+                if is_regex:
+                    if re.search(word, tag, flags=re.IGNORECASE):
+                        is_bad = True
+                        break
+                elif word.lower() in tag.lower():
+                    is_bad = True
+                    break
+            except Exception:
+                pass
+        if not is_bad and tag not in cleaned:
+            cleaned += f" {tag}"
+    return cleaned.strip()
+
+
+def make_case(tag_count: int, seed: int = 7):
+    rng = random.Random(seed)
+    tags = ["#" + "".join(chr(rng.randint(0x4E00, 0x9FA5)) for _ in range(rng.randint(2, 5))) for _ in range(tag_count)]
+    original = "绝密行动 第08集 高清\n主演：张三 / 李四\n" + " ".join(tags)
+    # Cleaning kept the body and a third of the tags
+    cleaned = "绝密行动 第08集 高清\n主演：张三 / 李四\n" + " ".join(tags[::3])
+    keywords = [(t[1:3], False) for t in tags[1::10]] + [(r"代开\w+", True), (r"加[微Qq]", True)]
+    return original, cleaned, keywords
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'tags':>6}{'legacy µs':>12}{'current µs':>12}{'speedup':>10}")
+    for count in (10, 50, 100, 200):
+        original, cleaned, keywords = make_case(count)
+        assert legacy_restore_all_tags(original, cleaned, keywords) == restore_all_tags(original, cleaned, keywords)
+        legacy = timeit.timeit(lambda: legacy_restore_all_tags(original, cleaned, keywords), number=args.repeat)
+        current = timeit.timeit(lambda: restore_all_tags(original, cleaned, keywords), number=args.repeat)
+        per_call = 1e6 / args.repeat
+        print(f"{count:>6}{legacy * per_call:>12.1f}{current * per_call:>12.1f}{legacy / current:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
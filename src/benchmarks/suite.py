@@ -0,0 +1,202 @@
+"""
+Cleaner throughput suite: clean_caption in every rule mode, is_ad_line, restore_all_tags and strip_hidden_chars,
+with keyword sets of 10 to 10000 entries, over the versioned caption corpus.
+
+ChatRepository is stubbed and the result and line-verdict caches disabled, so numbers reflect cleaning work only.
+
+Usage:
+    python -m src.benchmarks.suite [--repeat N] [--sizes 10,100] [--json results.json] [--compare old.json]
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from statistics import quantiles
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.bot.core.config import VERSION
+from src.bot.data.repositories import ChatRepository
+from src.cleaner.cache import clean_cache, line_cache
+from src.cleaner.corpus import CORPUS_VERSION, corpus_digest, load_captions
+from src.cleaner.engine import clean_caption, is_ad_line, restore_all_tags, strip_hidden_chars
+from src.cleaner.ruleset import invalidate_ruleset
+
+KEYWORD_SIZES = (10, 100, 1000, 10000)
+
+# Rule mode -> (rules, template)
+MODES = {
+    "default": ([], None),
+    "strip_ad_lines": (["strip_ad_lines"], None),
+    "clean_links": (["clean_links"], None),
+    "block_keywords": (["block_keywords"], None),
+    "clean_keywords": (["clean_keywords"], None),
+    "keep_all": (["keep_all"], None),
+    "pangu": (["pangu"], None),
+    "template": (["clean_links"], "{orig}\n\n— {title} ({user})"),
+}
+
+# Keywords that do occur in the corpus, mixed into every synthetic set so matches actually happen
+_CORPUS_KEYWORDS = ["免费看", "加Q", "代理加盟", "解压码", "网盘链接"]
+
+
+def make_keywords(size: int, seed: int = 42) -> list:
+    """Deterministic plain keyword set of the given size."""
+    rng = random.Random(seed)
+    words = list(_CORPUS_KEYWORDS[: min(size, len(_CORPUS_KEYWORDS))])
+    seen = set(words)
+    while len(words) < size:
+        word = "".join(chr(rng.randint(0x4E00, 0x9FA5)) for _ in range(rng.randint(2, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return [(w, False) for w in words]
+
+
+@contextmanager
+def stub_repository(rules: list, keywords: list, template=None):
+    """Replaces the config lookups used by get_ruleset with in-memory values."""
+    names = ("get_chat_rules", "get_keywords", "get_replacements", "get_footer", "get_caption_template")
+    originals = {name: ChatRepository.__dict__[name] for name in names}
+
+    def const(value):
+        async def lookup(chat_id):
+            return value
+
+        return staticmethod(lookup)
+
+    values = (rules, keywords, [("高清", "HD")], "📢 订阅更新", template)
+    for name, value in zip(names, values):
+        setattr(ChatRepository, name, const(value))
+    invalidate_ruleset()
+    try:
+        yield
+    finally:
+        for name, original in originals.items():
+            setattr(ChatRepository, name, original)
+        invalidate_ruleset()
+
+
+def summarize(latencies_s: list) -> dict:
+    total = sum(latencies_s)
+    cuts = quantiles(latencies_s, n=100) if len(latencies_s) > 1 else latencies_s * 99
+    return {
+        "calls": len(latencies_s),
+        "per_sec": len(latencies_s) / total if total else 0.0,
+        "p50_us": cuts[49] * 1e6,
+        "p99_us": cuts[98] * 1e6,
+    }
+
+
+async def bench_clean_caption(captions: list, keywords: list, mode: str, repeat: int) -> dict:
+    rules, template = MODES[mode]
+    with stub_repository(rules, keywords, template):
+        # Warm-up builds the RuleSet, which is not part of the per-caption cost
+        await clean_caption(captions[0], "-100", 42, chat_title="Bench")
+        latencies = []
+        for _ in range(repeat):
+            for caption in captions:
+                start = time.perf_counter()
+                await clean_caption(caption, "-100", 42, chat_title="Bench")
+                latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+def bench_sync(fn, inputs: list, repeat: int) -> dict:
+    fn(inputs[0])
+    latencies = []
+    for _ in range(repeat):
+        for item in inputs:
+            start = time.perf_counter()
+            fn(item)
+            latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+async def run_suite(repeat: int, sizes) -> dict:
+    captions = load_captions()
+    lines = [line for caption in captions for line in caption.split("\n") if line.strip()]
+    results = []
+
+    def record(target: str, mode: str, size, stats: dict):
+        results.append({"target": target, "mode": mode, "keywords": size, **stats})
+        size_txt = "-" if size is None else str(size)
+        print(
+            f"{target:<20}{mode:<16}{size_txt:>7}{stats['per_sec']:>14,.0f}"
+            f"{stats['p50_us']:>11.1f}{stats['p99_us']:>11.1f}"
+        )
+
+    print(f"{'target':<20}{'mode':<16}{'kw':>7}{'captions/s':>14}{'p50 µs':>11}{'p99 µs':>11}")
+    record("strip_hidden_chars", "-", None, bench_sync(strip_hidden_chars, captions, repeat))
+    for size in sizes:
+        keywords = make_keywords(size)
+        for mode in MODES:
+            record("clean_caption", mode, size, await bench_clean_caption(captions, keywords, mode, repeat))
+        record("is_ad_line", "-", size, bench_sync(lambda line: is_ad_line(line, keywords), lines, repeat))
+        record(
+            "restore_all_tags",
+            "-",
+            size,
+            bench_sync(lambda caption: restore_all_tags(caption, "正文", keywords), captions, repeat),
+        )
+
+    return {
+        "bot_version": VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "corpus": {"version": CORPUS_VERSION, "digest": corpus_digest(), "captions": len(captions)},
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict):
+    """Prints throughput change per benchmark against an earlier JSON report."""
+    if baseline.get("corpus", {}).get("digest") != current["corpus"]["digest"]:
+        print("⚠️ Baseline used a different corpus; numbers are not comparable.")
+    old = {(r["target"], r["mode"], r["keywords"]): r for r in baseline.get("results", [])}
+    print(f"\nvs baseline v{baseline.get('bot_version', '?')} ({baseline.get('timestamp', '?')}):")
+    for r in current["results"]:
+        prev = old.get((r["target"], r["mode"], r["keywords"]))
+        if not prev or not prev["per_sec"]:
+            continue
+        change = (r["per_sec"] / prev["per_sec"] - 1) * 100
+        flag = "❌" if change < -10 else "✅" if change > 10 else "  "
+        size_txt = "-" if r["keywords"] is None else str(r["keywords"])
+        print(f"{flag} {r['target']:<20}{r['mode']:<16}{size_txt:>7}{change:>+9.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="passes over the corpus per benchmark")
+    parser.add_argument("--sizes", default=",".join(map(str, KEYWORD_SIZES)), help="keyword set sizes")
+    parser.add_argument("--json", help="write machine-readable results to this file ('-' for stdout)")
+    parser.add_argument("--compare", help="earlier --json output to compare against")
+    args = parser.parse_args()
+
+    clean_cache.configure(0)
+    line_cache.configure(0)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    report = asyncio.run(run_suite(args.repeat, sizes))
+
+    if args.json == "-":
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    elif args.json:
+        Path(args.json).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n📝 Results written to {args.json}")
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
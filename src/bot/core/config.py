@@ -126,12 +126,34 @@ ADMIN_IDS = get_admin_ids()
 DB_FILE = os.getenv("DB_FILE", str(BASE_DIR / "data/bot.db"))
 BACKUP_DIR = os.getenv("BACKUP_DIR", str(BASE_DIR / "backups"))
 LOG_FILE = os.getenv("LOG_FILE", str(BASE_DIR / "logs/bot.log"))
+# Read-only connections for SELECTs; 0 reads via the writer (see .env.example for when to raise it)
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "0"))
+DB_GROUP_COMMIT_MS = int(os.getenv("DB_GROUP_COMMIT_MS", "20"))  # Bookkeeping writes share a commit within this window
+DB_GROUP_COMMIT_MAX = int(os.getenv("DB_GROUP_COMMIT_MAX", "200"))  # ...or until this many statements are pending
+# SQLite performance profile, applied to every connection
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))  # Bytes of the DB file read via mmap, 0 disables
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "65536"))  # Page cache per connection
+DB_TEMP_STORE = os.getenv("DB_TEMP_STORE", "MEMORY").upper()  # DEFAULT, FILE or MEMORY
+DB_WAL_AUTOCHECKPOINT = int(os.getenv("DB_WAL_AUTOCHECKPOINT", "1000"))  # Pages; 0 leaves checkpoints to the idle job
+DB_JOURNAL_SIZE_LIMIT = int(os.getenv("DB_JOURNAL_SIZE_LIMIT", str(64 * 1024 * 1024)))  # WAL shrinks back to this
+# Idle WAL checkpointing
+DB_CHECKPOINT_INTERVAL = int(os.getenv("DB_CHECKPOINT_INTERVAL", "60"))  # Seconds between checks, 0 disables the job
+DB_CHECKPOINT_IDLE_S = int(os.getenv("DB_CHECKPOINT_IDLE_S", "10"))  # No writes for this long counts as idle
+DB_CHECKPOINT_TRUNCATE_MB = int(os.getenv("DB_CHECKPOINT_TRUNCATE_MB", "64"))  # Larger WALs get TRUNCATE, not PASSIVE
 
 # Forwarding Settings
 MAX_RETRY_COUNT = int(os.getenv("MAX_RETRY_COUNT", "5"))
 DEFAULT_DELAY_MIN = int(os.getenv("DEFAULT_DELAY_MIN", "10"))
 DEFAULT_DELAY_MAX = int(os.getenv("DEFAULT_DELAY_MAX", "60"))
 
+# Cleaner Settings
+CLEAN_CACHE_SIZE = int(os.getenv("CLEAN_CACHE_SIZE", "4096"))  # Cached cleaning results, 0 disables
+LINE_CACHE_SIZE = int(os.getenv("LINE_CACHE_SIZE", "512"))  # Ad-line verdicts cached per chat, 0 disables
+REGEX_WORKERS = int(os.getenv("REGEX_WORKERS", "2"))  # Processes running regex keywords, 0 runs them in-loop
+REGEX_TIMEOUT_MS = int(os.getenv("REGEX_TIMEOUT_MS", "250"))  # Per-caption budget for regex keywords
+REGEX_COST_WARN_US = float(os.getenv("REGEX_COST_WARN_US", "50"))  # /addkw warns above this cost per caption
+REGEX_COST_REJECT_US = float(os.getenv("REGEX_COST_REJECT_US", "500"))  # /addkw rejects above this cost per caption
+
 # Constants
 VERSION = "3.1.0"
 SECONDS_IN_DAY = 86400
@@ -2,21 +2,213 @@ import aiosqlite
 import asyncio
 import logging
 import contextlib
+import os
+import re
+import sqlite3
+import time
+from functools import partial
 from pathlib import Path
-from typing import List, Tuple, Any, Optional
+from typing import Callable, Dict, List, Set, Tuple, Any, Optional, TypeVar
 from src.bot.core import config
+from src.bot.data.migrations import SCHEMA_VERSION, migrate
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+_READ_SQL_RE = re.compile(r"\s*(SELECT|EXPLAIN|WITH)\b", re.IGNORECASE)
+# Whole words only, so columns such as updated_at or replaced_by do not count as writes
+_WRITE_VERB_RE = re.compile(r"\b(INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+
+
+def pragma_profile(writer: bool) -> List[str]:
+    """PRAGMAs of the configured performance profile; WAL sizing only matters on the writer connection."""
+    pragmas = [
+        f"PRAGMA mmap_size={max(0, config.DB_MMAP_SIZE)}",
+        # Negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size={-abs(config.DB_CACHE_SIZE_KB)}",
+        f"PRAGMA temp_store={config.DB_TEMP_STORE}",
+    ]
+    if writer:
+        pragmas += [
+            f"PRAGMA wal_autocheckpoint={max(0, config.DB_WAL_AUTOCHECKPOINT)}",
+            f"PRAGMA journal_size_limit={config.DB_JOURNAL_SIZE_LIMIT}",
+        ]
+    return pragmas
+
+
+def is_read_only(sql: str) -> bool:
+    """True for statements that can run on a read-only connection (SELECT, EXPLAIN, and CTEs that only select)."""
+    m = _READ_SQL_RE.match(sql)
+    if not m:
+        return False
+    return m.group(1).upper() != "WITH" or not _WRITE_VERB_RE.search(sql)
+
+
+def _transaction(fn: Callable[[sqlite3.Connection], T], conn: sqlite3.Connection) -> T:
+    """Runs fn and commits, or rolls back if it raises; called on the connection's own thread."""
+    try:
+        result = fn(conn)
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    return result
+
+
+def _read_only(fn: Callable[[sqlite3.Connection], T], conn: sqlite3.Connection) -> T:
+    """Runs fn on a pool connection; a transaction left open (e.g. by a rejected write) would pin an old snapshot."""
+    try:
+        return fn(conn)
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+
+
+def _statement(sql: str, args: tuple, fetchone: bool, fetchall: bool, conn: sqlite3.Connection) -> Any:
+    cursor = conn.execute(sql, args)
+    try:
+        if fetchone:
+            return cursor.fetchone()
+        if fetchall:
+            return cursor.fetchall()
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+
+def _rowcounts(stmts: List[Tuple[str, tuple]], conn: sqlite3.Connection) -> List[int]:
+    return [_statement(sql, args, False, False, conn) for sql, args in stmts]
+
+
+class GroupCommitter:
+    """
+    Write-behind actor for high-frequency bookkeeping writes: statements submitted within DB_GROUP_COMMIT_MS
+    (or until DB_GROUP_COMMIT_MAX are pending) share one transaction and one commit.
+    submit() returns a future resolving to the statement's rowcount once committed; await it for durability.
+    """
+
+    def __init__(self, manager: "DatabaseManager", interval_ms: int, max_batch: int):
+        self.manager = manager
+        self.interval = max(0, interval_ms) / 1000
+        self.max_batch = max(1, max_batch)
+        self._pending: List[Tuple[str, tuple, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+        self.reset_stats()
+
+    def submit(self, sql: str, args: tuple = ()) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # Fire-and-forget callers never read the outcome; failures are logged by the flush
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        if self.interval == 0:
+            # Group commit disabled: every statement gets its own transaction
+            self._start_flush([(sql, args, future)])
+            return future
+        self._pending.append((sql, args, future))
+        if len(self._pending) >= self.max_batch:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            batch, self._pending = self._pending, []
+            self._start_flush(batch)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.interval, self._start_flush)
+        return future
+
+    def _start_flush(self, batch: Optional[list] = None):
+        task = asyncio.ensure_future(self.flush(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def flush(self, batch: Optional[list] = None) -> None:
+        """Commits everything pending (or the given batch) in one transaction."""
+        if batch is None:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        async with self.manager._write_lock:
+            db = await self.manager.get_db()
+            results: List[Any]
+            try:
+                # The whole batch is one unit of work: a single hop to the database thread
+                stmts = [(sql, args) for sql, args, _ in batch]
+                results = await self.manager._call(db, partial(_transaction, partial(_rowcounts, stmts)))
+                self.manager.last_write = time.monotonic()
+                self.commits += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Group commit of {len(batch)} statement(s) failed ({e}), retrying one by one")
+                # One bad statement must not sink the others
+                results = []
+                for sql, args, _ in batch:
+                    try:
+                        unit = partial(_transaction, partial(_statement, sql, args, False, False))
+                        results.append(await self.manager._call(db, unit))
+                        self.commits += 1
+                    except Exception as stmt_err:
+                        logger.error(f"❌ SQL Error: {sql} | {stmt_err}")
+                        results.append(stmt_err)
+
+        self.statements += len(batch)
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            try:
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            except RuntimeError:
+                pass  # The submitting event loop is gone (e.g. flushed during shutdown)
+
+    async def drain(self) -> None:
+        """Waits for in-flight flushes and commits whatever is still pending."""
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self._since
+        return {
+            "enabled": self.interval > 0 and self.max_batch > 1,
+            "interval_ms": self.interval * 1000,
+            "max_batch": self.max_batch,
+            "pending": len(self._pending),
+            "commits": self.commits,
+            "statements": self.statements,
+            "commits_per_sec": self.commits / elapsed if elapsed > 0 else 0.0,
+            "avg_batch": self.statements / self.commits if self.commits else 0.0,
+        }
+
+    def reset_stats(self):
+        self.commits = 0
+        self.statements = 0
+        self._since = time.monotonic()
+
 
 class DatabaseManager:
     _instance = None
     _conn: Optional[aiosqlite.Connection] = None
     _write_lock = asyncio.Lock()
+    # Read-only connections (WAL lets them run beside the writer); idle ones wait in _idle_readers
+    _readers: List[aiosqlite.Connection] = []
+    _idle_readers: Optional[asyncio.Queue] = None
+    _readers_loop: Optional[asyncio.AbstractEventLoop] = None
+    # Monotonic time of the last committed write, used to find idle periods for checkpoints
+    last_write: float = 0.0
+    last_checkpoint: Optional[Dict[str, Any]] = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(DatabaseManager, cls).__new__(cls)
+            cls._instance.group_commit = GroupCommitter(
+                cls._instance, config.DB_GROUP_COMMIT_MS, config.DB_GROUP_COMMIT_MAX
+            )
         return cls._instance
 
     async def get_db(self) -> aiosqlite.Connection:
@@ -30,224 +222,143 @@ class DatabaseManager:
                 await self._conn.execute("PRAGMA journal_mode=WAL;")
                 await self._conn.execute("PRAGMA synchronous=NORMAL;")
                 await self._conn.execute("PRAGMA busy_timeout=30000;")
+                for pragma in pragma_profile(writer=True):
+                    await self._conn.execute(pragma)
                 await self._conn.commit()
                 logger.info(f"🔌 Database connected: {db_path.name} (WAL Mode)")
 
                 # Auto-initialize tables
                 await self.init_db()
+                await self._open_readers(db_path)
             except Exception as e:
                 logger.error(f"❌ DB Init Error: {e}")
-                self._conn = None
+                await self.close()
                 raise
         return self._conn
 
-    async def init_db(self) -> None:
-        """Creates all necessary tables and indexes if they don't exist."""
-        schemas = [
-            # Core Tables
-            """CREATE TABLE IF NOT EXISTS chats (
-                chat_id TEXT PRIMARY KEY, 
-                title TEXT, 
-                created_at INTEGER DEFAULT (strftime('%s','now'))
-            )""",
-            """CREATE TABLE IF NOT EXISTS admins (
-                user_id TEXT PRIMARY KEY
-            )""",
-            # Deduplication Tables
-            """CREATE TABLE IF NOT EXISTS media_dedup_log (
-                target_chat_id TEXT,
-                file_unique_id TEXT,
-                created_at INTEGER,
-                PRIMARY KEY (target_chat_id, file_unique_id)
-            )""",
-            """CREATE TABLE IF NOT EXISTS seen (
-                chat_id TEXT, 
-                file_unique_id TEXT, 
-                created_at INTEGER,
-                PRIMARY KEY (chat_id, file_unique_id)
-            )""",
-            """CREATE TABLE IF NOT EXISTS forward_seen (
-                chat_id TEXT, 
-                file_unique_id TEXT,
-                created_at INTEGER,
-                PRIMARY KEY (chat_id, file_unique_id)
-            )""",
-            # Forwarding Logic
-            """CREATE TABLE IF NOT EXISTS forward_queue (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                target_chat_id TEXT,
-                media_type TEXT,
-                file_id TEXT,
-                caption TEXT,
-                has_spoiler INTEGER DEFAULT 0,
-                file_unique_id TEXT,
-                media_group_id TEXT,
-                created_at INTEGER,
-                retry_count INTEGER DEFAULT 0,
-                priority INTEGER DEFAULT 0,
-                source_chat_id TEXT,
-                source_msg_id TEXT,
-                status INTEGER DEFAULT 0, -- 0: waiting, 1: processing
-                updated_at INTEGER
-            )""",
-            """CREATE TABLE IF NOT EXISTS forward_log (
-                source_chat_id TEXT,
-                source_msg_id TEXT,
-                target_chat_id TEXT,
-                target_msg_id TEXT,
-                created_at INTEGER,
-                PRIMARY KEY (source_chat_id, source_msg_id, target_chat_id)
-            )""",
-            """CREATE TABLE IF NOT EXISTS dead_letter_queue (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                target_chat_id TEXT,
-                media_type TEXT,
-                file_id TEXT,
-                caption TEXT,
-                has_spoiler INTEGER DEFAULT 0,
-                file_unique_id TEXT,
-                media_group_id TEXT,
-                failed_at INTEGER,
-                reason TEXT,
-                source_chat_id TEXT,
-                source_msg_id TEXT
-            )""",
-            # Configuration Tables
-            """CREATE TABLE IF NOT EXISTS forward_map (
-                source_chat_id TEXT, 
-                target_chat_id TEXT,
-                PRIMARY KEY (source_chat_id, target_chat_id)
-            )""",
-            """CREATE TABLE IF NOT EXISTS rules (
-                chat_id TEXT, 
-                rule TEXT,
-                PRIMARY KEY (chat_id, rule)
-            )""",
-            """CREATE TABLE IF NOT EXISTS keywords (
-                chat_id TEXT, 
-                word TEXT, 
-                is_regex INTEGER DEFAULT 0,
-                PRIMARY KEY (chat_id, word)
-            )""",
-            """CREATE TABLE IF NOT EXISTS replacements (
-                chat_id TEXT, 
-                old_word TEXT, 
-                new_word TEXT,
-                PRIMARY KEY (chat_id, old_word)
-            )""",
-            """CREATE TABLE IF NOT EXISTS footers (
-                chat_id TEXT PRIMARY KEY, 
-                text TEXT
-            )""",
-            """CREATE TABLE IF NOT EXISTS chat_locks (
-                chat_id TEXT PRIMARY KEY, 
-                is_locked INTEGER DEFAULT 0
-            )""",
-            """CREATE TABLE IF NOT EXISTS user_whitelist (
-                chat_id TEXT, 
-                user_id TEXT,
-                PRIMARY KEY (chat_id, user_id)
-            )""",
-            """CREATE TABLE IF NOT EXISTS triggers (
-                chat_id TEXT, 
-                trigger_word TEXT, 
-                response_text TEXT,
-                PRIMARY KEY (chat_id, trigger_word)
-            )""",
-            """CREATE TABLE IF NOT EXISTS caption_templates (
-                chat_id TEXT PRIMARY KEY, 
-                template TEXT
-            )""",
-            """CREATE TABLE IF NOT EXISTS media_filters (
-                chat_id TEXT PRIMARY KEY, 
-                allowed_types TEXT
-            )""",
-            """CREATE TABLE IF NOT EXISTS quiet_settings (
-                chat_id TEXT PRIMARY KEY, 
-                mode TEXT DEFAULT 'off'
-            )""",
-            """CREATE TABLE IF NOT EXISTS vote_settings (
-                chat_id TEXT PRIMARY KEY, 
-                is_enabled INTEGER DEFAULT 0
-            )""",
-            """CREATE TABLE IF NOT EXISTS votes (
-                chat_id TEXT, 
-                message_id TEXT, 
-                user_id TEXT, 
-                vote_type TEXT,
-                PRIMARY KEY (chat_id, message_id, user_id)
-            )""",
-            """CREATE TABLE IF NOT EXISTS log_settings (
-                chat_id TEXT PRIMARY KEY, 
-                log_channel TEXT
-            )""",
-            """CREATE TABLE IF NOT EXISTS log_filters (
-                chat_id TEXT PRIMARY KEY, 
-                categories TEXT
-            )""",
-            """CREATE TABLE IF NOT EXISTS forward_settings (
-                min_delay INTEGER DEFAULT 10,
-                max_delay INTEGER DEFAULT 60
-            )""",
-            """CREATE TABLE IF NOT EXISTS global_settings (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )""",
-            # Outbound and Inbound Tracking
-            """CREATE TABLE IF NOT EXISTS outbound_messages (
-                chat_id TEXT,
-                message_id TEXT,
-                created_at INTEGER,
-                PRIMARY KEY (chat_id, message_id)
-            )""",
-            """CREATE TABLE IF NOT EXISTS processed_messages (
-                chat_id TEXT,
-                message_id TEXT,
-                file_unique_id TEXT,
-                media_group_id TEXT,
-                created_at INTEGER,
-                PRIMARY KEY (chat_id, message_id)
-            )""",
-            # Indexes
-            "CREATE INDEX IF NOT EXISTS idx_seen_chat ON seen(chat_id)",
-            "CREATE INDEX IF NOT EXISTS idx_dedup_log ON media_dedup_log(target_chat_id, file_unique_id)",
-            "CREATE INDEX IF NOT EXISTS idx_fqueue_status ON forward_queue(status, updated_at)",
-            "CREATE INDEX IF NOT EXISTS idx_fqueue_priority ON forward_queue(priority DESC, id ASC)",
-            "CREATE UNIQUE INDEX IF NOT EXISTS idx_fqueue_dedup ON forward_queue(target_chat_id, file_unique_id, IFNULL(media_group_id, ''))",
-            "CREATE INDEX IF NOT EXISTS idx_proc_fuid ON processed_messages(chat_id, file_unique_id)",
-            "CREATE INDEX IF NOT EXISTS idx_outbound_msg ON outbound_messages(chat_id, message_id)",
-        ]
+    async def _open_readers(self, db_path: Path) -> None:
+        """Opens DB_READ_POOL_SIZE read-only connections; the schema and WAL files already exist at this point."""
+        self._readers = []
+        self._idle_readers = asyncio.Queue()
+        for _ in range(max(0, config.DB_READ_POOL_SIZE)):
+            conn = await aiosqlite.connect(f"{db_path.as_uri()}?mode=ro", uri=True)
+            await conn.execute("PRAGMA busy_timeout=30000;")
+            for pragma in pragma_profile(writer=False):
+                await conn.execute(pragma)
+            self._readers.append(conn)
+            self._idle_readers.put_nowait(conn)
+        if self._readers:
+            logger.info(f"📖 Read pool ready: {len(self._readers)} connection(s)")
 
+    @contextlib.asynccontextmanager
+    async def reader(self):
+        """Borrows a read-only connection, or the writer connection when the pool is disabled."""
+        writer = await self.get_db()
+        if not self._readers:
+            yield writer
+            return
+        loop = asyncio.get_running_loop()
+        if loop is not self._readers_loop:
+            # An asyncio.Queue is bound to the loop that first waits on it; restock it when the loop changes
+            self._idle_readers = asyncio.Queue()
+            for idle in self._readers:
+                self._idle_readers.put_nowait(idle)
+            self._readers_loop = loop
+        conn = await self._idle_readers.get()
+        try:
+            yield conn
+        finally:
+            self._idle_readers.put_nowait(conn)
+
+    async def init_db(self) -> None:
+        """Brings the schema up to date (see migrations.py); on a current database this is one PRAGMA read."""
         db = await self.get_db()
-        for sql in schemas:
-            try:
-                await db.execute(sql)
-            except Exception as e:
-                # Handle cases where column might already exist or table mismatch
-                if "already exists" in str(e).lower():
-                    continue
-                logger.warning(f"⚠️ Schema migration notice: {e}")
-
-        # Incremental Migration: Add created_at if missing
-        tables_to_patch = [("forward_seen", "created_at", "INTEGER"), ("forward_log", "created_at", "INTEGER")]
-        for table, col, col_type in tables_to_patch:
-            try:
-                await db.execute(f"ALTER TABLE {table} ADD COLUMN {col} {col_type}")
-                logger.info(f"✨ Patched table {table} with column {col}")
-            except Exception:
-                pass  # Column already exists
+        applied = await self._call(db, migrate)
+        if applied:
+            logger.info(f"🛠 Database schema migrated to v{applied[-1]} ({len(applied)} migration(s)).")
+        else:
+            logger.info(f"🛠 Database schema up to date (v{SCHEMA_VERSION}).")
 
-        # Migration: populate media_dedup_log from legacy forward_seen and seen
+    @staticmethod
+    def wal_size() -> int:
+        """Current size of the WAL file in bytes."""
         try:
-            await db.execute("INSERT OR IGNORE INTO media_dedup_log (target_chat_id, file_unique_id, created_at) SELECT chat_id, file_unique_id, created_at FROM forward_seen WHERE file_unique_id IS NOT NULL")
-            await db.execute("INSERT OR IGNORE INTO media_dedup_log (target_chat_id, file_unique_id, created_at) SELECT chat_id, file_unique_id, created_at FROM seen WHERE file_unique_id IS NOT NULL")
-        except Exception as mig_err:
-            logger.debug(f"Dedup log migration notice: {mig_err}")
+            return Path(f"{Path(config.DB_FILE).resolve()}-wal").stat().st_size
+        except OSError:
+            return 0
+
+    async def checkpoint(self, mode: str = "PASSIVE") -> Dict[str, Any]:
+        """
+        Runs a WAL checkpoint (PASSIVE never blocks; TRUNCATE waits for readers and resets the WAL file)
+        and records the outcome in last_checkpoint.
+        """
+        mode = mode.upper()
+        if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+            raise ValueError(f"Unknown checkpoint mode: {mode}")
+        before = self.wal_size()
+        start = time.perf_counter()
+        async with self._write_lock:
+            db = await self.get_db()
+            busy, log_frames, done_frames = await self._call(
+                db, lambda conn: conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+            )
+        self.last_checkpoint = {
+            "mode": mode,
+            "busy": bool(busy),
+            "log_frames": log_frames,
+            "checkpointed": done_frames,
+            "wal_before": before,
+            "wal_after": self.wal_size(),
+            "elapsed_ms": (time.perf_counter() - start) * 1000,
+            "at": time.time(),
+        }
+        return self.last_checkpoint
 
-        await db.commit()
-        logger.info("🛠 Database schema verified/initialized.")
+    async def idle_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """Checkpoints if nothing was written for DB_CHECKPOINT_IDLE_S; returns None when the DB was busy."""
+        if self._conn is None or time.monotonic() - self.last_write < config.DB_CHECKPOINT_IDLE_S:
+            return None
+        wal = self.wal_size()
+        if not wal:
+            return None
+        mode = "TRUNCATE" if wal >= config.DB_CHECKPOINT_TRUNCATE_MB * 1024 * 1024 else "PASSIVE"
+        result = await self.checkpoint(mode)
+        level = logging.WARNING if result["busy"] else logging.INFO
+        logger.log(
+            level,
+            f"🧾 WAL checkpoint ({mode}): {result['wal_before'] / 1048576:.1f} MB -> "
+            f"{result['wal_after'] / 1048576:.1f} MB, {result['checkpointed']}/{result['log_frames']} frames"
+            f"{' (readers busy)' if result['busy'] else ''} in {result['elapsed_ms']:.0f}ms",
+        )
+        return result
+
+    def submit_write(self, sql: str, args: tuple = ()) -> asyncio.Future:
+        """Queues a write for the next group commit; the future resolves to its rowcount once committed."""
+        return self.group_commit.submit(sql, args)
+
+    async def restore(self, data: bytes) -> None:
+        """
+        Replaces the database file with data (an SQLite file such as a /backupdb upload). Pending group-commit
+        writes are committed and every connection closed first, the old WAL is discarded so it cannot be replayed
+        onto the new file, and the reopened database is migrated to the current schema by init_db.
+        """
+        if not data.startswith(b"SQLite format 3\x00"):
+            raise ValueError("not an SQLite database file")
+        await self.close()
+        db_path = Path(config.DB_FILE).resolve()
+        staged = db_path.with_name(f"{db_path.name}.restore")
+        staged.write_bytes(data)
+        for suffix in ("-wal", "-shm"):
+            Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+        os.replace(staged, db_path)
+        await self.get_db()
 
     async def close(self) -> None:
+        if self._conn:
+            await self.group_commit.drain()
+        readers, self._readers, self._idle_readers, self._readers_loop = self._readers, [], None, None
+        for conn in readers:
+            await conn.close()
         if self._conn:
             await self._conn.close()
             self._conn = None
@@ -261,46 +372,63 @@ class DatabaseManager:
         except Exception:
             return False
 
+    @staticmethod
+    async def _call(db: aiosqlite.Connection, fn: Callable[[sqlite3.Connection], T]) -> T:
+        # aiosqlite runs every call on the connection's worker thread; queueing fn there directly makes
+        # a whole unit of work one thread hop instead of one (or more) per statement.
+        # Connection._execute and _conn are private: aiosqlite is pinned (requirements.txt, pyproject.toml) and
+        # tests/test_database.py checks both, so an upgrade that drops them fails the suite instead of production
+        try:
+            execute, conn = db._execute, db._conn
+        except AttributeError as e:
+            raise RuntimeError(
+                f"aiosqlite {aiosqlite.__version__} has no Connection.{e.name}; DatabaseManager._call needs updating"
+            ) from e
+        return await execute(fn, conn)
+
+    async def run_in_connection(self, fn: Callable[[sqlite3.Connection], T], write: bool = True) -> T:
+        """
+        Runs fn(conn) with a plain sqlite3 connection on the database thread, as one unit of work.
+        Writes hold the write lock and commit once fn returns (rolling back if it raises);
+        with write=False, fn runs on a read-only pool connection.
+        """
+        if not write:
+            async with self.reader() as db:
+                return await self._call(db, partial(_read_only, fn))
+        async with self._write_lock:
+            db = await self.get_db()
+            try:
+                return await self._call(db, partial(_transaction, fn))
+            finally:
+                self.last_write = time.monotonic()
+
+    async def read(self, sql: str, args: tuple = (), fetchone: bool = False, fetchall: bool = False) -> Any:
+        """Runs a query on a read-only connection, without waiting for the write lock."""
+        try:
+            return await self.run_in_connection(partial(_statement, sql, args, fetchone, fetchall), write=False)
+        except Exception as e:
+            logger.error(f"❌ SQL Error: {sql} | {e}")
+            raise
+
+    async def write(self, sql: str, args: tuple = (), fetchone: bool = False, fetchall: bool = False) -> Any:
+        """Runs a statement on the writer connection and commits it."""
+        try:
+            return await self.run_in_connection(partial(_statement, sql, args, fetchone, fetchall))
+        except Exception as e:
+            logger.error(f"❌ SQL Error: {sql} | {e}")
+            raise
+
     async def execute(
         self, sql: str, args: tuple = (), fetchone: bool = False, fetchall: bool = False, commit: bool = False
     ) -> Any:
-        sql_u = sql.strip().upper()
-        is_write = any(
-            k in sql_u for k in ["INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP", "ALTER", "VACUUM"]
-        )
-        lock = self._write_lock if (is_write or commit) else contextlib.nullcontext()
-        async with lock:
-            db = await self.get_db()
-            try:
-                async with db.execute(sql, args) as cursor:
-                    if fetchone:
-                        res = await cursor.fetchone()
-                    elif fetchall:
-                        res = await cursor.fetchall()
-                    else:
-                        res = cursor.rowcount
-
-                    if commit or is_write:
-                        await db.commit()
-
-                    return res
-            except Exception as e:
-                logger.error(f"❌ SQL Error: {sql} | {e}")
-                if commit or is_write:
-                    await db.rollback()
-                raise
+        """Routes sql to read() or write(); commit=True forces the writer."""
+        if commit or not is_read_only(sql):
+            return await self.write(sql, args, fetchone=fetchone, fetchall=fetchall)
+        return await self.read(sql, args, fetchone=fetchone, fetchall=fetchall)
 
     async def execute_many(self, stmts: List[Tuple[str, tuple]]):
-        async with self._write_lock:
-            db = await self.get_db()
-            try:
-                async with db.cursor() as cursor:
-                    for s, a in stmts:
-                        await cursor.execute(s, a)
-                await db.commit()
-            except Exception:
-                await db.rollback()
-                raise
+        """Runs all statements in one transaction and one thread hop."""
+        await self.run_in_connection(partial(_rowcounts, stmts))
 
 
 db_manager = DatabaseManager()
@@ -0,0 +1,362 @@
+"""
+Versioned schema migrations. The schema version is kept in PRAGMA user_version: on startup only the migrations
+newer than it run, each exactly once and in its own transaction together with the version bump.
+Append new migrations to MIGRATIONS; never edit or renumber one that has shipped.
+"""
+
+import logging
+import sqlite3
+import time
+from typing import Callable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Tables and indexes as of the first versioned schema; created only where missing, so pre-versioning
+# databases pass through unchanged
+BASE_SCHEMA = [
+    # Core Tables
+    """CREATE TABLE IF NOT EXISTS chats (
+        chat_id TEXT PRIMARY KEY, 
+        title TEXT, 
+        created_at INTEGER DEFAULT (strftime('%s','now'))
+    )""",
+    """CREATE TABLE IF NOT EXISTS admins (
+        user_id TEXT PRIMARY KEY
+    )""",
+    # Deduplication Tables
+    """CREATE TABLE IF NOT EXISTS media_dedup_log (
+        target_chat_id TEXT,
+        file_unique_id TEXT,
+        created_at INTEGER,
+        PRIMARY KEY (target_chat_id, file_unique_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS seen (
+        chat_id TEXT, 
+        file_unique_id TEXT, 
+        created_at INTEGER,
+        PRIMARY KEY (chat_id, file_unique_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS forward_seen (
+        chat_id TEXT, 
+        file_unique_id TEXT,
+        created_at INTEGER,
+        PRIMARY KEY (chat_id, file_unique_id)
+    )""",
+    # Forwarding Logic
+    """CREATE TABLE IF NOT EXISTS forward_queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        target_chat_id TEXT,
+        media_type TEXT,
+        file_id TEXT,
+        caption TEXT,
+        has_spoiler INTEGER DEFAULT 0,
+        file_unique_id TEXT,
+        media_group_id TEXT,
+        created_at INTEGER,
+        retry_count INTEGER DEFAULT 0,
+        priority INTEGER DEFAULT 0,
+        source_chat_id TEXT,
+        source_msg_id TEXT,
+        status INTEGER DEFAULT 0, -- 0: waiting, 1: processing
+        updated_at INTEGER
+    )""",
+    """CREATE TABLE IF NOT EXISTS forward_log (
+        source_chat_id TEXT,
+        source_msg_id TEXT,
+        target_chat_id TEXT,
+        target_msg_id TEXT,
+        created_at INTEGER,
+        PRIMARY KEY (source_chat_id, source_msg_id, target_chat_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS dead_letter_queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        target_chat_id TEXT,
+        media_type TEXT,
+        file_id TEXT,
+        caption TEXT,
+        has_spoiler INTEGER DEFAULT 0,
+        file_unique_id TEXT,
+        media_group_id TEXT,
+        failed_at INTEGER,
+        reason TEXT,
+        source_chat_id TEXT,
+        source_msg_id TEXT
+    )""",
+    # Configuration Tables
+    """CREATE TABLE IF NOT EXISTS forward_map (
+        source_chat_id TEXT, 
+        target_chat_id TEXT,
+        PRIMARY KEY (source_chat_id, target_chat_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS rules (
+        chat_id TEXT, 
+        rule TEXT,
+        PRIMARY KEY (chat_id, rule)
+    )""",
+    """CREATE TABLE IF NOT EXISTS keywords (
+        chat_id TEXT, 
+        word TEXT, 
+        is_regex INTEGER DEFAULT 0,
+        cost_us REAL,
+        PRIMARY KEY (chat_id, word)
+    )""",
+    """CREATE TABLE IF NOT EXISTS replacements (
+        chat_id TEXT, 
+        old_word TEXT, 
+        new_word TEXT,
+        PRIMARY KEY (chat_id, old_word)
+    )""",
+    """CREATE TABLE IF NOT EXISTS footers (
+        chat_id TEXT PRIMARY KEY, 
+        text TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS chat_locks (
+        chat_id TEXT PRIMARY KEY, 
+        is_locked INTEGER DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS user_whitelist (
+        chat_id TEXT, 
+        user_id TEXT,
+        PRIMARY KEY (chat_id, user_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS triggers (
+        chat_id TEXT, 
+        trigger_word TEXT, 
+        response_text TEXT,
+        PRIMARY KEY (chat_id, trigger_word)
+    )""",
+    """CREATE TABLE IF NOT EXISTS caption_templates (
+        chat_id TEXT PRIMARY KEY, 
+        template TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS media_filters (
+        chat_id TEXT PRIMARY KEY, 
+        allowed_types TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS quiet_settings (
+        chat_id TEXT PRIMARY KEY, 
+        mode TEXT DEFAULT 'off'
+    )""",
+    """CREATE TABLE IF NOT EXISTS vote_settings (
+        chat_id TEXT PRIMARY KEY, 
+        is_enabled INTEGER DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS votes (
+        chat_id TEXT, 
+        message_id TEXT, 
+        user_id TEXT, 
+        vote_type TEXT,
+        PRIMARY KEY (chat_id, message_id, user_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS log_settings (
+        chat_id TEXT PRIMARY KEY, 
+        log_channel TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS log_filters (
+        chat_id TEXT PRIMARY KEY, 
+        categories TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS forward_settings (
+        min_delay INTEGER DEFAULT 10,
+        max_delay INTEGER DEFAULT 60
+    )""",
+    """CREATE TABLE IF NOT EXISTS global_settings (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )""",
+    # Outbound and Inbound Tracking
+    """CREATE TABLE IF NOT EXISTS outbound_messages (
+        chat_id TEXT,
+        message_id TEXT,
+        created_at INTEGER,
+        PRIMARY KEY (chat_id, message_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS processed_messages (
+        chat_id TEXT,
+        message_id TEXT,
+        file_unique_id TEXT,
+        media_group_id TEXT,
+        created_at INTEGER,
+        PRIMARY KEY (chat_id, message_id)
+    )""",
+    # Indexes
+    "CREATE INDEX IF NOT EXISTS idx_seen_chat ON seen(chat_id)",
+    "CREATE INDEX IF NOT EXISTS idx_dedup_log ON media_dedup_log(target_chat_id, file_unique_id)",
+    "CREATE INDEX IF NOT EXISTS idx_fqueue_status ON forward_queue(status, updated_at)",
+    "CREATE INDEX IF NOT EXISTS idx_fqueue_priority ON forward_queue(priority DESC, id ASC)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_fqueue_dedup ON forward_queue(target_chat_id, file_unique_id, IFNULL(media_group_id, ''))",
+    "CREATE INDEX IF NOT EXISTS idx_proc_fuid ON processed_messages(chat_id, file_unique_id)",
+    "CREATE INDEX IF NOT EXISTS idx_outbound_msg ON outbound_messages(chat_id, message_id)",
+]
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _create_base_schema(conn: sqlite3.Connection) -> None:
+    """
+    Creates whatever BASE_SCHEMA objects are missing, so any pre-versioning database passes, including one an
+    older release left half-patched: existing tables get only the columns they lack (before the indexes that
+    use them), and an index that cannot be built there is skipped with a warning, as init_db used to.
+    """
+    # The declared columns and index targets, read back from a scratch database rather than parsed
+    declared = sqlite3.connect(":memory:")
+    try:
+        for sql in BASE_SCHEMA:
+            declared.execute(sql)
+        index_tables = dict(declared.execute("SELECT name, tbl_name FROM sqlite_master WHERE type = 'index'"))
+        table_names = [r[0] for r in declared.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        columns = {name: declared.execute(f"PRAGMA table_info({name})").fetchall() for name in table_names}
+    finally:
+        declared.close()
+
+    kinds = dict(conn.execute("SELECT name, type FROM sqlite_master"))
+    indexes = []
+    for sql in BASE_SCHEMA:
+        if sql.lstrip().upper().startswith("CREATE TABLE"):
+            conn.execute(sql)
+        else:
+            indexes.append(sql)
+
+    for table, cols in columns.items():
+        if kinds.get(table) != "table":
+            continue
+        present = _columns(conn, table)
+        for _, col, col_type, _, default, pk in cols:
+            if col in present:
+                continue
+            if pk:
+                logger.warning(f"⚠️ Table {table} lacks key column {col}; left as is")
+                continue
+            add = f"ALTER TABLE {table} ADD COLUMN {col} {col_type}"
+            try:
+                conn.execute(f"{add} DEFAULT {default}" if default is not None else add)
+            except sqlite3.OperationalError:
+                # Non-constant defaults (e.g. strftime) cannot be added to a table that has rows
+                conn.execute(add)
+            logger.info(f"✨ Patched table {table} with column {col}")
+
+    for sql in indexes:
+        name = sql.split(" IF NOT EXISTS ")[1].split()[0]
+        if name in kinds:
+            continue
+        try:
+            conn.execute(sql)
+        except sqlite3.DatabaseError as e:
+            # e.g. legacy rows that break a UNIQUE index, or a view where a table is expected
+            logger.warning(f"⚠️ Index {name} on {index_tables.get(name)} not created: {e}")
+
+
+def _add_legacy_columns(conn: sqlite3.Connection) -> None:
+    """Columns that databases created by older releases lack."""
+    for table, col, col_type in (
+        ("forward_seen", "created_at", "INTEGER"),
+        ("forward_log", "created_at", "INTEGER"),
+        ("keywords", "cost_us", "REAL"),
+    ):
+        if col not in _columns(conn, table):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {col} {col_type}")
+            logger.info(f"✨ Patched table {table} with column {col}")
+
+
+def _backfill_dedup_log(conn: sqlite3.Connection) -> None:
+    """Populates media_dedup_log from the legacy forward_seen and seen tables (full scans, so only once)."""
+    conn.execute(
+        "INSERT OR IGNORE INTO media_dedup_log (target_chat_id, file_unique_id, created_at) "
+        "SELECT chat_id, file_unique_id, created_at FROM forward_seen WHERE file_unique_id IS NOT NULL"
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO media_dedup_log (target_chat_id, file_unique_id, created_at) "
+        "SELECT chat_id, file_unique_id, created_at FROM seen WHERE file_unique_id IS NOT NULL"
+    )
+
+
+def _merge_dedup_tables(conn: sqlite3.Connection) -> None:
+    """
+    Replaces media_dedup_log, seen and forward_seen (three copies of every key, each with its own indexes)
+    with one media_dedup table whose flag columns record which legacy tables held the key.
+    The old names stay available as read-only views.
+    """
+    conn.execute(
+        """CREATE TABLE media_dedup (
+            chat_id TEXT NOT NULL,
+            file_unique_id TEXT NOT NULL,
+            created_at INTEGER,
+            seen INTEGER NOT NULL DEFAULT 0,
+            forwarded INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (chat_id, file_unique_id)
+        ) WITHOUT ROWID"""
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO media_dedup (chat_id, file_unique_id, created_at) "
+        "SELECT target_chat_id, file_unique_id, created_at FROM media_dedup_log "
+        "WHERE target_chat_id IS NOT NULL AND file_unique_id IS NOT NULL"
+    )
+    for table, flag in (("seen", "seen"), ("forward_seen", "forwarded")):
+        conn.execute(
+            f"INSERT INTO media_dedup (chat_id, file_unique_id, created_at, {flag}) "
+            f"SELECT chat_id, file_unique_id, created_at, 1 FROM {table} "
+            f"WHERE chat_id IS NOT NULL AND file_unique_id IS NOT NULL "
+            f"ON CONFLICT (chat_id, file_unique_id) DO UPDATE SET {flag} = 1"
+        )
+    for table in ("media_dedup_log", "seen", "forward_seen"):
+        conn.execute(f"DROP TABLE {table}")
+    conn.execute(
+        "CREATE VIEW media_dedup_log AS "
+        "SELECT chat_id AS target_chat_id, file_unique_id, created_at FROM media_dedup"
+    )
+    conn.execute("CREATE VIEW seen AS SELECT chat_id, file_unique_id, created_at FROM media_dedup WHERE seen = 1")
+    conn.execute(
+        "CREATE VIEW forward_seen AS SELECT chat_id, file_unique_id, created_at FROM media_dedup WHERE forwarded = 1"
+    )
+
+
+def _add_keyword_quarantine(conn: sqlite3.Connection) -> None:
+    """Persists regex keyword quarantines (src/cleaner/regex_guard.py) so they survive restarts."""
+    if "quarantined" not in _columns(conn, "keywords"):
+        conn.execute("ALTER TABLE keywords ADD COLUMN quarantined INTEGER NOT NULL DEFAULT 0")
+
+
+Migration = Tuple[int, str, Callable[[sqlite3.Connection], None]]
+
+MIGRATIONS: List[Migration] = [
+    (1, "base schema", _create_base_schema),
+    (2, "legacy created_at/cost_us columns", _add_legacy_columns),
+    (3, "backfill media_dedup_log from seen tables", _backfill_dedup_log),
+    (4, "merge dedup tables into media_dedup", _merge_dedup_tables),
+    (5, "keywords.quarantined column", _add_keyword_quarantine),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> List[int]:
+    """Applies every migration newer than the database's user_version; returns the versions applied."""
+    current = schema_version(conn)
+    if current > SCHEMA_VERSION:
+        logger.warning(f"⚠️ Database schema v{current} is newer than this release (v{SCHEMA_VERSION})")
+        return []
+
+    applied = []
+    for version, name, step in MIGRATIONS:
+        if version <= current:
+            continue
+        start = time.perf_counter()
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN")
+        try:
+            step(conn)
+            conn.execute(f"PRAGMA user_version={version}")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        applied.append(version)
+        logger.info(f"🛠 Migration {version} ({name}) applied in {(time.perf_counter() - start) * 1000:.0f}ms")
+    return applied
@@ -1,6 +1,7 @@
 import time
+import asyncio
 import logging
-from typing import List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
 from src.bot.data.database import db_manager
 
 logger = logging.getLogger(__name__)
@@ -10,6 +11,15 @@ async def execute_sql(sql: str, args: tuple = (), **kwargs) -> Any:
     return await db_manager.execute(sql, args, **kwargs)
 
 
+async def submit_sql(sql: str, args: tuple = (), durable: bool = True) -> Optional[int]:
+    """
+    Group-commits a write (see GroupCommitter). durable=True waits for the commit and returns the rowcount;
+    durable=False returns at once and leaves the statement to the next batch commit.
+    """
+    future = db_manager.submit_write(sql, args)
+    return await future if durable else None
+
+
 class MediaRepository:
     """Handles all persistence logic for media, deduplication, and queues."""
 
@@ -17,7 +27,7 @@ class MediaRepository:
     async def record_outbound_message(chat_id: str, message_id: str):
         """Records an outbound message sent by the bot to detect and ignore echoes."""
         sql = "INSERT OR REPLACE INTO outbound_messages (chat_id, message_id, created_at) VALUES (?, ?, ?)"
-        await execute_sql(sql, (str(chat_id), str(message_id), int(time.time())), commit=True)
+        await submit_sql(sql, (str(chat_id), str(message_id), int(time.time())))
 
     @staticmethod
     async def is_outbound_message(chat_id: str, message_id: str) -> bool:
@@ -50,137 +60,127 @@ class MediaRepository:
         sql = """INSERT OR IGNORE INTO processed_messages 
                  (chat_id, message_id, file_unique_id, media_group_id, created_at) 
                  VALUES (?, ?, ?, ?, ?)"""
-        count = await execute_sql(
-            sql, (str(chat_id), str(message_id), file_unique_id, media_group_id, int(time.time())), commit=True
-        )
+        count = await submit_sql(sql, (str(chat_id), str(message_id), file_unique_id, media_group_id, int(time.time())))
         return count > 0
 
     @staticmethod
-    async def add_seen_atomic(chat_id: str, file_unique_id: str) -> bool:
-        sql = "INSERT OR IGNORE INTO media_dedup_log (target_chat_id, file_unique_id, created_at) VALUES (?, ?, ?)"
-        count = await execute_sql(sql, (str(chat_id), file_unique_id, int(time.time())), commit=True)
-        await execute_sql("INSERT OR IGNORE INTO seen (chat_id, file_unique_id, created_at) VALUES (?, ?, ?)",
-                          (str(chat_id), file_unique_id, int(time.time())), commit=True)
-        return count > 0
+    async def mark_processed_inbound_many(
+        chat_id: str, items: List[Tuple[str, Optional[str]]], media_group_id: Optional[str] = None
+    ) -> List[bool]:
+        """
+        mark_processed_inbound for (message_id, file_unique_id) pairs of one album.
+        The inserts are submitted together, so they share one group commit instead of waiting for one each.
+        """
+        sql = """INSERT OR IGNORE INTO processed_messages 
+                 (chat_id, message_id, file_unique_id, media_group_id, created_at) 
+                 VALUES (?, ?, ?, ?, ?)"""
+        now = int(time.time())
+        counts = await asyncio.gather(
+            *(submit_sql(sql, (str(chat_id), str(mid), fuid, media_group_id, now)) for mid, fuid in items)
+        )
+        return [count > 0 for count in counts]
 
     @staticmethod
-    async def add_forward_seen_atomic(chat_id: str, file_unique_id: str) -> bool:
-        sql = "INSERT OR IGNORE INTO media_dedup_log (target_chat_id, file_unique_id, created_at) VALUES (?, ?, ?)"
+    async def add_seen_atomic(chat_id: str, file_unique_id: str) -> bool:
+        """Marks media as seen in chat_id; returns True if it was not known there before."""
+        sql = "INSERT OR IGNORE INTO media_dedup (chat_id, file_unique_id, created_at, seen) VALUES (?, ?, ?, 1)"
         count = await execute_sql(sql, (str(chat_id), file_unique_id, int(time.time())), commit=True)
-        await execute_sql("INSERT OR IGNORE INTO forward_seen (chat_id, file_unique_id, created_at) VALUES (?, ?, ?)",
-                          (str(chat_id), file_unique_id, int(time.time())), commit=True)
+        if not count:
+            await execute_sql(
+                "UPDATE media_dedup SET seen = 1 WHERE chat_id=? AND file_unique_id=? AND seen = 0",
+                (str(chat_id), file_unique_id),
+                commit=True,
+            )
         return count > 0
 
     @staticmethod
-    async def add_forward_seen_and_enqueue(target_chat_id: str, item: dict, delay_offset: int = 0) -> bool:
-        async with db_manager._write_lock:
-            db = await db_manager.get_db()
-            try:
-                now = int(time.time())
-                # 1. Atomic pre-reservation in media_dedup_log
-                cursor = await db.execute(
-                    "INSERT OR IGNORE INTO media_dedup_log (target_chat_id, file_unique_id, created_at) VALUES (?, ?, ?)",
-                    (str(target_chat_id), item["fuid"], now),
-                )
-                if cursor.rowcount == 0:
-                    logger.info(f"♻️ [Deduplicated] Media {item['fuid']} already exists in target {target_chat_id}")
-                    return False
-
-                # Maintain legacy tables for compatibility
-                await db.execute(
-                    "INSERT OR IGNORE INTO forward_seen (chat_id, file_unique_id, created_at) VALUES (?, ?, ?)",
-                    (str(target_chat_id), item["fuid"], now),
-                )
-                await db.execute(
-                    "INSERT OR IGNORE INTO seen (chat_id, file_unique_id, created_at) VALUES (?, ?, ?)",
-                    (str(target_chat_id), item["fuid"], now),
-                )
+    async def add_forward_seen_atomic(chat_id: str, file_unique_id: str, durable: bool = True) -> Optional[bool]:
+        """Marks media as forwarded to chat_id; without durable, returns None before the write is committed."""
+        sql = "INSERT OR IGNORE INTO media_dedup (chat_id, file_unique_id, created_at, forwarded) VALUES (?, ?, ?, 1)"
+        pending = db_manager.submit_write(sql, (str(chat_id), file_unique_id, int(time.time())))
+        # Usually a no-op: enqueueing already set the flag
+        await submit_sql(
+            "UPDATE media_dedup SET forwarded = 1 WHERE chat_id=? AND file_unique_id=? AND forwarded = 0",
+            (str(chat_id), file_unique_id),
+            durable=durable,
+        )
+        return (await pending) > 0 if durable else None
 
-                sql_q = """INSERT INTO forward_queue
-                           (target_chat_id, media_type, file_id, caption, has_spoiler,
-                            file_unique_id, media_group_id, created_at, priority,
-                            source_chat_id, source_msg_id) 
-                           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
-                args_q = (
-                    str(target_chat_id),
-                    item["mt"],
-                    item["fid"],
-                    item.get("cap"),
-                    1 if item.get("sp") else 0,
-                    item["fuid"],
-                    item.get("mgid"),
+    @staticmethod
+    def _reserve_and_enqueue(conn, target_chat_id: str, items: List[dict], now: int, delay_offset: int) -> List[str]:
+        """
+        Reserves each item in media_dedup and queues the new ones; runs on the database thread.
+        Returns the file_unique_ids that were already known (and therefore not queued).
+        """
+        duplicates = []
+        for it in items:
+            # 1. Atomic pre-reservation in media_dedup, flagged as seen and forwarded in the same row
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO media_dedup (chat_id, file_unique_id, created_at, seen, forwarded) "
+                "VALUES (?, ?, ?, 1, 1)",
+                (target_chat_id, it["fuid"], now),
+            )
+            if cursor.rowcount == 0:
+                duplicates.append(it["fuid"])
+                continue
+
+            conn.execute(
+                """INSERT INTO forward_queue
+                   (target_chat_id, media_type, file_id, caption, has_spoiler,
+                    file_unique_id, media_group_id, created_at, priority,
+                    source_chat_id, source_msg_id)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    target_chat_id,
+                    it["mt"],
+                    it["fid"],
+                    it.get("cap"),
+                    1 if it.get("sp") else 0,
+                    it["fuid"],
+                    it.get("mgid"),
                     now + delay_offset,
-                    item.get("prio", 0),
-                    item.get("scid"),
-                    item.get("smid"),
+                    it.get("prio", 0),
+                    it.get("scid"),
+                    it.get("smid"),
+                ),
+            )
+        return duplicates
+
+    @staticmethod
+    async def add_forward_seen_and_enqueue(target_chat_id: str, item: dict, delay_offset: int = 0) -> bool:
+        target_chat_id = str(target_chat_id)
+        try:
+            # Reservation and queue insert commit together in one database call
+            duplicates = await db_manager.run_in_connection(
+                lambda conn: MediaRepository._reserve_and_enqueue(
+                    conn, target_chat_id, [item], int(time.time()), delay_offset
                 )
-                await db.execute(sql_q, args_q)
-                await db.commit()
-                return True
-            except Exception as e:
-                await db.rollback()
-                logger.error(f"❌ Transaction Error (Single Enqueue): {e}")
-                raise
+            )
+        except Exception as e:
+            logger.error(f"❌ Transaction Error (Single Enqueue): {e}")
+            raise
+        if duplicates:
+            logger.info(f"♻️ [Deduplicated] Media {item['fuid']} already exists in target {target_chat_id}")
+            return False
+        return True
 
     @staticmethod
     async def add_forward_seen_and_enqueue_album(target_chat_id: str, items: List[dict], delay_offset: int = 0) -> bool:
         if not items:
             return False
-        async with db_manager._write_lock:
-            db = await db_manager.get_db()
-            try:
-                now = int(time.time())
-                valid_items = []
-                for it in items:
-                    cursor = await db.execute(
-                        "INSERT OR IGNORE INTO media_dedup_log (target_chat_id, file_unique_id, created_at) VALUES (?, ?, ?)",
-                        (str(target_chat_id), it["fuid"], now),
-                    )
-                    if cursor.rowcount > 0:
-                        valid_items.append(it)
-                        await db.execute(
-                            "INSERT OR IGNORE INTO forward_seen (chat_id, file_unique_id, created_at) VALUES (?, ?, ?)",
-                            (str(target_chat_id), it["fuid"], now),
-                        )
-                        await db.execute(
-                            "INSERT OR IGNORE INTO seen (chat_id, file_unique_id, created_at) VALUES (?, ?, ?)",
-                            (str(target_chat_id), it["fuid"], now),
-                        )
-                    else:
-                        logger.info(
-                            f"♻️ [Deduplicated Album Item] Media {it['fuid']} already exists in target {target_chat_id}"
-                        )
-
-                if not valid_items:
-                    return False
-
-                for it in valid_items:
-                    sql_q = """INSERT INTO forward_queue
-                               (target_chat_id, media_type, file_id, caption, has_spoiler,
-                                file_unique_id, media_group_id, created_at, priority,
-                                source_chat_id, source_msg_id) 
-                               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
-                    args_q = (
-                        str(target_chat_id),
-                        it["mt"],
-                        it["fid"],
-                        it.get("cap"),
-                        1 if it.get("sp") else 0,
-                        it["fuid"],
-                        it.get("mgid"),
-                        now + delay_offset,
-                        it.get("prio", 0),
-                        it.get("scid"),
-                        it.get("smid"),
-                    )
-                    await db.execute(sql_q, args_q)
-
-                await db.commit()
-                return True
-            except Exception as e:
-                await db.rollback()
-                logger.error(f"❌ Transaction Error (Album Enqueue): {e}")
-                raise
+        target_chat_id = str(target_chat_id)
+        try:
+            duplicates = await db_manager.run_in_connection(
+                lambda conn: MediaRepository._reserve_and_enqueue(
+                    conn, target_chat_id, items, int(time.time()), delay_offset
+                )
+            )
+        except Exception as e:
+            logger.error(f"❌ Transaction Error (Album Enqueue): {e}")
+            raise
+        for fuid in duplicates:
+            logger.info(f"♻️ [Deduplicated Album Item] Media {fuid} already exists in target {target_chat_id}")
+        return len(duplicates) < len(items)
 
     @staticmethod
     async def get_forward_queue_counts() -> List[tuple]:
@@ -229,37 +229,34 @@ class MediaRepository:
         Atomically fetches and marks a batch of items as 'processing'.
         """
         now = int(time.time())
-        async with db_manager._write_lock:
-            db = await db_manager.get_db()
-            try:
-                # 修复：将 updated_at 超时容错从 600 秒提升至 3600 秒 (1小时)，防止大视频上传慢被另一个工人二次抓取导致重复发送
-                select_sql = """
-                             SELECT * \
-                             FROM forward_queue
-                             WHERE (status = 0 AND created_at <= ?) \
-                                OR (status = 1 AND updated_at < ?)
-                             ORDER BY priority DESC, created_at ASC, id ASC LIMIT ? \
-                             """
-                async with db.execute(select_sql, (now, now - 3600, limit)) as cursor:
-                    rows = await cursor.fetchall()
-
-                if not rows:
-                    return []
 
+        def claim(conn) -> List[tuple]:
+            # 修复：将 updated_at 超时容错从 600 秒提升至 3600 秒 (1小时)，防止大视频上传慢被另一个工人二次抓取导致重复发送
+            rows = conn.execute(
+                """
+                SELECT *
+                FROM forward_queue
+                WHERE (status = 0 AND created_at <= ?)
+                   OR (status = 1 AND updated_at < ?)
+                ORDER BY priority DESC, created_at ASC, id ASC LIMIT ?
+                """,
+                (now, now - 3600, limit),
+            ).fetchall()
+            if rows:
                 row_ids = [r[0] for r in rows]
                 placeholders = ",".join(["?"] * len(row_ids))
-                update_sql = f"""
-                    UPDATE forward_queue
-                    SET status = 1, updated_at = ?
-                    WHERE id IN ({placeholders})
-                """
-                await db.execute(update_sql, (now, *row_ids))
-                await db.commit()
-                return rows
-            except Exception as e:
-                await db.rollback()
-                logger.error(f"❌ Error in fetch_queue_batch transaction: {e}")
-                return []
+                conn.execute(
+                    f"UPDATE forward_queue SET status = 1, updated_at = ? WHERE id IN ({placeholders})",
+                    (now, *row_ids),
+                )
+            return rows
+
+        try:
+            # SELECT and claim in one transaction and one database call
+            return await db_manager.run_in_connection(claim)
+        except Exception as e:
+            logger.error(f"❌ Error in fetch_queue_batch transaction: {e}")
+            return []
 
     @staticmethod
     async def get_forward_group(chat_id: str, media_group_id: str) -> List[tuple]:
@@ -270,19 +267,19 @@ class MediaRepository:
         )
 
     @staticmethod
-    async def delete_forward_group(chat_id: str, media_group_id: str):
-        await execute_sql(
+    async def delete_forward_group(chat_id: str, media_group_id: str, durable: bool = True):
+        await submit_sql(
             "DELETE FROM forward_queue WHERE target_chat_id=? AND media_group_id=?",
             (chat_id, media_group_id),
-            commit=True,
+            durable=durable,
         )
 
     @staticmethod
-    async def delete_queue_items(ids: List[int]):
+    async def delete_queue_items(ids: List[int], durable: bool = True):
         if not ids:
             return
         placeholders = ",".join(["?"] * len(ids))
-        await execute_sql(f"DELETE FROM forward_queue WHERE id IN ({placeholders})", tuple(ids), commit=True)
+        await submit_sql(f"DELETE FROM forward_queue WHERE id IN ({placeholders})", tuple(ids), durable=durable)
 
     @staticmethod
     async def clear_forward_queue(target_chat_id: str | None = None) -> int:
@@ -324,11 +321,13 @@ class MediaRepository:
 
     @staticmethod
     async def check_duplicate_status(chat_id: str, file_unique_id: str) -> Tuple[bool, bool]:
-        in_seen = await execute_sql("SELECT 1 FROM seen WHERE chat_id=? AND file_unique_id=? LIMIT 1",
-                                    (chat_id, file_unique_id), fetchone=True)
-        in_fw = await execute_sql("SELECT 1 FROM forward_seen WHERE chat_id=? AND file_unique_id=? LIMIT 1",
-                                  (chat_id, file_unique_id), fetchone=True)
-        return (in_seen is not None, in_fw is not None)
+        """Returns (seen, forwarded) for media in chat_id."""
+        row = await execute_sql(
+            "SELECT seen, forwarded FROM media_dedup WHERE chat_id=? AND file_unique_id=?",
+            (chat_id, file_unique_id),
+            fetchone=True,
+        )
+        return (bool(row[0]), bool(row[1])) if row else (False, False)
 
     @staticmethod
     async def increment_retry(rid: int, reason: str = "Unknown"):
@@ -431,19 +430,31 @@ class MediaRepository:
 
     @staticmethod
     async def clean_expired_data(days: int = 365) -> int:
+        """
+        Expires dedup rows older than days: rows only marking media as seen are deleted, while rows of
+        forwarded media just lose the seen flag and keep reserving the media against duplicate forwards.
+        Returns the number of rows deleted or cleared.
+        """
         cutoff = int(time.time()) - (days * 86400)
-        res = await execute_sql("DELETE FROM seen WHERE created_at < ?", (cutoff,), commit=True)
-        return res if isinstance(res, int) else 0
+
+        def expire(conn) -> int:
+            deleted = conn.execute("DELETE FROM media_dedup WHERE forwarded = 0 AND created_at < ?", (cutoff,))
+            cleared = conn.execute("UPDATE media_dedup SET seen = 0 WHERE seen = 1 AND created_at < ?", (cutoff,))
+            return deleted.rowcount + cleared.rowcount
+
+        return await db_manager.run_in_connection(expire)
 
     @staticmethod
     async def vacuum_db():
         await execute_sql("VACUUM", commit=True)
 
     @staticmethod
-    async def log_forward(source_chat_id: str, source_msg_id: str, target_chat_id: str, target_msg_id: str):
+    async def log_forward(
+        source_chat_id: str, source_msg_id: str, target_chat_id: str, target_msg_id: str, durable: bool = True
+    ):
         sql = "INSERT OR REPLACE INTO forward_log (source_chat_id, source_msg_id, target_chat_id, target_msg_id, created_at) VALUES (?, ?, ?, ?, ?)"
-        await execute_sql(
-            sql, (source_chat_id, source_msg_id, target_chat_id, target_msg_id, int(time.time())), commit=True
+        await submit_sql(
+            sql, (source_chat_id, source_msg_id, target_chat_id, target_msg_id, int(time.time())), durable=durable
         )
 
     @staticmethod
@@ -541,6 +552,26 @@ class AdminRepository:
 class ChatRepository:
     """Handles chat settings and rules."""
 
+    # In-memory config versions, bumped on every write that affects caption cleaning.
+    # Lets compiled caches (see src/cleaner/ruleset.py) detect staleness without a DB hit.
+    _config_epoch: int = 0
+    _config_versions: Dict[str, int] = {}
+
+    @classmethod
+    def get_config_version(cls, chat_id: str) -> Tuple[int, int]:
+        """Returns the current cleaning-config version of a chat."""
+        return cls._config_epoch, cls._config_versions.get(str(chat_id), 0)
+
+    @classmethod
+    def bump_config_version(cls, chat_id: Optional[str] = None):
+        """Marks a chat's cleaning config as changed. Without chat_id, invalidates every chat."""
+        if chat_id is None:
+            cls._config_epoch += 1
+            cls._config_versions.clear()
+        else:
+            cid = str(chat_id)
+            cls._config_versions[cid] = cls._config_versions.get(cid, 0) + 1
+
     @staticmethod
     async def save_chat(chat_id: str, title: str):
         await execute_sql("INSERT OR REPLACE INTO chats (chat_id, title) VALUES (?, ?)", (chat_id, title), commit=True)
@@ -590,6 +621,13 @@ class ChatRepository:
         rows = await execute_sql("SELECT word, is_regex FROM keywords WHERE chat_id=?", (chat_id,), fetchall=True)
         return [(r[0], bool(r[1])) for r in rows]
 
+    @staticmethod
+    async def get_keywords_with_cost(chat_id: str) -> List[Tuple[str, bool, Optional[float]]]:
+        rows = await execute_sql(
+            "SELECT word, is_regex, cost_us FROM keywords WHERE chat_id=?", (chat_id,), fetchall=True
+        )
+        return [(r[0], bool(r[1]), r[2]) for r in rows]
+
     @staticmethod
     async def get_replacements(chat_id: str) -> List[Tuple[str, str]]:
         return await execute_sql(
@@ -680,26 +718,42 @@ class ChatRepository:
     @staticmethod
     async def add_rule(chat_id: str, rule: str):
         await execute_sql("INSERT OR IGNORE INTO rules (chat_id, rule) VALUES (?, ?)", (chat_id, rule), commit=True)
+        ChatRepository.bump_config_version(chat_id)
 
     @staticmethod
     async def delete_rule(chat_id: str, rule: str):
         await execute_sql("DELETE FROM rules WHERE chat_id=? AND rule=?", (chat_id, rule), commit=True)
+        ChatRepository.bump_config_version(chat_id)
 
     @staticmethod
     async def clear_rules(chat_id: str):
         await execute_sql("DELETE FROM rules WHERE chat_id=?", (chat_id,), commit=True)
+        ChatRepository.bump_config_version(chat_id)
 
     @staticmethod
-    async def add_keyword(chat_id: str, word: str, is_regex: bool = False):
+    async def add_keyword(chat_id: str, word: str, is_regex: bool = False, cost_us: Optional[float] = None):
+        """cost_us is the measured per-caption cost of a regex keyword (see src/cleaner/regex_audit.py)."""
         await execute_sql(
-            "INSERT OR REPLACE INTO keywords (chat_id, word, is_regex) VALUES (?, ?, ?)",
-            (chat_id, word, 1 if is_regex else 0),
+            "INSERT OR REPLACE INTO keywords (chat_id, word, is_regex, cost_us) VALUES (?, ?, ?, ?)",
+            (chat_id, word, 1 if is_regex else 0, cost_us),
             commit=True,
         )
+        ChatRepository.bump_config_version(chat_id)
+
+    @staticmethod
+    async def quarantine_keyword(word: str):
+        """Flags a regex keyword as quarantined in every chat that has it (see src/cleaner/regex_guard.py)."""
+        await execute_sql("UPDATE keywords SET quarantined=1 WHERE is_regex=1 AND word=?", (word,), commit=True)
+
+    @staticmethod
+    async def get_quarantined_keywords() -> List[str]:
+        rows = await execute_sql("SELECT DISTINCT word FROM keywords WHERE quarantined=1", fetchall=True)
+        return [r[0] for r in rows]
 
     @staticmethod
     async def delete_keyword(chat_id: str, word: str):
         await execute_sql("DELETE FROM keywords WHERE chat_id=? AND word=?", (chat_id, word), commit=True)
+        ChatRepository.bump_config_version(chat_id)
 
     @staticmethod
     async def add_replacement(chat_id: str, old: str, new: str):
@@ -708,18 +762,22 @@ class ChatRepository:
             (chat_id, old, new),
             commit=True,
         )
+        ChatRepository.bump_config_version(chat_id)
 
     @staticmethod
     async def delete_replacement(chat_id: str, old: str):
         await execute_sql("DELETE FROM replacements WHERE chat_id=? AND old_word=?", (chat_id, old), commit=True)
+        ChatRepository.bump_config_version(chat_id)
 
     @staticmethod
     async def set_footer(chat_id: str, text: str):
         await execute_sql("INSERT OR REPLACE INTO footers (chat_id, text) VALUES (?, ?)", (chat_id, text), commit=True)
+        ChatRepository.bump_config_version(chat_id)
 
     @staticmethod
     async def delete_footer(chat_id: str):
         await execute_sql("DELETE FROM footers WHERE chat_id=?", (chat_id,), commit=True)
+        ChatRepository.bump_config_version(chat_id)
 
     @staticmethod
     async def lock_chat(chat_id: str):
@@ -793,7 +851,9 @@ class ChatRepository:
             (chat_id, template),
             commit=True,
         )
+        ChatRepository.bump_config_version(chat_id)
 
     @staticmethod
     async def delete_caption_template(chat_id: str):
-        await execute_sql("DELETE FROM caption_templates WHERE chat_id=?", (chat_id,), commit=True)
\ No newline at end of file
+        await execute_sql("DELETE FROM caption_templates WHERE chat_id=?", (chat_id,), commit=True)
+        ChatRepository.bump_config_version(chat_id)
\ No newline at end of file
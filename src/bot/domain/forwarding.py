@@ -129,13 +129,13 @@ class ForwardingService:
             sent = await cls.send_single_media(bot, tcid, mt, fid, cap, markup, bool(sp))
             if sent:
                 # 1. Delete from queue immediately
-                await MediaRepository.delete_queue_items([rid])
-                # 2. Record outbound message to block echo detection
+                await MediaRepository.delete_queue_items([rid], durable=False)
+                # 2. Record outbound message to block echo detection; awaiting it commits the delete in the same batch
                 await MediaRepository.record_outbound_message(tcid, str(sent.message_id))
                 try:
-                    await MediaRepository.log_forward(scid, smid, tcid, str(sent.message_id))
+                    await MediaRepository.log_forward(scid, smid, tcid, str(sent.message_id), durable=False)
                     if prio < 10:
-                        await MediaRepository.add_forward_seen_atomic(tcid, fuid)
+                        await MediaRepository.add_forward_seen_atomic(tcid, fuid, durable=False)
                         await log_event(bot, f"📤 <b>单媒体转发成功</b>\n目标: <code>{tcid}</code>", category="forward")
                 except Exception as log_err:
                     logger.warning(f"⚠️ Secondary logging/seen operation failed for item {rid}: {log_err}")
@@ -194,15 +194,16 @@ class ForwardingService:
 
             if sent_msgs:
                 # 1. Delete album from queue immediately
-                await MediaRepository.delete_forward_group(tcid, mgid)
-                # 2. Record all outbound messages to block echo detection
-                for sm in sent_msgs:
-                    await MediaRepository.record_outbound_message(tcid, str(sm.message_id))
+                await MediaRepository.delete_forward_group(tcid, mgid, durable=False)
+                # 2. Record all outbound messages to block echo detection; they share one group commit
+                await asyncio.gather(
+                    *(MediaRepository.record_outbound_message(tcid, str(sm.message_id)) for sm in sent_msgs)
+                )
                 try:
-                    await MediaRepository.log_forward(scid, smid, tcid, str(sent_msgs[0].message_id))
+                    await MediaRepository.log_forward(scid, smid, tcid, str(sent_msgs[0].message_id), durable=False)
                     if prio < 10:
                         for r in group_rows:
-                            await MediaRepository.add_forward_seen_atomic(tcid, r[6])
+                            await MediaRepository.add_forward_seen_atomic(tcid, r[6], durable=False)
                         await log_event(bot, f"📤 <b>相册转发成功</b>\n目标: <code>{tcid}</code>", category="forward")
                 except Exception as log_err:
                     logger.warning(f"⚠️ Secondary logging/seen operation failed for album {mgid}: {log_err}")
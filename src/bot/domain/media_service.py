@@ -2,7 +2,13 @@ import logging
 from typing import List, Tuple, Optional
 from telegram import Message
 from src.bot.data.repositories import MediaRepository, ChatRepository
-from src.cleaner.engine import clean_caption, restore_all_tags, check_spoiler_tags
+from src.cleaner.engine import (
+    clean_caption,
+    clean_caption_for_targets,
+    restore_all_tags,
+    restore_tags_for_targets,
+    check_spoiler_tags,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -68,10 +74,12 @@ class MediaService:
         enqueued_any = False
 
         if targets:
+            target_caps = restore_tags_for_targets(
+                cleaned_source,
+                await clean_caption_for_targets(cleaned_source, targets, has_spoiler=sp, chat_title=chat_title),
+            )
             for i, tcid in enumerate(targets):
-                t_cap = restore_all_tags(
-                    cleaned_source, await clean_caption(cleaned_source, tcid, has_spoiler=sp, chat_title=chat_title)
-                )
+                t_cap = target_caps[tcid]
                 item = {
                     "tid": tcid,
                     "mt": mt,
@@ -128,16 +136,22 @@ class MediaService:
         if await MediaRepository.is_outbound_message(cid, str(smid)):
             return False
 
-        # 2. Inbound deduplication for all items in the album
-        valid_msgs = []
+        # 2. Inbound deduplication for all items in the album; their marks share one group commit
+        candidates = []
+        album_fuids = set()
         for m in msgs:
             m_smid = str(m.message_id)
             _, fuid, _ = MediaService._get_media_info(m)
-            if fuid:
-                if await MediaRepository.is_processed_inbound(cid, m_smid, fuid):
-                    continue
-                if await MediaRepository.mark_processed_inbound(cid, m_smid, fuid, gid):
-                    valid_msgs.append(m)
+            if not fuid or fuid in album_fuids:
+                continue
+            album_fuids.add(fuid)
+            if await MediaRepository.is_processed_inbound(cid, m_smid, fuid):
+                continue
+            candidates.append((m, m_smid, fuid))
+        marked = await MediaRepository.mark_processed_inbound_many(
+            cid, [(m_smid, fuid) for _, m_smid, fuid in candidates], gid
+        )
+        valid_msgs = [m for (m, _, _), inserted in zip(candidates, marked) if inserted]
 
         if not valid_msgs:
             return False
@@ -163,10 +177,12 @@ class MediaService:
         enqueued_any = False
 
         if targets:
+            target_caps = restore_tags_for_targets(
+                cleaned_source,
+                await clean_caption_for_targets(cleaned_source, targets, has_spoiler=sp, chat_title=chat_title),
+            )
             for i, tcid in enumerate(targets):
-                t_cap = restore_all_tags(
-                    cleaned_source, await clean_caption(cleaned_source, tcid, has_spoiler=sp, chat_title=chat_title)
-                )
+                t_cap = target_caps[tcid]
                 forward_items = []
                 for m in valid_msgs:
                     fid, fuid, mt = MediaService._get_media_info(m)
@@ -4,12 +4,20 @@ Chat management handlers for configuring bot behavior in specific chats.
 Includes quiet mode, voting, rules, keywords, replacements, footers, and locks.
 """
 
+import io
 import logging
+import re
 from telegram import Update
 from telegram.ext import ContextTypes
 
 from src.bot.data.repositories import ChatRepository, VoteRepository
-from src.cleaner.engine import clean_caption
+from src.cleaner.corpus import iter_caption_file
+from src.cleaner.engine import load_snapshot
+from src.cleaner.entities import entities_after, utf16_len
+from src.cleaner.preview import preview_bulk_guarded, preview_guarded
+from src.cleaner.regex_audit import audit_regex
+from src.cleaner.ruleset import validate_rule
+from src.cleaner.template import TemplateError, compile_template
 from src.bot.core.locales import get_text
 from src.bot.utils.helpers import admin_only, check_chat_permission, reply_success, is_super_admin, is_global_admin, log_event
 
@@ -82,6 +90,11 @@ async def handle_setrules(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     rule_str = " ".join(context.args[1:])
     rule_list = [r.strip() for r in rule_str.split(",") if r.strip()]
 
+    errors = [e for e in (validate_rule(r) for r in rule_list) if e]
+    if errors:
+        await update.message.reply_text("❌ " + "\n".join(errors), parse_mode="Markdown")
+        return
+
     try:
         target_chats = []
         if target_input.lower() == "all":
@@ -128,6 +141,11 @@ async def handle_addrule(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     target_input = context.args[0]
     rule = " ".join(context.args[1:])
 
+    error = validate_rule(rule)
+    if error:
+        await update.message.reply_text(f"❌ {error}", parse_mode="Markdown")
+        return
+
     try:
         target_chats = []
         if target_input.lower() == "all":
@@ -169,6 +187,7 @@ async def handle_delrule(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         return
 
     target_input = context.args[0]
+    # Not validated: rules stored before validation existed (or since renamed) must stay removable
     rule = " ".join(context.args[1:])
 
     try:
@@ -300,14 +319,33 @@ async def handle_addkw(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             await update.message.reply_text(get_text("not_found"))
             return
 
+        # Regex keywords are benchmarked on the sample corpus before they can reach live traffic
+        costs = {}
+        notes = []
+        if is_regex:
+            accepted = []
+            for kw in keywords:
+                audit = await audit_regex(kw)
+                if audit.rejected:
+                    notes.append(f"❌ 已拒绝 `{kw}`: {audit.describe()}")
+                    continue
+                if audit.warned:
+                    notes.append(f"⚠️ `{kw}` 较慢: {audit.describe()}")
+                costs[kw] = audit.cost_us
+                accepted.append(kw)
+            keywords = accepted
+
         for cid in target_chats:
             for kw in keywords:
-                await ChatRepository.add_keyword(cid, kw, is_regex)
+                await ChatRepository.add_keyword(cid, kw, is_regex, costs.get(kw))
 
-        target_desc = "ALL" if target_input.lower() == "all" else target_input
-        await reply_success(
-            update.message, context, get_text("kw_added", target_desc, len(keywords)), str(update.message.chat_id)
-        )
+        if keywords:
+            target_desc = "ALL" if target_input.lower() == "all" else target_input
+            await reply_success(
+                update.message, context, get_text("kw_added", target_desc, len(keywords)), str(update.message.chat_id)
+            )
+        if notes:
+            await update.message.reply_text("\n".join(notes), parse_mode="Markdown")
     except Exception as e:
         logger.error(f"Error in handle_addkw: {e}")
 
@@ -324,12 +362,14 @@ async def handle_listkw(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         return
 
     try:
-        kws = await ChatRepository.get_keywords(chat_id)
-        await update.message.reply_text(
-            "📋 关键词：\n" + "\n".join(f"• {w} {'(regex)' if r else ''}" for w, r in kws)
-            if kws
-            else get_text("no_data")
-        )
+        kws = await ChatRepository.get_keywords_with_cost(chat_id)
+        lines = []
+        for w, r, cost in kws:
+            tag = ""
+            if r:
+                tag = f"(regex, {cost:.1f}µs)" if cost is not None else "(regex)"
+            lines.append(f"• {w} {tag}")
+        await update.message.reply_text("📋 关键词：\n" + "\n".join(lines) if kws else get_text("no_data"))
     except Exception as e:
         logger.error(f"Error in handle_listkw: {e}")
 
@@ -480,24 +520,95 @@ async def handle_unlock(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         logger.error(f"Error in handle_unlock: {e}")
 
 
+# Caption files larger than this are refused by /preview bulk mode
+_PREVIEW_FILE_LIMIT = 5 * 1024 * 1024
+# Lines and reasons listed per preview reply (Telegram messages are capped at 4096 characters)
+_PREVIEW_LIST_LIMIT = 15
+
+
+# '/preview <chat_id> ' ahead of the test text
+_PREVIEW_PREFIX_RE = re.compile(r"\S+\s+\S+\s*")
+
+
+def _preview_input(msg):
+    """The test text of a /preview command, with its entities re-based from the whole command onto it."""
+    text = msg.text or ""
+    prefix = _PREVIEW_PREFIX_RE.match(text)
+    start = prefix.end() if prefix else len(text)
+    return text[start:], entities_after(msg.entities, utf16_len(text[:start]))
+
+
+def _format_timings(timings: dict, per: int = 1) -> str:
+    return "\n".join(f"• {name}: {seconds / per * 1e6:.1f} µs" for name, seconds in timings.items())
+
+
 @admin_only
 async def handle_preview(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Preview how the bot would clean a specific text for a chat."""
-    if not update.message or len(context.args or []) < 2:
-        await update.message.reply_text("❌ 用法：`/preview -100xxx <测试文本>`", parse_mode="Markdown")
+    """
+    Preview how the bot would clean a specific text for a chat, with per-stage timings and the reason for each
+    removed line. Replying to a caption file (JSON Lines or blank-line separated) previews the whole batch.
+    """
+    if not update.message:
         return
-    chat_id, text = context.args[0], " ".join(context.args[1:])
-    if not await check_chat_permission(update.message.from_user.id, chat_id, context):
-        await update.message.reply_text(get_text("no_permission"))
+    msg = update.message
+    doc = msg.reply_to_message.document if msg.reply_to_message else None
+    if len(context.args or []) < (1 if doc else 2):
+        await msg.reply_text(
+            "❌ 用法：`/preview -100xxx <测试文本>`\n或回复文案文件：`/preview -100xxx` (批量预览)", parse_mode="Markdown"
+        )
+        return
+    chat_id = context.args[0]
+    if not await check_chat_permission(msg.from_user.id, chat_id, context):
+        await msg.reply_text(get_text("no_permission"))
         return
 
     try:
-        cleaned = await clean_caption(text, chat_id, update.message.from_user.id, update.message.entities)
-        await update.message.reply_text(f"🧹 结果：\n\n{cleaned or '(已删除)'}")
+        snapshot = await load_snapshot(chat_id)
+        if doc:
+            await _preview_file(msg, context, snapshot, doc)
+            return
+
+        text, entities = _preview_input(msg)
+        result = await preview_guarded(text, snapshot, entities, msg.from_user.id)
+        reply = f"🧹 结果：\n\n{result.cleaned or '(已删除)'}"
+        reply += f"\n\n⏱ 阶段耗时 (共 {sum(result.timings.values()) * 1e6:.1f} µs)：\n{_format_timings(result.timings)}"
+        if result.removed:
+            reply += "\n\n🗑 移除/改写的行：\n" + "\n".join(
+                f"• [{reason}] {line[:40]}" for line, reason in result.removed[:_PREVIEW_LIST_LIMIT]
+            )
+        await msg.reply_text(reply)
     except Exception as e:
         logger.error(f"Error in handle_preview: {e}")
 
 
+async def _preview_file(msg, context: ContextTypes.DEFAULT_TYPE, snapshot, doc) -> None:
+    if doc.file_size and doc.file_size > _PREVIEW_FILE_LIMIT:
+        await msg.reply_text(f"❌ 文件过大 (上限 {_PREVIEW_FILE_LIMIT // 1024 // 1024} MB)")
+        return
+
+    file = await context.bot.get_file(doc.file_id)
+    buf = io.BytesIO()
+    await file.download_to_memory(out=buf)
+    lines = buf.getvalue().decode("utf-8", errors="replace").splitlines()
+    # Runs off the event loop (thread, or the regex worker pool under its deadline) to keep serving other updates
+    bulk = await preview_bulk_guarded(iter_caption_file(lines), snapshot)
+    if not bulk.captions:
+        await msg.reply_text("❌ 文件中没有文案 (支持 JSON Lines 或以空行分隔的纯文本)")
+        return
+
+    rate = bulk.captions / bulk.elapsed if bulk.elapsed else 0.0
+    reply = (
+        f"📊 批量预览：{bulk.captions} 条文案，用时 {bulk.elapsed:.2f}s ({rate:,.0f} 条/s)\n"
+        f"整条删除: {bulk.blocked} | 改写: {bulk.altered} | 未变: {bulk.unchanged}\n\n"
+        f"⏱ 平均阶段耗时 (每条)：\n{_format_timings(bulk.timings, bulk.captions)}"
+    )
+    if bulk.reasons:
+        reply += "\n\n🏷 移除原因 (按行计)：\n" + "\n".join(
+            f"• {reason}: {count}" for reason, count in bulk.reasons.most_common(_PREVIEW_LIST_LIMIT)
+        )
+    await msg.reply_text(reply)
+
+
 @admin_only
 async def handle_addforward(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Add a forwarding rule from a source chat to a target chat."""
@@ -716,6 +827,15 @@ async def handle_settemplate(update: Update, context: ContextTypes.DEFAULT_TYPE)
     if not await check_chat_permission(update.message.from_user.id, chat_id, context):
         await update.message.reply_text(get_text("no_permission"))
         return
+    try:
+        compile_template(template)
+    except TemplateError as e:
+        await update.message.reply_text(
+            f"❌ 模板含未知变量: {', '.join(f'`{p}`' for p in e.unknown)}\n"
+            "可用变量: `{orig}`, `{title}`, `{cid}`, `{date}`, `{user}`",
+            parse_mode="Markdown",
+        )
+        return
     try:
         await ChatRepository.set_caption_template(chat_id, template)
         await reply_success(update.message, context, "✅ 模板已设置。", chat_id)
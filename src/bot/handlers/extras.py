@@ -10,7 +10,7 @@ from telegram import Update
 from telegram.ext import ContextTypes
 
 from src.bot.data.repositories import MediaRepository
-from src.cleaner.engine import clean_caption, restore_all_tags
+from src.cleaner.engine import clean_caption_for_targets, restore_tags_for_targets
 from src.bot.utils.helpers import escape_markdown
 
 logger = logging.getLogger(__name__)
@@ -60,9 +60,12 @@ async def handle_edit_caption(update: Update, context: ContextTypes.DEFAULT_TYPE
         new_cap = msg.caption or ""
         entities = msg.caption_entities
 
+        # 对每个目标重新执行一次清理逻辑 (因为不同频道可能有不同规则/页脚, 规则相同的目标只清理一次)
+        target_caps = restore_tags_for_targets(
+            new_cap, await clean_caption_for_targets(new_cap, [t_cid for t_cid, _ in targets], entities=entities)
+        )
         for t_cid, t_mid in targets:
-            # 对每个目标重新执行一次清理逻辑 (因为不同频道可能有不同规则/页脚)
-            cleaned = restore_all_tags(new_cap, await clean_caption(new_cap, t_cid, entities=entities))
+            cleaned = target_caps[str(t_cid)]
             try:
                 await context.bot.edit_message_caption(
                     chat_id=t_cid, message_id=int(t_mid), caption=escape_markdown(cleaned), parse_mode="Markdown"
@@ -243,6 +243,8 @@ _(支持 `all` 批量操作)_
 `/cleardlq` — 🗑 **清空死信队列**
 `/retrydlq [ID/all]` — 🔄 **重试死信任务**
 `/repair` — 🛠 **重置并修复卡顿队列**
+`/cachestats` — 🧠 清洗缓存命中统计
+`/dbstats` — 🗄 数据库组提交统计
 `/setdelay min max` — ⏱ **设置延迟(秒)**
 `/setlog`{target_hint} — 📝 设置日志频道
 `/setlogfilter` — ⚖️ 过滤日志
@@ -15,10 +15,12 @@ from telegram.ext import ContextTypes
 from telegram.error import BadRequest, Forbidden
 
 from src.bot.core import config
+from src.bot.data.database import db_manager
 from src.bot.data.repositories import AdminRepository, ChatRepository, MediaRepository, execute_sql
 from src.bot.utils.helpers import is_super_admin, is_global_admin, log_event, escape_markdown, admin_only
 from src.bot.core.locales import get_text
 from src.bot.domain.forwarding import ForwardingService
+from src.cleaner.cache import clean_cache, line_cache
 
 logger = logging.getLogger(__name__)
 
@@ -148,11 +150,10 @@ async def handle_restoredb(update: Update, context: ContextTypes.DEFAULT_TYPE) -
 
         tmp = io.BytesIO()
         await file.download_to_memory(out=tmp)
-        tmp.seek(0)
 
-        # Overwrite database file
-        with open(config.DB_FILE, "wb") as f:
-            f.write(tmp.read())
+        # Closes every connection around the swap and migrates the restored file to the current schema
+        await db_manager.restore(tmp.getvalue())
+        ChatRepository.bump_config_version()
 
         await msg.reply_text(get_text("restore_success"))
         await log_event(context.bot, "管理员执行了数据库恢复", category="system")
@@ -537,3 +538,86 @@ async def handle_clear_queue(update: Update, context: ContextTypes.DEFAULT_TYPE)
         logger.error(f"Error in handle_clear_queue: {e}")
         await update.message.reply_text(f"❌ 清空队列失败: {e}")
 
+
+@admin_only
+async def handle_cachestats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Show hit/miss statistics of the caption cleaning caches (`/cachestats reset` clears the counters)."""
+    if not update.message or not await is_super_admin(update.message.from_user.id):
+        return
+
+    try:
+        if context.args and context.args[0].lower() == "reset":
+            clean_cache.reset_stats()
+            line_cache.reset_stats()
+            await update.message.reply_text("🔄 清洗缓存统计已重置。")
+            return
+
+        st = clean_cache.stats()
+        if st["enabled"]:
+            reply = (
+                "🧠 **清洗结果缓存:**\n\n"
+                f"容量: `{st['size']}/{st['maxsize']}`\n"
+                f"命中: `{st['hits']}` | 未命中: `{st['misses']}`\n"
+                f"命中率: `{st['hit_ratio']:.1%}`\n"
+                f"淘汰: `{st['evictions']}`\n\n"
+            )
+        else:
+            reply = "⚪️ 清洗结果缓存已关闭 (`CLEAN_CACHE_SIZE=0`)。\n\n"
+
+        lt = line_cache.stats()
+        if lt["enabled"]:
+            reply += (
+                "📏 **广告行判定缓存:**\n\n"
+                f"群组: `{lt['chats']}` | 条目: `{lt['size']}` (每群上限 `{lt['maxsize']}`)\n"
+                f"命中: `{lt['hits']}` | 未命中: `{lt['misses']}`\n"
+                f"命中率: `{lt['hit_ratio']:.1%}`\n"
+                f"淘汰: `{lt['evictions']}`\n"
+                f"正则进程 (含正则关键词的群组): 命中 `{lt['worker_hits']}` | 未命中 `{lt['worker_misses']}`\n\n"
+            )
+        else:
+            reply += "⚪️ 广告行判定缓存已关闭 (`LINE_CACHE_SIZE=0`)。\n\n"
+
+        reply += "使用 `/cachestats reset` 重置统计。"
+        await update.message.reply_text(reply, parse_mode="Markdown")
+    except Exception as e:
+        logger.error(f"Error in handle_cachestats: {e}")
+
+
+@admin_only
+async def handle_dbstats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Show group-commit throughput and read pool size of the database (`/dbstats reset` clears the counters)."""
+    if not update.message or not await is_super_admin(update.message.from_user.id):
+        return
+
+    try:
+        if context.args and context.args[0].lower() == "reset":
+            db_manager.group_commit.reset_stats()
+            await update.message.reply_text("🔄 数据库统计已重置。")
+            return
+
+        gc = db_manager.group_commit.stats()
+        mode = (
+            f"每 `{gc['interval_ms']:.0f}ms` 或 `{gc['max_batch']}` 条合并提交"
+            if gc["enabled"]
+            else "逐条提交 (`DB_GROUP_COMMIT_MS=0`)"
+        )
+        reply = (
+            "🗄 **数据库写入 (组提交):**\n\n"
+            f"模式: {mode}\n"
+            f"提交: `{gc['commits']}` | 语句: `{gc['statements']}` | 待提交: `{gc['pending']}`\n"
+            f"提交/秒: `{gc['commits_per_sec']:.2f}`\n"
+            f"平均批量: `{gc['avg_batch']:.1f}` 条/提交\n\n"
+            f"📖 只读连接池: `{config.DB_READ_POOL_SIZE}`\n"
+            f"📜 WAL 大小: `{db_manager.wal_size() / 1048576:.1f} MB`\n"
+        )
+        cp = db_manager.last_checkpoint
+        if cp:
+            reply += (
+                f"上次检查点: `{cp['mode']}` {datetime.fromtimestamp(cp['at']).strftime('%H:%M:%S')} "
+                f"(`{cp['wal_before'] / 1048576:.1f}` → `{cp['wal_after'] / 1048576:.1f} MB`"
+                f"{', 有读者占用' if cp['busy'] else ''})\n"
+            )
+        reply += "\n使用 `/dbstats reset` 重置统计。"
+        await update.message.reply_text(reply, parse_mode="Markdown")
+    except Exception as e:
+        logger.error(f"Error in handle_dbstats: {e}")
@@ -0,0 +1,160 @@
+"""
+Offline rule evaluation: cleans a caption corpus with one chat's rules, keywords and replacements on every core
+and reports how many captions would be blocked or altered, and the throughput.
+
+The database is opened read-only, so this is safe to run next to the live bot. Regex keywords run without the
+bot's per-caption deadline.
+
+Usage:
+    python src/bot/utils/eval_rules.py -100xxx captions.jsonl [--keywords pack.txt] [--workers N] [--db bot.db]
+
+The corpus is JSON Lines (a string or an object with "text"/"caption" per line) or plain text with captions
+separated by blank lines; '-' reads stdin. A keyword pack holds one keyword per line ('re:' prefix for regex,
+'#' for comments) and is evaluated on top of the chat's own keywords.
+"""
+
+import argparse
+import itertools
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.bot.core import config
+from src.cleaner.cache import LineVerdictCache
+from src.cleaner.corpus import iter_caption_file
+from src.cleaner.engine import clean
+from src.cleaner.ruleset import RuleSet
+
+_snapshot: Optional[RuleSet] = None
+# Ad-line verdicts of this worker's snapshot (corpora repeat promo lines as much as live channels do)
+_verdicts: Optional[LineVerdictCache] = None
+
+
+def load_chat_config(db_file: str, chat_id: str) -> tuple:
+    """Reads the cleaning config of chat_id the way ChatRepository does, without write access to the DB."""
+    conn = sqlite3.connect(f"{Path(db_file).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+
+        def rows(sql: str) -> list:
+            try:
+                return conn.execute(sql, (chat_id,)).fetchall()
+            except sqlite3.OperationalError:
+                # Table missing in an older database
+                return []
+
+        rules = [r[0] for r in rows("SELECT rule FROM rules WHERE chat_id=?")]
+        keywords = [(r[0], bool(r[1])) for r in rows("SELECT word, is_regex FROM keywords WHERE chat_id=?")]
+        replacements = [tuple(r) for r in rows("SELECT old_word, new_word FROM replacements WHERE chat_id=?")]
+        footer = next(iter(rows("SELECT text FROM footers WHERE chat_id=?")), (None,))[0]
+        template = next(iter(rows("SELECT template FROM caption_templates WHERE chat_id=?")), (None,))[0]
+    finally:
+        conn.close()
+    return rules, keywords, replacements, footer, template
+
+
+def load_keyword_pack(path: str) -> List[Tuple[str, bool]]:
+    pack = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            word = line.strip()
+            if not word or word.startswith("#"):
+                continue
+            pack.append((word[3:], True) if word.startswith("re:") else (word, False))
+    return pack
+
+
+def _init_worker(spec: tuple):
+    global _snapshot, _verdicts
+    _snapshot = RuleSet(*spec)
+    _verdicts = LineVerdictCache(config.LINE_CACHE_SIZE)
+
+
+def _eval_chunk(captions: List[str]) -> Tuple[int, int, int]:
+    """Returns (captions, blocked, altered) for one chunk."""
+    blocked = altered = 0
+    for caption in captions:
+        cleaned = clean(caption, None, _snapshot, verdict_cache=_verdicts)
+        if not cleaned:
+            blocked += bool(caption.strip())
+        elif cleaned != caption.strip():
+            altered += 1
+    return len(captions), blocked, altered
+
+
+def evaluate(snapshot: RuleSet, captions, workers: int, chunk_size: int) -> dict:
+    """Streams captions through the pool in chunks, keeping at most two chunks per worker in flight."""
+    totals = [0, 0, 0]
+    chunks = iter(lambda: list(itertools.islice(captions, chunk_size)), [])
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(snapshot.spec,)) as pool:
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(_eval_chunk, chunk))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    totals = [a + b for a, b in zip(totals, future.result())]
+        for future in pending:
+            totals = [a + b for a, b in zip(totals, future.result())]
+    elapsed = time.perf_counter() - start
+
+    count, blocked, altered = totals
+    return {
+        "captions": count,
+        "blocked": blocked,
+        "altered": altered,
+        "unchanged": count - blocked - altered,
+        "elapsed_s": elapsed,
+        "per_sec": count / elapsed if elapsed else 0.0,
+        "workers": workers,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("chat_id", help="chat whose rules, keywords and replacements are evaluated")
+    parser.add_argument("corpus", help="caption file ('-' for stdin)")
+    parser.add_argument("--db", default=config.DB_FILE, help="SQLite database (opened read-only)")
+    parser.add_argument("--keywords", help="keyword pack evaluated on top of the chat's keywords")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes (default: all cores)")
+    parser.add_argument("--chunk", type=int, default=500, help="captions per task")
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        sys.exit(f"❌ Database not found: {args.db}")
+    rules, keywords, replacements, footer, template = load_chat_config(args.db, args.chat_id)
+    if args.keywords:
+        pack = load_keyword_pack(args.keywords)
+        keywords = list(dict.fromkeys(keywords + pack))
+        print(f"📦 Keyword pack: {len(pack)} entries")
+    snapshot = RuleSet(args.chat_id, (0, 0), rules, keywords, replacements, footer, template)
+    print(
+        f"⚙️ Chat {args.chat_id}: rules={list(snapshot.rules)} keywords={len(snapshot.keywords)} "
+        f"replacements={len(snapshot.replacements)} stages={list(snapshot.pipeline.names)}"
+    )
+
+    source = sys.stdin if args.corpus == "-" else open(args.corpus, encoding="utf-8")
+    try:
+        report = evaluate(snapshot, iter_caption_file(source), max(1, args.workers), max(1, args.chunk))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    n = report["captions"] or 1
+    rate = f"{report['per_sec']:,.0f}/s, {report['workers']} workers"
+    print(f"\n📊 {report['captions']:,} captions in {report['elapsed_s']:.2f}s ({rate})")
+    print(f"   blocked:   {report['blocked']:>10,} ({report['blocked'] / n:.1%})")
+    print(f"   altered:   {report['altered']:>10,} ({report['altered'] / n:.1%})")
+    print(f"   unchanged: {report['unchanged']:>10,} ({report['unchanged'] / n:.1%})")
+
+
+if __name__ == "__main__":
+    main()
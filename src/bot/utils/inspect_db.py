@@ -32,6 +32,10 @@ async def inspect_db():
     else:
         print("No duplicates found in forward_queue.")
 
+    print("\n--- Dedup Table Stats ---")
+    cursor.execute("SELECT count(*) FROM media_dedup")
+    print(f"Items in media_dedup: {cursor.fetchone()[0]}")
+
     print("\n--- Seen Table Stats ---")
     cursor.execute("SELECT count(*) FROM seen")
     print(f"Items in seen: {cursor.fetchone()[0]}")
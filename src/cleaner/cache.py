@@ -0,0 +1,175 @@
+import hashlib
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from cachetools import LRUCache
+from telegram import MessageEntity
+from src.bot.core import config
+
+
+def text_digest(text: str) -> bytes:
+    return hashlib.blake2b((text or "").encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def entities_digest(entities: Optional[List[MessageEntity]]) -> bytes:
+    if not entities:
+        return b""
+    parts = (
+        f"{getattr(e, 'type', '')}:{getattr(e, 'offset', 0)}:{getattr(e, 'length', 0)}:{getattr(e, 'url', '') or ''}"
+        for e in entities
+    )
+    return text_digest("|".join(parts))
+
+
+class _CountingLRU(LRUCache):
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize)
+        self.evictions = 0
+
+    def popitem(self):
+        self.evictions += 1
+        return super().popitem()
+
+
+class CleanCache:
+    """
+    Bounded LRU memo of clean_caption results.
+    Keys carry the chat's config version, so a config write makes older entries unreachable; they age out by LRU.
+    """
+
+    def __init__(self, maxsize: int):
+        self.hits = 0
+        self.misses = 0
+        self.configure(maxsize)
+
+    def configure(self, maxsize: int):
+        """Resizes the cache (dropping its contents); maxsize <= 0 disables caching."""
+        self.maxsize = max(0, int(maxsize))
+        self._lru = _CountingLRU(self.maxsize) if self.maxsize else None
+
+    @property
+    def enabled(self) -> bool:
+        return self._lru is not None
+
+    def get(self, key: Hashable) -> Optional[str]:
+        if self._lru is None:
+            return None
+        value = self._lru.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: str):
+        if self._lru is not None:
+            self._lru[key] = value
+
+    def clear(self, chat_id: Optional[str] = None):
+        """Drops cached results of one chat, or of every chat."""
+        if self._lru is None:
+            return
+        if chat_id is None:
+            self._lru.clear()
+            return
+        cid = str(chat_id)
+        for key in [k for k in self._lru.keys() if k[2] == cid]:
+            del self._lru[key]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._lru) if self._lru is not None else 0,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self._lru.evictions if self._lru is not None else 0,
+        }
+
+    def reset_stats(self):
+        self.hits = self.misses = 0
+        if self._lru is not None:
+            self._lru.evictions = 0
+
+
+# Chats whose line verdicts are kept; the least recently cleaning chat is dropped first
+_LINE_CACHE_CHATS = 1024
+
+
+class LineVerdictCache:
+    """
+    Per-chat LRU of ad-line verdicts for strip_ad_lines mode.
+    Source channels repeat the same promo lines on every post, so those classify in O(1).
+    Each chat's table is tagged with its rule set (config version included) and starts over when the rules change.
+    """
+
+    def __init__(self, maxsize: int):
+        self.hits = 0
+        self.misses = 0
+        # Lookups made by the regex worker processes in their own caches, as reported back with each caption
+        self.worker_hits = 0
+        self.worker_misses = 0
+        self.configure(maxsize)
+
+    def configure(self, maxsize: int):
+        """Sets the per-chat capacity (dropping all verdicts); maxsize <= 0 disables the cache."""
+        self.maxsize = max(0, int(maxsize))
+        self._chats: LRUCache = LRUCache(_LINE_CACHE_CHATS)
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def verdict(self, chat_id: str, tag: Hashable, line: str, classify: Callable[[str], bool]) -> bool:
+        """Returns the cached verdict for line, calling classify(line) on a miss."""
+        if not self.maxsize:
+            return classify(line)
+        entry = self._chats.get(chat_id)
+        if entry is None or entry[0] != tag:
+            entry = (tag, _CountingLRU(self.maxsize))
+            self._chats[chat_id] = entry
+        lru = entry[1]
+        # The line itself is the key: str caches its hash and equality rules out collisions
+        verdict = lru.get(line)
+        if verdict is None:
+            self.misses += 1
+            verdict = lru[line] = classify(line)
+        else:
+            self.hits += 1
+        return verdict
+
+    def add_worker_counts(self, hits: int, misses: int):
+        self.worker_hits += hits
+        self.worker_misses += misses
+
+    def clear(self, chat_id: Optional[str] = None):
+        if chat_id is None:
+            self._chats.clear()
+        else:
+            self._chats.pop(str(chat_id), None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        tables = [lru for _, lru in self._chats.values()]
+        return {
+            "enabled": self.enabled,
+            "chats": len(tables),
+            "size": sum(len(lru) for lru in tables),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": sum(lru.evictions for lru in tables),
+            "worker_hits": self.worker_hits,
+            "worker_misses": self.worker_misses,
+        }
+
+    def reset_stats(self):
+        self.hits = self.misses = 0
+        self.worker_hits = self.worker_misses = 0
+        for _, lru in self._chats.values():
+            lru.evictions = 0
+
+
+clean_cache = CleanCache(config.CLEAN_CACHE_SIZE)
+line_cache = LineVerdictCache(config.LINE_CACHE_SIZE)
@@ -0,0 +1,58 @@
+import json
+import hashlib
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+CORPUS_DIR = Path(__file__).resolve().parent
+# Corpus files are never edited in place: changed samples go into a new version so old results stay comparable
+CORPUS_VERSION = "v1"
+
+
+def corpus_path(name: str = "ad_captions", version: str = CORPUS_VERSION) -> Path:
+    return CORPUS_DIR / f"{name}_{version}.jsonl"
+
+
+def load_captions(name: str = "ad_captions", version: str = CORPUS_VERSION) -> List[str]:
+    """Loads a caption corpus (one JSON object with a "text" field per line)."""
+    with open(corpus_path(name, version), encoding="utf-8") as f:
+        return [json.loads(line)["text"] for line in f if line.strip()]
+
+
+def corpus_digest(name: str = "ad_captions", version: str = CORPUS_VERSION) -> str:
+    return hashlib.sha256(corpus_path(name, version).read_bytes()).hexdigest()[:16]
+
+
+def iter_caption_file(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Streams captions from a text file: JSON Lines (a string or an object with "text"/"caption" per line) when the
+    first non-empty line is JSON, otherwise plain text with captions separated by blank lines.
+    """
+    block: List[str] = []
+    as_json: Optional[bool] = None
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        if as_json is None:
+            if not line.strip():
+                continue
+            as_json = _json_caption(line) is not None
+        if as_json:
+            caption = _json_caption(line) if line.strip() else None
+            if caption:
+                yield caption
+        elif line.strip():
+            block.append(line)
+        elif block:
+            yield "\n".join(block)
+            block = []
+    if block:
+        yield "\n".join(block)
+
+
+def _json_caption(line: str) -> Optional[str]:
+    try:
+        value = json.loads(line)
+    except ValueError:
+        return None
+    if isinstance(value, dict):
+        value = value.get("text", value.get("caption"))
+    return value if isinstance(value, str) else None
@@ -1,28 +1,166 @@
 import re
+import asyncio
+import itertools
 import logging
-from typing import List, Optional
+import unicodedata
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
 from telegram import MessageEntity
-from src.bot.data.repositories import ChatRepository
+from src.cleaner.cache import LineVerdictCache, clean_cache, entities_digest, line_cache, text_digest
+from src.cleaner.entities import Utf16Index, remove_spans
+from src.cleaner import regex_guard
+from src.cleaner.matcher import keyword_predicate
+from src.cleaner.ruleset import RuleSet, get_ruleset
 
 logger = logging.getLogger(__name__)
 
+_URL_RE = re.compile(r"https?://\S+|t\.me/\S+|telegram\.me/\S+|tg://\S+|www\.\S+", re.IGNORECASE)
+_AD_LINK_RE = re.compile(
+    r"https?://\S+|t\.me/\S+|telegram\.me/\S+|tg://\S+|www\.\S+|\[[^\]]+\]\([^\)]+\)", re.IGNORECASE
+)
+_MENTION_RE = re.compile(r"@\w+")
+_HASHTAG_RE = re.compile(r"#[\w\u4e00-\u9fff]+")
+# Markdown links keep their anchor text (group "md"); plain URLs and mentions go entirely
+_LINKS_AND_MENTIONS_RE = re.compile(
+    r"\[(?P<md>[^\]]+)\]\((?:https?://|t\.me/|telegram\.me/|tg://|www\.)[^\)]+\)"
+    r"|https?://\S+|t\.me/\S+|telegram\.me/\S+|tg://\S+|www\.\S+|@\w+",
+    re.IGNORECASE,
+)
+
+
+def _collect_hidden_chars() -> List[int]:
+    """Code points of every invisible/formatting character spammers use to dodge filters."""
+    cps = set()
+    # Format characters (Cf) are only assigned below U+20000 and in the tag block of plane 14
+    for cp in itertools.chain(range(0x20000), range(0xE0000, 0xE1000)):
+        if unicodedata.category(chr(cp)) == "Cf":
+            cps.add(cp)
+    # Variation selectors (incl. supplement) and Mongolian free variation selectors
+    cps.update(range(0xFE00, 0xFE10), range(0xE0100, 0xE01F0), range(0x180B, 0x1810))
+    # Hangul fillers and no-break space
+    cps.update((0x115F, 0x1160, 0x3164, 0xFFA0, 0x00A0))
+    return sorted(cps)
+
+
+def _compile_char_class(cps: List[int]) -> re.Pattern:
+    # BMP code points are listed one by one so sre can use its bitmap charset; astral ones as ranges
+    parts = [re.escape(chr(cp)) for cp in cps if cp < 0x10000]
+    astral = [cp for cp in cps if cp >= 0x10000]
+    start = prev = None
+    for cp in astral + [None]:
+        if start is not None and cp == prev + 1:
+            prev = cp
+            continue
+        if start is not None:
+            parts.append(f"{chr(start)}-{chr(prev)}" if prev != start else chr(start))
+        start = prev = cp
+    return re.compile(f"[{''.join(parts)}]+")
+
+
+HIDDEN_CHARS = frozenset(chr(cp) for cp in _collect_hidden_chars())
+_HIDDEN_CHARS_RE = _compile_char_class(sorted(map(ord, HIDDEN_CHARS)))
+
+# The characters spammers actually use (and emoji presentation selectors); `in` and str.replace scan a str
+# several times faster than sre, so these are removed one by one
+_COMMON_HIDDEN_CHARS = tuple(
+    chr(cp)
+    for cp in (
+        0x200B, 0x200C, 0x200D, 0xFEFF, 0x202A, 0x202B, 0x202C, 0x202D, 0x202E, 0x2060, 0x2061, 0x2062, 0x2063,
+        0x2064, 0x2069, 0x206A, 0x206B, 0x206C, 0x206D, 0x206E, 0x206F, 0x3164, 0xFFA0, 0x00A0, 0xFE0F, 0xFE0E,
+    )
+)
+# Every other hidden character is either non-printable (Cf) or starts with one of these UTF-8 prefixes
+_PRINTABLE_HIDDEN_UTF8 = tuple(
+    sorted({c.encode("utf-8")[:2] for c in HIDDEN_CHARS if c.isprintable() and c not in _COMMON_HIDDEN_CHARS})
+)
+# Below this length one regex pass is cheaper than the str.replace loop plus probe
+_HIDDEN_REGEX_MAX_LEN = 160
+
+
+def _may_contain_hidden(text: str) -> bool:
+    """False only if text certainly holds no hidden character; a True may be a false alarm (tabs, odd spaces)."""
+    probe = text.replace("\n", "")
+    if "\u3000" in probe:
+        probe = probe.replace("\u3000", "")
+    if not probe.isprintable():
+        return True
+    encoded = text.encode("utf-8", "surrogatepass")
+    return any(prefix in encoded for prefix in _PRINTABLE_HIDDEN_UTF8)
+
 
 def strip_hidden_chars(text: str) -> str:
     """Removes zero-width spaces, invisible formatting, and control characters."""
     if not text:
         return ""
-    chars = [
-        "\u200b", "\u200c", "\u200d", "\ufeff",
-        "\u202a", "\u202b", "\u202c", "\u202d", "\u202e",
-        "\u2060", "\u2061", "\u2062", "\u2063", "\u2064",
-        "\u2069", "\u206a", "\u206b", "\u206c", "\u206d",
-        "\u206e", "\u206f", "\u3164", "\uffa0", "\u00a0"
-    ]
-    for char in chars:
-        text = text.replace(char, "")
+    # Every hidden character is non-ASCII
+    if text.isascii():
+        return text
+    if len(text) < _HIDDEN_REGEX_MAX_LEN:
+        return _HIDDEN_CHARS_RE.sub("", text)
+    for char in _COMMON_HIDDEN_CHARS:
+        if char in text:
+            text = text.replace(char, "")
+    # Rare hidden characters: one full regex pass, only when a C-level probe cannot rule them out
+    if _may_contain_hidden(text):
+        text = _HIDDEN_CHARS_RE.sub("", text)
     return text
 
 
+def rewrite_caption(
+    text: str, entities: List[MessageEntity] = None, strip_links: bool = True, strip_mentions: bool = True
+) -> Tuple[str, List[MessageEntity]]:
+    """
+    Strips hidden characters plus links and/or @mentions in a single traversal.
+    Links cover plain URLs, markdown links (anchor text kept) and url/text_link entities; mentions cover
+    '@name' text and mention entities. Returns the cleaned text and the remaining entities re-based onto it.
+    """
+    if not text:
+        return "", []
+
+    hidden = [m.span() for m in _HIDDEN_CHARS_RE.finditer(text)] if not text.isascii() else []
+    stripped = _HIDDEN_CHARS_RE.sub("", text) if hidden else text
+    # Patterns match the stripped text so hidden characters cannot split a URL or mention
+    run_starts = []
+    run_shift = []
+    total = 0
+    for start, end in hidden:
+        run_starts.append(start - total)
+        total += end - start
+        run_shift.append(total)
+
+    def raw(idx: int) -> int:
+        k = bisect_right(run_starts, idx)
+        return idx + (run_shift[k - 1] if k else 0)
+
+    spans = list(hidden)
+    drop_types = set()
+    if strip_links:
+        drop_types.update(("url", "text_link"))
+    if strip_mentions:
+        drop_types.add("mention")
+    # Links need a scheme, '.me/' or 'www.' (markdown targets included) and mentions an '@'
+    if (strip_links and _scan_features(stripped, _F_AT | _F_URL)) or (strip_mentions and "@" in stripped):
+        pattern = _LINKS_AND_MENTIONS_RE if strip_links else _MENTION_RE
+        for m in pattern.finditer(stripped):
+            if m.re is _LINKS_AND_MENTIONS_RE and m.group("md") is not None:
+                spans.append((raw(m.start()), raw(m.start("md"))))
+                spans.append((raw(m.end("md")), raw(m.end())))
+            elif m.group(0).startswith("@") and not strip_mentions:
+                continue
+            else:
+                spans.append((raw(m.start()), raw(m.end())))
+
+    kept = []
+    if entities:
+        index = Utf16Index(text)
+        for ent in entities:
+            if getattr(ent, "type", None) in drop_types:
+                spans.append((index.to_index(ent.offset), index.to_index(ent.offset + ent.length)))
+            else:
+                kept.append(ent)
+    return remove_spans(text, spans, kept)
+
+
 def apply_pangu_spacing(text: str) -> str:
     """Inserts space between CJK characters and Latin/digits."""
     if not text:
@@ -32,29 +170,43 @@ def apply_pangu_spacing(text: str) -> str:
     return text
 
 
-def restore_all_tags(original: str, cleaned: str, keywords: list = None) -> str:
+def restore_all_tags(original: str, cleaned: str, keywords: list = None, ruleset: Optional[RuleSet] = None) -> str:
     """Restores non-ad hashtags from original if missing and cleaned is non-empty."""
     if not cleaned or not cleaned.strip():
         return ""
-    tags = re.findall(r"#[\w\u4e00-\u9fff]+", original)
+    tags = _HASHTAG_RE.findall(original or "")
+    if not tags:
+        return cleaned.strip()
+
+    if ruleset is not None:
+        is_bad = ruleset.find_keyword
+    elif keywords:
+        is_bad = keyword_predicate(tuple((w, bool(r)) for w, r in keywords))
+    else:
+        is_bad = None
+
+    present = set(_HASHTAG_RE.findall(cleaned))
+    missing = []
     for tag in tags:
-        is_bad = False
-        if keywords:
-            for word, is_regex in keywords:
-                try:
-                    if is_regex:
-                        if re.search(word, tag, flags=re.IGNORECASE):
-                            is_bad = True
-                            break
-                    else:
-                        if word.lower() in tag.lower():
-                            is_bad = True
-                            break
-                except Exception:
-                    pass
-        if not is_bad and tag not in cleaned:
-            cleaned += f" {tag}"
-    return cleaned.strip()
+        if tag in present:
+            continue
+        present.add(tag)
+        if is_bad is None or not is_bad(tag):
+            missing.append(tag)
+    if not missing:
+        return cleaned.strip()
+    return " ".join([cleaned.strip()] + missing)
+
+
+def restore_tags_for_targets(original: str, cleaned_by_target: Dict[str, str]) -> Dict[str, str]:
+    """restore_all_tags for every target; targets sharing a cleaned caption share one restoration."""
+    restored: Dict[str, str] = {}
+    result = {}
+    for tid, cleaned in cleaned_by_target.items():
+        if cleaned not in restored:
+            restored[cleaned] = restore_all_tags(original, cleaned)
+        result[tid] = restored[cleaned]
+    return result
 
 
 BUILTIN_AD_PATTERNS = [
@@ -69,6 +221,79 @@ BUILTIN_AD_PATTERNS = [
     r"(私信|私聊|联系客服|咨询客服|商务合作|代理加盟|加微|加Q)",
 ]
 
+# Names reported when a builtin pattern fires, index-aligned with BUILTIN_AD_PATTERNS
+BUILTIN_AD_NAMES = [
+    "comment_section",
+    "message_section",
+    "discussion_group",
+    "watch_full",
+    "full_elsewhere",
+    "click_to_join",
+    "join_group",
+    "extract_code",
+    "private_contact",
+]
+
+# Every builtin pattern fused into one alternation; named groups tell which one fired (m.lastgroup)
+_BUILTIN_AD_RE = re.compile(
+    "|".join(f"(?P<{name}>{pat})" for name, pat in zip(BUILTIN_AD_NAMES, BUILTIN_AD_PATTERNS)),
+    re.IGNORECASE,
+)
+
+# Characters of which every match of the builtin pattern must contain at least one, index-aligned
+_BUILTIN_AD_TRIGGERS = [
+    "评",
+    "留",
+    "讨",
+    "全完正后高未",
+    "全完后未正资",
+    "点长复",
+    "进入加关订",
+    "解提下",
+    "私联咨商代加",
+]
+_PROMO_TRIGGER_RE = re.compile("[" + "".join(sorted(set("".join(_BUILTIN_AD_TRIGGERS)))) + "]")
+
+# Feature bits of the one-pass prefilter: a regex family only runs when its trigger characters are present
+_F_AT = 1  # '@'
+_F_SCHEME = 2  # '://'
+_F_ME = 4  # '.me/' (t.me, telegram.me)
+_F_WWW = 8  # 'www.'
+_F_BRACKET = 16  # '](' (markdown link)
+_F_PROMO = 32  # a builtin ad trigger character
+_F_ALL = 63
+_F_URL = _F_SCHEME | _F_ME | _F_WWW  # _URL_RE, and the target of a markdown link
+_F_AD_LINK = _F_URL | _F_BRACKET  # _AD_LINK_RE
+
+
+def _scan_features(text: str, wanted: int = _F_ALL) -> int:
+    """Presence bitmask of the wanted trigger features in text (substring checks, no regex unless needed)."""
+    mask = 0
+    if wanted & _F_AT and "@" in text:
+        mask |= _F_AT
+    if wanted & _F_SCHEME and "://" in text:
+        mask |= _F_SCHEME
+    if wanted & (_F_ME | _F_WWW) and "." in text:
+        # The link patterns are case-insensitive
+        lowered = text if text.islower() else text.lower()
+        if wanted & _F_ME and ".me/" in lowered:
+            mask |= _F_ME
+        if wanted & _F_WWW and "www." in lowered:
+            mask |= _F_WWW
+    if wanted & _F_BRACKET and "](" in text:
+        mask |= _F_BRACKET
+    if wanted & _F_PROMO and not text.isascii() and _PROMO_TRIGGER_RE.search(text):
+        mask |= _F_PROMO
+    return mask
+
+
+def match_builtin_ad(line: str) -> Optional[str]:
+    """Returns the name of the first builtin ad pattern found in line, or None."""
+    if not line:
+        return None
+    m = _BUILTIN_AD_RE.search(line)
+    return m.lastgroup if m else None
+
 
 def is_ad_line(
     line: str,
@@ -77,40 +302,44 @@ def is_ad_line(
     check_mentions: bool = True,
     check_kws: bool = True,
     check_builtin_ads: bool = True,
+    ruleset: Optional[RuleSet] = None,
+    features: int = _F_ALL,
 ) -> bool:
-    """Checks if a single line contains any links, @ mentions, lead-in promos, or keywords."""
+    """
+    Checks if a single line contains any links, @ mentions, lead-in promos, or keywords.
+    features is the prefilter mask of the whole caption, if known: families absent from it are not even scanned for.
+    """
     if not line or not line.strip():
         return False
 
     raw_line = line.strip()
-    # Normalize leading quote/markdown symbols (e.g. '> 103p4v-评论区看全集')
-    cleaned_line = re.sub(r"^[>\s\-\*•·\d\w_]+-", "", raw_line).strip()
-    cleaned_line_generic = re.sub(r"^[>\s\-\*•·]+", "", raw_line).strip()
+    wanted = features & (
+        (_F_AD_LINK if check_links else 0) | (_F_AT if check_mentions else 0) | (_F_PROMO if check_builtin_ads else 0)
+    )
+    present = _scan_features(raw_line, wanted) if wanted else 0
 
-    if check_links:
-        if re.search(r"https?://\S+|t\.me/\S+|telegram\.me/\S+|tg://\S+|www\.\S+|\[[^\]]+\]\([^\)]+\)", raw_line, flags=re.IGNORECASE):
+    if present & _F_AD_LINK:
+        if _AD_LINK_RE.search(raw_line):
             return True
 
-    if check_mentions:
-        if re.search(r"@\w+", raw_line):
+    if present & _F_AT:
+        if _MENTION_RE.search(raw_line):
             return True
 
-    if check_builtin_ads:
-        for pat in BUILTIN_AD_PATTERNS:
-            if re.search(pat, raw_line, flags=re.IGNORECASE) or re.search(pat, cleaned_line, flags=re.IGNORECASE) or re.search(pat, cleaned_line_generic, flags=re.IGNORECASE):
-                return True
+    if present & _F_PROMO:
+        # Leading quote/markdown prefixes (e.g. '> 103p4v-评论区看全集') need no normalization:
+        # the stripped variants are suffixes of raw_line and no builtin pattern is anchored
+        name = match_builtin_ad(raw_line)
+        if name:
+            logger.debug(f"Builtin ad pattern '{name}' matched: {raw_line[:50]}")
+            return True
+
+    if check_kws and ruleset is not None:
+        return ruleset.find_keyword(raw_line)
 
     if check_kws and keywords:
-        for word, is_regex in keywords:
-            try:
-                if is_regex:
-                    if re.search(word, raw_line, flags=re.IGNORECASE):
-                        return True
-                else:
-                    if word.lower() in raw_line.lower():
-                        return True
-            except Exception:
-                pass
+        if keyword_predicate(tuple((w, bool(r)) for w, r in keywords))(raw_line):
+            return True
 
     return False
 
@@ -131,169 +360,140 @@ async def clean_caption(
     chat_title: str = "Unknown",
 ) -> str:
     """The main entry point for caption purification and ad stripping."""
-    # 1. Fetch configuration
-    rules = await ChatRepository.get_chat_rules(chat_id)
-    keywords = await ChatRepository.get_keywords(chat_id)
-    replacements = await ChatRepository.get_replacements(chat_id)
-    footer = await ChatRepository.get_footer(chat_id)
-    template = await ChatRepository.get_caption_template(chat_id)
-
-    # 2. Preparation
-    original_text = strip_hidden_chars(text or "")
-    cleaned = original_text
-
-    # 3. Short-circuit if keep_all rule is active
-    if "keep_all" in rules:
-        if footer:
-            cleaned = f"{cleaned.strip()}\n\n{footer}"
-        return cleaned.strip()
+    # 1. Fetch configuration (compiled once per config version)
+    ruleset = await load_snapshot(chat_id)
+    return await _clean_with_ruleset(text, ruleset, chat_id, user_id, entities, has_spoiler, chat_title)
 
-    # 4. Mode: strip_ad_lines / clean_lines / del_ad_lines
-    # Directly delete any line containing links, @ symbols, or keywords
-    if any(r in rules for r in ["strip_ad_lines", "clean_lines", "del_ad_lines", "clean_ad_lines"]):
-        lines = cleaned.split("\n")
-        retained_lines = []
-        for line in lines:
-            if not is_ad_line(line, keywords, check_links=True, check_mentions=True, check_kws=True):
-                retained_lines.append(line)
-        cleaned = "\n".join(retained_lines)
-        for old, new in replacements:
-            cleaned = cleaned.replace(old, new)
-    else:
-        # Standard granular filtering
-        # Check for links
-        has_link = bool(
-            re.search(r"http[s]?://\S+|t\.me/\S+|telegram\.me/\S+|tg://\S+|www\.\S+", cleaned, re.IGNORECASE)
-        )
-        if not has_link and entities:
-            for ent in entities:
-                ent_type = getattr(ent, "type", None)
-                if ent_type in ["url", "text_link", "mention"]:
-                    has_link = True
-                    break
-
-        # If strip_all_if_links rule is active and links are present, wipe caption
-        if "strip_all_if_links" in rules and has_link:
-            return ""
-
-        # Remove links if clean_links rule is active
-        if "clean_links" in rules:
-            # Strip markdown links [Text](URL) -> Text
-            cleaned = re.sub(r"\[([^\]]+)\]\((?:https?://|t\.me/|telegram\.me/|tg://|www\.)[^\)]+\)", r"\1", cleaned, flags=re.IGNORECASE)
-            # Strip plain URLs
-            cleaned = re.sub(r"https?://\S+", "", cleaned, flags=re.IGNORECASE)
-            cleaned = re.sub(r"t\.me/\S+", "", cleaned, flags=re.IGNORECASE)
-            cleaned = re.sub(r"telegram\.me/\S+", "", cleaned, flags=re.IGNORECASE)
-            cleaned = re.sub(r"tg://\S+", "", cleaned, flags=re.IGNORECASE)
-            cleaned = re.sub(r"www\.\S+", "", cleaned, flags=re.IGNORECASE)
-            cleaned = re.sub(r"@\w+", "", cleaned)
-
-            # If entities are present, strip text associated with text_link entities if any remain
-            if entities and original_text:
-                for ent in entities:
-                    ent_type = getattr(ent, "type", None)
-                    if ent_type == "text_link":
-                        offset = getattr(ent, "offset", 0)
-                        length = getattr(ent, "length", 0)
-                        if offset < len(original_text):
-                            link_text = original_text[offset : offset + length]
-                            if link_text:
-                                cleaned = cleaned.replace(link_text, "")
-
-        # Remove @mentions if remove_at_prefix or remove_at is active
-        if "remove_at_prefix" in rules or "remove_at" in rules:
-            cleaned = re.sub(r"@\w+", "", cleaned)
-
-        # Apply text replacements
-        for old, new in replacements:
-            cleaned = cleaned.replace(old, new)
-
-        # Keyword Ad Blocking / Cleaning
-        if "block_keywords" in rules:
-            # 严格屏蔽 (发现关键词删整条)
-            for word, is_regex in keywords:
-                try:
-                    if is_regex:
-                        if re.search(word, cleaned, flags=re.IGNORECASE):
-                            return ""
-                    else:
-                        if word.lower() in cleaned.lower():
-                            return ""
-                except Exception as e:
-                    logger.warning(f"Invalid regex/keyword '{word}': {e}")
-        elif "clean_keywords" in rules:
-            # 温和屏蔽 (仅删含广告关键词的行)
-            lines = cleaned.split("\n")
-            retained_lines = []
-            for line in lines:
-                line_has_kw = False
-                for word, is_regex in keywords:
-                    try:
-                        if is_regex:
-                            if re.search(word, line, flags=re.IGNORECASE):
-                                line_has_kw = True
-                                break
-                        else:
-                            if word.lower() in line.lower():
-                                line_has_kw = True
-                                break
-                    except Exception:
-                        pass
-                if not line_has_kw:
-                    retained_lines.append(line)
-            cleaned = "\n".join(retained_lines)
-        else:
-            # 默认词级过滤
-            for word, is_regex in keywords:
-                try:
-                    if is_regex:
-                        cleaned = re.sub(word, "", cleaned, flags=re.IGNORECASE)
-                    else:
-                        pattern = re.compile(re.escape(word), re.IGNORECASE)
-                        cleaned = pattern.sub("", cleaned)
-                except Exception as e:
-                    logger.warning(f"Invalid regex/keyword '{word}': {e}")
-
-    cleaned = cleaned.strip()
-    if not cleaned:
-        return ""
 
-    # 5. Apply maxlen truncation if specified (e.g. maxlen:50)
-    for rule in rules:
-        if rule.startswith("maxlen:"):
-            try:
-                max_l = int(rule.split(":")[1])
-                if len(cleaned) > max_l:
-                    cleaned = cleaned[:max_l].strip()
-            except ValueError:
-                pass
-
-    # 6. Apply pangu formatting spacing if requested
-    if "pangu" in rules:
-        cleaned = apply_pangu_spacing(cleaned)
-
-    # 7. Apply Template if exists
-    if template and cleaned:
-        from datetime import datetime
-
-        vars_dict = {
-            "{orig}": cleaned,
-            "{title}": chat_title,
-            "{cid}": chat_id,
-            "{date}": datetime.now().strftime("%Y-%m-%d %H:%M"),
-            "{user}": str(user_id) if user_id else "Unknown",
-        }
-        final_text = template
-        for k, v in vars_dict.items():
-            final_text = final_text.replace(k, v)
-        cleaned = final_text
-
-    # 8. Add footer
-    if footer and cleaned:
-        cleaned = f"{cleaned.strip()}\n\n{footer}"
-    elif footer and not cleaned and "keep_all" not in rules:
-        cleaned = footer
-
-    return cleaned.strip()
+async def load_snapshot(chat_id: str) -> RuleSet:
+    """
+    Loads the immutable cleaning config of a chat (the only part of cleaning that touches the database).
+    The snapshot can be handed to clean() anywhere: thread or process pools, bulk tools, tests.
+    """
+    return await get_ruleset(chat_id)
 
 
+def clean(
+    text: str,
+    entities: Optional[List[MessageEntity]],
+    snapshot: RuleSet,
+    user_id: int = 0,
+    chat_title: str = "Unknown",
+    has_spoiler: bool = False,
+    timings: Optional[Dict[str, float]] = None,
+    verdict_cache: Optional[LineVerdictCache] = None,
+) -> str:
+    """
+    Pure synchronous cleaning of one caption with a loaded snapshot: no I/O, no event loop, no shared state,
+    so it is safe in any thread. Regex keywords run in the calling thread, without the worker-pool deadline
+    clean_caption applies. Pass a dict as timings to collect the seconds spent in each pipeline stage, and a
+    LineVerdictCache owned by the caller as verdict_cache to memoize ad-line verdicts.
+    """
+    return _run_clean(
+        text, snapshot, snapshot.chat_id, user_id, entities, has_spoiler, chat_title, timings, verdict_cache
+    )
+
+
+async def clean_caption_for_targets(
+    text: str,
+    target_ids: Iterable[str],
+    user_id: int = 0,
+    entities: List[MessageEntity] = None,
+    has_spoiler: bool = False,
+    chat_title: str = "Unknown",
+) -> Dict[str, str]:
+    """
+    Cleans one caption for many target chats (cascade fan-out).
+    Rule sets are fetched concurrently and targets with identical rules share a single cleaning pass.
+    """
+    ids = list(dict.fromkeys(str(t) for t in target_ids))
+    rulesets = await asyncio.gather(*(get_ruleset(tid) for tid in ids))
+
+    # One representative target per distinct fingerprint
+    groups: Dict[tuple, str] = {}
+    for tid, ruleset in zip(ids, rulesets):
+        groups.setdefault(ruleset.fingerprint, tid)
+    by_id = dict(zip(ids, rulesets))
+    cleaned = await asyncio.gather(
+        *(
+            _clean_with_ruleset(text, by_id[tid], tid, user_id, entities, has_spoiler, chat_title)
+            for tid in groups.values()
+        )
+    )
+    by_fingerprint = dict(zip(groups, cleaned))
+    return {tid: by_fingerprint[ruleset.fingerprint] for tid, ruleset in zip(ids, rulesets)}
+
+
+def _cache_key(text, ruleset: RuleSet, chat_id, user_id, entities, chat_title) -> Optional[tuple]:
+    template = ruleset.compiled_template
+    # {date} changes every minute, so such results are never reused
+    if not clean_cache.enabled or (template and template.uses("date")):
+        return None
+    return (
+        text_digest(text),
+        entities_digest(entities),
+        str(chat_id),
+        ruleset.version,
+        str(user_id) if template and template.uses("user") else None,
+        chat_title if template and template.uses("title") else None,
+    )
+
+
+async def _clean_with_ruleset(
+    text: str,
+    ruleset: RuleSet,
+    chat_id: str,
+    user_id: int = 0,
+    entities: List[MessageEntity] = None,
+    has_spoiler: bool = False,
+    chat_title: str = "Unknown",
+) -> str:
+    key = _cache_key(text, ruleset, chat_id, user_id, entities, chat_title)
+    if key is not None:
+        cached = clean_cache.get(key)
+        if cached is not None:
+            return cached
+
+    # Plain keywords stay on the event loop; regex keywords run in the guarded worker pool
+    if not ruleset.regex_keywords or not regex_guard.guard.enabled:
+        cleaned = _run_clean(text, ruleset, chat_id, user_id, entities, has_spoiler, chat_title)
+    else:
+        try:
+            cleaned = await regex_guard.run_clean(text, ruleset, chat_id, user_id, entities, has_spoiler, chat_title)
+        except regex_guard.RegexTimeout:
+            # Quarantining bumps the config version, so the key above is stale either way
+            return await _clean_after_timeout(text, ruleset, chat_id, user_id, entities, has_spoiler, chat_title)
+
+    if key is not None:
+        clean_cache.put(key, cleaned)
+    return cleaned
+
+
+async def _clean_after_timeout(text, ruleset: RuleSet, chat_id, user_id, entities, has_spoiler, chat_title) -> str:
+    logger.warning(f"⏱ Regex keywords of chat {ruleset.chat_id} overran {regex_guard.guard.timeout_ms}ms, isolating")
+    if await regex_guard.quarantine_slow_patterns(ruleset, text):
+        ruleset = await get_ruleset(ruleset.chat_id)
+        if not ruleset.regex_keywords:
+            return _run_clean(text, ruleset, chat_id, user_id, entities, has_spoiler, chat_title)
+        try:
+            return await regex_guard.run_clean(text, ruleset, chat_id, user_id, entities, has_spoiler, chat_title)
+        except regex_guard.RegexTimeout:
+            pass
+    # Only the combination is slow (or still is): clean this caption with plain keywords only
+    logger.warning(f"⚠️ Cleaning caption for chat {chat_id} without its regex keywords")
+    return _run_clean(text, ruleset.without_regex(), chat_id, user_id, entities, has_spoiler, chat_title)
+
+
+def _run_clean(
+    text: str,
+    ruleset: RuleSet,
+    chat_id: str,
+    user_id: int = 0,
+    entities: List[MessageEntity] = None,
+    has_spoiler: bool = False,
+    chat_title: str = "Unknown",
+    timings: Optional[Dict[str, float]] = None,
+    verdict_cache: Optional[LineVerdictCache] = line_cache,
+) -> str:
+    # Live cleaning (and each regex worker process) shares its process's line_cache; clean() passes its own or none
+    return ruleset.pipeline.run(text, entities, chat_id, user_id, chat_title, timings, verdict_cache)
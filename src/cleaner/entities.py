@@ -0,0 +1,113 @@
+"""
+Span removal on captions with Telegram entities.
+
+Telegram addresses entities in UTF-16 code units while Python indexes code points; Utf16Index converts
+between the two. remove_spans deletes any set of ranges in one traversal and re-bases the surviving entities.
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Optional, Sequence, Tuple
+from telegram import MessageEntity
+
+# Characters outside the BMP take two UTF-16 code units (surrogate pair)
+_ASTRAL_RE = re.compile("[\U00010000-\U0010FFFF]")
+
+
+class Utf16Index:
+    """Converts between Telegram UTF-16 offsets and str indices of one text."""
+
+    def __init__(self, text: str):
+        self.length = len(text)
+        self._astral = [m.start() for m in _ASTRAL_RE.finditer(text)]
+        # UTF-16 offset at which the k-th astral character starts
+        self._astral_u16 = [idx + k for k, idx in enumerate(self._astral)]
+
+    def to_index(self, offset: int) -> int:
+        return max(0, min(self.length, offset - bisect_left(self._astral_u16, offset)))
+
+    def to_utf16(self, index: int) -> int:
+        return index + bisect_left(self._astral, index)
+
+
+def utf16_len(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+def merge_spans(spans: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sorts [start, end) spans and joins overlapping or touching ones; empty spans are dropped."""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(s for s in spans if s[1] > s[0]):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _with_range(ent, offset: int, length: int) -> MessageEntity:
+    return MessageEntity(
+        type=getattr(ent, "type", None),
+        offset=offset,
+        length=length,
+        url=getattr(ent, "url", None),
+        user=getattr(ent, "user", None),
+        language=getattr(ent, "language", None),
+        custom_emoji_id=getattr(ent, "custom_emoji_id", None),
+    )
+
+
+def entities_after(entities: Optional[Sequence[MessageEntity]], start: int) -> Optional[List[MessageEntity]]:
+    """
+    Entities of the text that begins start UTF-16 units into the original one: entities starting earlier are
+    dropped and the rest re-based onto it.
+    """
+    if not entities:
+        return None
+    return [_with_range(e, e.offset - start, e.length) for e in entities if e.offset >= start] or None
+
+
+def remove_spans(
+    text: str, spans: Iterable[Tuple[int, int]], entities: Optional[Sequence] = None
+) -> Tuple[str, List[MessageEntity]]:
+    """
+    Deletes the given [start, end) str-index spans from text in one pass.
+    Returns the new text and the entities re-based onto it; entities shrink by any removed part and vanish when empty.
+    """
+    merged = merge_spans(spans)
+    if not merged:
+        return text, [_with_range(e, e.offset, e.length) for e in entities or ()]
+
+    pieces = []
+    pos = 0
+    for start, end in merged:
+        pieces.append(text[pos:start])
+        pos = end
+    pieces.append(text[pos:])
+    out = "".join(pieces)
+    if not entities:
+        return out, []
+
+    starts = [s for s, _ in merged]
+    removed = [0]
+    for start, end in merged:
+        removed.append(removed[-1] + end - start)
+
+    def shift(idx: int) -> int:
+        k = bisect_right(starts, idx) - 1
+        if k < 0:
+            return idx
+        start, end = merged[k]
+        # Positions inside a removed span collapse onto its start
+        return start - removed[k] if idx < end else idx - removed[k + 1]
+
+    src, dst = Utf16Index(text), Utf16Index(out)
+    rebased = []
+    for ent in entities:
+        begin = shift(src.to_index(ent.offset))
+        finish = shift(src.to_index(ent.offset + ent.length))
+        if finish > begin:
+            offset = dst.to_utf16(begin)
+            rebased.append(_with_range(ent, offset, dst.to_utf16(finish) - offset))
+    return out, rebased
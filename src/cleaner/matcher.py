@@ -0,0 +1,114 @@
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Below this many keywords a plain substring loop (C-level `in`) beats walking the automaton
+_SCAN_THRESHOLD = 8
+
+
+class KeywordMatcher:
+    """
+    Case-insensitive multi-keyword matcher for plain (non-regex) keywords.
+    Small sets use substring checks; larger sets use an Aho–Corasick automaton so each text is scanned once.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self.words: Tuple[str, ...] = tuple(dict.fromkeys(w.lower() for w in words if w))
+        self._goto: List[Dict[str, int]] = []
+        self._fail: List[int] = []
+        self._out: List[int] = []
+        if len(self.words) > _SCAN_THRESHOLD:
+            self._build()
+
+    def __bool__(self) -> bool:
+        return bool(self.words)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def _build(self):
+        goto: List[Dict[str, int]] = [{}]
+        out: List[int] = [-1]
+        for idx, word in enumerate(self.words):
+            state = 0
+            for ch in word:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(-1)
+                state = nxt
+            if out[state] < 0:
+                out[state] = idx
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0) if goto[f].get(ch, 0) != nxt else 0
+                # Any keyword ending at the fallback state also ends here
+                if out[nxt] < 0:
+                    out[nxt] = out[fail[nxt]]
+
+        self._goto, self._fail, self._out = goto, fail, out
+
+    def search(self, text: str) -> Optional[str]:
+        """Returns the first keyword found in text (lower-cased), or None."""
+        if not text or not self.words:
+            return None
+        lowered = text.lower()
+        if not self._goto:
+            for word in self.words:
+                if word in lowered:
+                    return word
+            return None
+
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in lowered:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state] >= 0:
+                return self.words[out[state]]
+        return None
+
+    def __contains__(self, text: str) -> bool:
+        return self.search(text) is not None
+
+
+@lru_cache(maxsize=128)
+def matcher_for(words: Tuple[str, ...]) -> KeywordMatcher:
+    """Shared matcher for an ad-hoc keyword tuple (callers without a RuleSet)."""
+    return KeywordMatcher(words)
+
+
+@lru_cache(maxsize=128)
+def keyword_predicate(keywords: Tuple[Tuple[str, bool], ...]) -> Callable[[str], bool]:
+    """
+    Compiled "does text contain any keyword" check for an ad-hoc (word, is_regex) tuple.
+    Invalid regexes are skipped, as the uncompiled per-call re.search used to do.
+    """
+    plain = KeywordMatcher(w for w, is_regex in keywords if not is_regex)
+    patterns = []
+    for word, is_regex in keywords:
+        if not is_regex:
+            continue
+        try:
+            patterns.append(re.compile(word, re.IGNORECASE))
+        except re.error:
+            continue
+
+    def contains_keyword(text: str) -> bool:
+        if plain.search(text) is not None:
+            return True
+        return any(p.search(text) for p in patterns)
+
+    return contains_keyword
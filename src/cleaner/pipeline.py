@@ -0,0 +1,183 @@
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from telegram import MessageEntity
+from src.cleaner.cache import LineVerdictCache
+from src.cleaner.engine import (
+    _F_URL,
+    _URL_RE,
+    _scan_features,
+    apply_pangu_spacing,
+    is_ad_line,
+    rewrite_caption,
+    strip_hidden_chars,
+)
+from src.cleaner.ruleset import RuleSet
+
+_AD_LINE_RULES = ("strip_ad_lines", "clean_lines", "del_ad_lines", "clean_ad_lines")
+_LINK_ENTITY_TYPES = ("url", "text_link", "mention")
+
+
+class CleanJob:
+    """Per-caption inputs that stages need besides the text being cleaned."""
+
+    __slots__ = ("raw", "entities", "chat_id", "user_id", "chat_title", "line_cache")
+
+    def __init__(
+        self,
+        raw: str,
+        entities: Optional[List[MessageEntity]],
+        chat_id: str,
+        user_id: int = 0,
+        chat_title: str = "Unknown",
+        line_cache: Optional[LineVerdictCache] = None,
+    ):
+        self.raw = raw or ""
+        self.entities = entities
+        self.chat_id = chat_id
+        self.user_id = user_id
+        self.chat_title = chat_title
+        self.line_cache = line_cache
+
+
+# A stage returns the new text, or None to drop the whole caption
+Stage = Callable[[str, CleanJob], Optional[str]]
+
+
+class Pipeline:
+    """
+    Ordered cleaning stages of one rule set, holding only the stages its rules enable.
+    Compiled once per config version (RuleSet.pipeline), so no rule is looked up per caption.
+    """
+
+    def __init__(self, stages: List[Tuple[str, Stage]]):
+        self.stages = tuple(stages)
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        return tuple(name for name, _ in self.stages)
+
+    def run(
+        self,
+        raw: str,
+        entities: Optional[List[MessageEntity]],
+        chat_id: str,
+        user_id: int = 0,
+        chat_title: str = "Unknown",
+        timings: Optional[Dict[str, float]] = None,
+        line_cache: Optional[LineVerdictCache] = None,
+    ) -> str:
+        """
+        Cleans raw; with a timings dict, adds each stage's wall time (seconds) under its name.
+        Ad-line verdicts are memoized in line_cache when one is given.
+        """
+        job = CleanJob(raw, entities, chat_id, user_id, chat_title, line_cache)
+        text = job.raw
+        if timings is None:
+            for _, stage in self.stages:
+                text = stage(text, job)
+                if text is None:
+                    return ""
+            return text.strip()
+
+        for name, stage in self.stages:
+            start = time.perf_counter()
+            text = stage(text, job)
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+            if text is None:
+                return ""
+        return text.strip()
+
+
+def compile_pipeline(ruleset: RuleSet) -> Pipeline:
+    """Translates the rules of ruleset into the stages clean() runs, in order."""
+    rules = ruleset.rule_names
+    footer = ruleset.footer
+    stages: List[Tuple[str, Stage]] = [("hidden_chars", lambda text, job: strip_hidden_chars(job.raw))]
+
+    if "keep_all" in rules:
+        if footer:
+            stages.append(("footer", lambda text, job: f"{text.strip()}\n\n{footer}"))
+        return Pipeline(stages)
+
+    if ruleset.has_rule(*_AD_LINE_RULES):
+        # Directly delete any line containing links, @ symbols, or keywords
+        chat_id, tag = ruleset.chat_id, ruleset.spec_id
+
+        def ad_lines(text: str, job: CleanJob) -> str:
+            # Pattern families whose trigger characters occur nowhere in the caption are skipped on every line
+            features = _scan_features(text)
+
+            def classify(line: str) -> bool:
+                return is_ad_line(line, check_kws=True, ruleset=ruleset, features=features)
+
+            # spec_id covers the config version and keywords, so the plain-only fallback rule set never reuses verdicts
+            lines = text.split("\n")
+            cache = job.line_cache
+            if cache is None:
+                return "\n".join(l for l in lines if not l.strip() or not classify(l))
+            return "\n".join(l for l in lines if not l.strip() or not cache.verdict(chat_id, tag, l, classify))
+
+        stages.append(("ad_lines", ad_lines))
+        if ruleset.replacer:
+            stages.append(("replacements", lambda text, job: ruleset.replacer.apply(text)))
+    else:
+        if "strip_all_if_links" in rules:
+
+            def links_guard(text: str, job: CleanJob) -> Optional[str]:
+                if _scan_features(text, _F_URL) and _URL_RE.search(text):
+                    return None
+                if job.entities and any(getattr(e, "type", None) in _LINK_ENTITY_TYPES for e in job.entities):
+                    return None
+                return text
+
+            stages.append(("strip_all_if_links", links_guard))
+
+        # Links (clean_links, which also drops @mentions) and @mentions go in one entity-aware pass;
+        # entity offsets refer to the raw caption, so this stage starts over from it
+        strip_links = "clean_links" in rules
+        if strip_links or ruleset.has_rule("remove_at_prefix", "remove_at"):
+            stages.append(
+                ("links", lambda text, job: rewrite_caption(job.raw, job.entities, strip_links=strip_links)[0])
+            )
+
+        if ruleset.replacer:
+            stages.append(("replacements", lambda text, job: ruleset.replacer.apply(text)))
+
+        if ruleset.keywords:
+            if "block_keywords" in rules:
+                # 严格屏蔽 (发现关键词删整条)
+                stages.append(("block_keywords", lambda text, job: None if ruleset.find_keyword(text) else text))
+            elif "clean_keywords" in rules:
+                # 温和屏蔽 (仅删含广告关键词的行)
+                stages.append(
+                    (
+                        "clean_keywords",
+                        lambda text, job: "\n".join(l for l in text.split("\n") if not ruleset.find_keyword(l)),
+                    )
+                )
+            else:
+                # 默认词级过滤
+                stages.append(("keywords", lambda text, job: ruleset.remove_keywords(text)))
+
+    stages.append(("trim", lambda text, job: text.strip() or None))
+
+    maxlen = ruleset.maxlen
+    if maxlen is not None:
+        stages.append(("maxlen", lambda text, job: text[:maxlen].strip() if len(text) > maxlen else text))
+
+    if "pangu" in rules:
+        stages.append(("pangu", lambda text, job: apply_pangu_spacing(text)))
+
+    template = ruleset.compiled_template
+    if template:
+
+        def render(text: str, job: CleanJob) -> str:
+            return template.render(text, job.chat_title, job.chat_id, job.user_id) if text else text
+
+        stages.append(("template", render))
+
+    if footer:
+        # maxlen can truncate a caption to whitespace; the footer then stands alone
+        stages.append(("footer", lambda text, job: f"{text.strip()}\n\n{footer}" if text else footer))
+
+    return Pipeline(stages)
@@ -0,0 +1,181 @@
+"""
+Explained cleaning for /preview: per-stage timings and the rule, keyword or builtin pattern behind each removed line,
+for one caption or aggregated over a caption file.
+"""
+
+import asyncio
+import time
+from collections import Counter
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+from telegram import MessageEntity
+from src.cleaner import regex_guard
+from src.cleaner.engine import _AD_LINK_RE, _MENTION_RE, clean, load_snapshot, match_builtin_ad, strip_hidden_chars
+from src.cleaner.ruleset import RuleSet
+
+# Reason reported for a line that was rewritten (replacements, maxlen, pangu, ...) rather than dropped by a filter
+CHANGED = "changed"
+# Captions per regex worker task in preview_bulk_guarded (the deadline scales with it)
+_GUARDED_CHUNK = 100
+
+
+def removal_reason(line: str, ruleset: RuleSet) -> Optional[str]:
+    """Why the ad filters match line: 'link', 'mention', 'builtin:<name>', 'keyword:<word>', or None."""
+    line = line.strip()
+    if not line:
+        return None
+    if _AD_LINK_RE.search(line):
+        return "link"
+    if _MENTION_RE.search(line):
+        return "mention"
+    name = match_builtin_ad(line)
+    if name:
+        return f"builtin:{name}"
+    word = ruleset.matching_keyword(line)
+    if word is not None:
+        return f"keyword:{word}"
+    return None
+
+
+class PreviewResult:
+    """One caption cleaned with timings; removed holds (original line, reason) for every line not kept verbatim."""
+
+    def __init__(self, text: str, cleaned: str, timings: Dict[str, float], removed: List[Tuple[str, str]]):
+        self.text = text
+        self.cleaned = cleaned
+        self.timings = timings
+        self.removed = removed
+
+    @property
+    def blocked(self) -> bool:
+        return bool(self.text.strip()) and not self.cleaned
+
+    @property
+    def altered(self) -> bool:
+        return not self.blocked and self.cleaned != self.text.strip()
+
+
+def preview(
+    text: str,
+    snapshot: RuleSet,
+    entities: Optional[List[MessageEntity]] = None,
+    user_id: int = 0,
+    chat_title: str = "Unknown",
+) -> PreviewResult:
+    """Cleans text like clean() and explains the result."""
+    timings: Dict[str, float] = {}
+    cleaned = clean(text, entities, snapshot, user_id, chat_title, timings=timings)
+
+    kept = {line.strip() for line in cleaned.split("\n")}
+    whole = None
+    # A dropped caption stops at the stage that dropped it; caption-level rules are named instead of every line
+    last_stage = next(reversed(timings), None) if not cleaned else None
+    if last_stage == "strip_all_if_links":
+        whole = "rule:strip_all_if_links"
+    elif last_stage == "block_keywords":
+        whole = f"rule:block_keywords ({snapshot.matching_keyword(text)})"
+
+    removed = []
+    for line in strip_hidden_chars(text).split("\n"):
+        line = line.strip()
+        if not line or line in kept:
+            continue
+        removed.append((line, whole or removal_reason(line, snapshot) or CHANGED))
+    return PreviewResult(text, cleaned, timings, removed)
+
+
+class BulkPreview:
+    """Aggregate of preview() over many captions."""
+
+    def __init__(self):
+        self.captions = 0
+        self.blocked = 0
+        self.altered = 0
+        self.elapsed = 0.0
+        self.timings: Dict[str, float] = {}
+        self.reasons: Counter = Counter()
+
+    def add(self, result: PreviewResult):
+        self.captions += 1
+        self.blocked += result.blocked
+        self.altered += result.altered
+        for name, seconds in result.timings.items():
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+        self.reasons.update(reason for _, reason in result.removed)
+
+    def merge(self, other: "BulkPreview"):
+        """Adds the counts of other (elapsed is left to the caller, which sees the wall time)."""
+        self.captions += other.captions
+        self.blocked += other.blocked
+        self.altered += other.altered
+        for name, seconds in other.timings.items():
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+        self.reasons.update(other.reasons)
+
+    @property
+    def unchanged(self) -> int:
+        return self.captions - self.blocked - self.altered
+
+
+def preview_bulk(captions: Iterable[str], snapshot: RuleSet, chat_title: str = "Unknown") -> BulkPreview:
+    """Previews every caption with the same snapshot and aggregates counts, timings and removal reasons."""
+    bulk = BulkPreview()
+    start = time.perf_counter()
+    for caption in captions:
+        bulk.add(preview(caption, snapshot, chat_title=chat_title))
+    bulk.elapsed = time.perf_counter() - start
+    return bulk
+
+
+async def preview_guarded(
+    text: str,
+    snapshot: RuleSet,
+    entities: Optional[List[MessageEntity]] = None,
+    user_id: int = 0,
+    chat_title: str = "Unknown",
+) -> PreviewResult:
+    """
+    preview() for the event loop. Regex keywords run in the guarded worker pool like clean_caption: patterns that
+    overrun the deadline are quarantined and the caption is explained without them.
+    """
+    return (await _preview_guarded(text, snapshot, entities, user_id, chat_title))[0]
+
+
+async def _preview_guarded(text, snapshot: RuleSet, entities, user_id, chat_title) -> Tuple[PreviewResult, RuleSet]:
+    # Returns the snapshot actually used, which drops the patterns quarantined on the way
+    while snapshot.regex_keywords and regex_guard.guard.enabled:
+        try:
+            return await regex_guard.run_preview(text, snapshot, entities, user_id, chat_title), snapshot
+        except regex_guard.RegexTimeout:
+            if not await regex_guard.quarantine_slow_patterns(snapshot, text):
+                # Only the combination is slow: explain this caption with plain keywords only
+                return preview(text, snapshot.without_regex(), entities, user_id, chat_title), snapshot
+            snapshot = await load_snapshot(snapshot.chat_id)
+    return preview(text, snapshot, entities, user_id, chat_title), snapshot
+
+
+async def preview_bulk_guarded(captions: Iterable[str], snapshot: RuleSet, chat_title: str = "Unknown") -> BulkPreview:
+    """
+    preview_bulk() for the event loop. Without regex keywords it runs in a thread; with them, chunks of captions run
+    in the guarded worker pool and a chunk that overruns is previewed caption by caption through preview_guarded.
+    """
+    if not snapshot.regex_keywords or not regex_guard.guard.enabled:
+        return await asyncio.to_thread(preview_bulk, captions, snapshot, chat_title)
+
+    bulk = BulkPreview()
+    start = time.perf_counter()
+    captions = iter(captions)
+    while chunk := list(islice(captions, _GUARDED_CHUNK)):
+        if not snapshot.regex_keywords:
+            bulk.merge(await asyncio.to_thread(preview_bulk, chunk, snapshot, chat_title))
+            continue
+        try:
+            bulk.merge(await regex_guard.run_preview_bulk(chunk, snapshot, chat_title))
+            continue
+        except regex_guard.RegexTimeout:
+            pass
+        for caption in chunk:
+            result, snapshot = await _preview_guarded(caption, snapshot, None, 0, chat_title)
+            bulk.add(result)
+    bulk.elapsed = time.perf_counter() - start
+    return bulk
@@ -0,0 +1,141 @@
+"""
+Admission checks for regex keywords: a static scan for nested quantifiers and a measured cost
+against the sample caption corpus, run in the regex worker pool so a pathological pattern cannot block the loop.
+"""
+
+import re
+import time
+import logging
+from typing import List, Optional
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse
+
+from src.bot.core import config
+from src.cleaner.corpus import load_captions
+from src.cleaner.regex_guard import RegexTimeout, guard
+
+logger = logging.getLogger(__name__)
+
+_REPEATS = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT)
+
+# Inputs that make backtracking-prone patterns show their worst case
+_STRESS_SAMPLES = [
+    "a" * 48 + "!",
+    "1" * 48 + "x",
+    " " * 48 + "x",
+    "广告" * 24 + "!",
+    "点击" + "评论区" * 16 + "\n",
+]
+
+_samples: Optional[List[str]] = None
+
+
+def _sample_captions() -> List[str]:
+    global _samples
+    if _samples is None:
+        _samples = load_captions() + _STRESS_SAMPLES
+    return _samples
+
+
+def _has_nested_repeat(items, in_repeat: bool) -> bool:
+    for op, av in items:
+        if op in _REPEATS:
+            _, hi, body = av
+            repeats = hi > 1
+            if repeats and in_repeat:
+                return True
+            if _has_nested_repeat(body, in_repeat or repeats):
+                return True
+        elif op is sre_parse.SUBPATTERN:
+            if _has_nested_repeat(av[-1], in_repeat):
+                return True
+        elif op is sre_parse.BRANCH:
+            if any(_has_nested_repeat(branch, in_repeat) for branch in av[1]):
+                return True
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            if _has_nested_repeat(av[1], in_repeat):
+                return True
+        elif op is sre_parse.GROUPREF_EXISTS:
+            if any(branch and _has_nested_repeat(branch, in_repeat) for branch in av[1:]):
+                return True
+        # Atomic groups and possessive repeats never backtrack into their body
+    return False
+
+
+def has_nested_quantifier(pattern: str) -> bool:
+    """True if a repeated sub-pattern itself contains a repeat, e.g. (a+)+ or (\\w+\\s?)*."""
+    return _has_nested_repeat(sre_parse.parse(pattern, re.IGNORECASE), False)
+
+
+def _measure_cost_us(pattern: str, samples: List[str]) -> float:
+    """Mean µs per sample for what the cleaner does with a keyword: search, removal and a line-by-line scan."""
+    pat = re.compile(pattern, re.IGNORECASE)
+    start = time.perf_counter()
+    for text in samples:
+        pat.search(text)
+        pat.sub("", text)
+        for line in text.split("\n"):
+            pat.search(line)
+    return (time.perf_counter() - start) / len(samples) * 1e6
+
+
+class RegexAudit:
+    """Outcome of admitting one regex keyword."""
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.error: Optional[str] = None
+        self.nested = False
+        self.timed_out = False
+        self.cost_us: Optional[float] = None
+
+    @property
+    def rejected(self) -> bool:
+        return bool(
+            self.error
+            or self.nested
+            or self.timed_out
+            or (self.cost_us is not None and self.cost_us > config.REGEX_COST_REJECT_US)
+        )
+
+    @property
+    def warned(self) -> bool:
+        return not self.rejected and self.cost_us is not None and self.cost_us > config.REGEX_COST_WARN_US
+
+    def describe(self) -> str:
+        if self.error:
+            return f"正则语法错误: {self.error}"
+        if self.nested:
+            return "含嵌套量词 (如 `(a+)+`)，存在灾难性回溯风险，请改写"
+        if self.timed_out:
+            return f"样本测试超过 {guard.timeout_ms}ms，已拒绝"
+        if self.cost_us is None:
+            return "未测量耗时"
+        limit = config.REGEX_COST_REJECT_US if self.rejected else config.REGEX_COST_WARN_US
+        return f"耗时 {self.cost_us:.1f}µs/条 (阈值 {limit:.0f}µs)"
+
+
+async def audit_regex(pattern: str) -> RegexAudit:
+    """Compiles, scans and benchmarks a regex keyword before it is stored."""
+    audit = RegexAudit(pattern)
+    try:
+        re.compile(pattern, re.IGNORECASE)
+    except re.error as e:
+        audit.error = str(e)
+        return audit
+
+    audit.nested = has_nested_quantifier(pattern)
+    if audit.nested:
+        return audit
+
+    # Without the worker pool a pathological pattern would run on the event loop, so it is not benchmarked
+    if guard.enabled:
+        try:
+            audit.cost_us = await guard.run(_measure_cost_us, pattern, _sample_captions())
+        except RegexTimeout:
+            audit.timed_out = True
+    logger.info(f"🔍 Regex audit '{pattern}': nested={audit.nested} cost={audit.cost_us} timeout={audit.timed_out}")
+    return audit
@@ -0,0 +1,262 @@
+"""
+Out-of-loop execution of regex keywords.
+
+Captions of chats with regex keywords are cleaned in a process pool under a per-caption deadline.
+A caption that overruns it gets the pool killed and recreated, the slow patterns isolated one by one,
+quarantined (skipped by every RuleSet from then on, persisted in the keywords table) and reported.
+Tasks carry only the rule set's spec_id; a worker that has not cached it asks for the full spec once.
+"""
+
+import re
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from src.bot.core import config
+from src.bot.data.repositories import ChatRepository
+from src.cleaner.cache import line_cache
+
+logger = logging.getLogger(__name__)
+
+# Receives (chat_id, pattern, timeout_ms); registered by the application to forward reports to log_event
+QuarantineReporter = Callable[[str, str, int], Awaitable[None]]
+
+_quarantined: Set[str] = set()
+_reporter: Optional[QuarantineReporter] = None
+
+
+class RegexTimeout(Exception):
+    """A task in the regex pool overran its deadline (the pool has been restarted)."""
+
+
+class UnknownRuleset(Exception):
+    """The worker has no cached rule set for the spec_id it was sent; the task is resent with the spec."""
+
+
+def is_quarantined(pattern: str) -> bool:
+    return pattern in _quarantined
+
+
+def quarantined_patterns() -> List[str]:
+    return sorted(_quarantined)
+
+
+def set_quarantine_reporter(reporter: Optional[QuarantineReporter]):
+    global _reporter
+    _reporter = reporter
+
+
+async def load_quarantine():
+    """Restores the quarantines persisted by earlier runs; call before the first rule set is built."""
+    _quarantined.update(await ChatRepository.get_quarantined_keywords())
+
+
+async def quarantine(chat_id: str, pattern: str):
+    """Stops every chat from evaluating pattern, persists that and reports it."""
+    _quarantined.add(pattern)
+    # Every compiled rule set and cached result that used the pattern is stale now
+    ChatRepository.bump_config_version()
+    try:
+        # Deleting the keyword (/delkw) drops the flag, lifting the quarantine on the next start
+        await ChatRepository.quarantine_keyword(pattern)
+    except Exception as e:
+        logger.error(f"Failed to persist quarantined regex: {e}")
+    logger.warning(f"⛔ Regex keyword quarantined (chat {chat_id}, budget {guard.timeout_ms}ms): {pattern}")
+    if _reporter is not None:
+        try:
+            await _reporter(str(chat_id), pattern, guard.timeout_ms)
+        except Exception as e:
+            logger.error(f"Failed to report quarantined regex: {e}")
+
+
+# --- Worker process side ---
+
+_worker_rulesets: Dict[bytes, object] = {}
+
+
+def _worker_ping() -> bool:
+    # Importing the engine here moves its start-up cost out of the first caption's budget
+    import src.cleaner.engine  # noqa: F401
+
+    return True
+
+
+def _worker_ruleset(spec_id: bytes, spec: Optional[tuple]):
+    from src.cleaner.ruleset import RuleSet
+
+    ruleset = _worker_rulesets.get(spec_id)
+    if ruleset is None:
+        if spec is None:
+            raise UnknownRuleset()
+        if len(_worker_rulesets) >= 256:
+            _worker_rulesets.clear()
+        ruleset = _worker_rulesets[spec_id] = RuleSet(*spec)
+    return ruleset
+
+
+def _worker_clean(spec_id: bytes, spec: Optional[tuple], args: tuple) -> Tuple[str, int, int]:
+    """Returns the cleaned caption and the hits and misses it made in this process's line_cache."""
+    from src.cleaner.engine import _run_clean
+
+    hits, misses = line_cache.hits, line_cache.misses
+    cleaned = _run_clean(args[0], _worker_ruleset(spec_id, spec), *args[1:])
+    return cleaned, line_cache.hits - hits, line_cache.misses - misses
+
+
+def _worker_preview(spec_id: bytes, spec: Optional[tuple], args: tuple):
+    from src.cleaner.preview import preview
+
+    return preview(args[0], _worker_ruleset(spec_id, spec), *args[1:])
+
+
+def _worker_preview_bulk(spec_id: bytes, spec: Optional[tuple], captions: list, chat_title: str):
+    from src.cleaner.preview import preview_bulk
+
+    return preview_bulk(captions, _worker_ruleset(spec_id, spec), chat_title)
+
+
+def _worker_probe(pattern: str, text: str) -> bool:
+    """Runs pattern the ways the cleaner does: whole-text search and removal, then line by line."""
+    pat = re.compile(pattern, re.IGNORECASE)
+    pat.search(text)
+    pat.sub("", text)
+    for line in text.split("\n"):
+        pat.search(line)
+    return True
+
+
+# --- Event loop side ---
+
+
+def _kill_pool(pool: ProcessPoolExecutor):
+    terminate = getattr(pool, "terminate_workers", None)  # Python 3.14+
+    if terminate is not None:
+        terminate()
+        return
+    for proc in list((getattr(pool, "_processes", None) or {}).values()):
+        proc.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+class RegexGuard:
+    """Process pool with a deadline per task; overrunning tasks are killed together with the pool."""
+
+    def __init__(self, workers: int, timeout_ms: int):
+        self.workers = max(0, workers)
+        self.timeout_ms = max(0, timeout_ms)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock: Optional[asyncio.Lock] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.timeouts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0 and self.timeout_ms > 0
+
+    async def start(self):
+        """Spawns and warms up the workers (otherwise done by the first task)."""
+        if self.enabled:
+            await self._ensure_pool()
+
+    async def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self._pool_lock is None:
+            self._pool_lock = asyncio.Lock()
+            # At most one task per worker in flight, so queueing never counts against a deadline
+            self._slots = asyncio.Semaphore(self.workers)
+        async with self._pool_lock:
+            if self._pool is None:
+                pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+                loop = asyncio.get_running_loop()
+                await asyncio.gather(*(loop.run_in_executor(pool, _worker_ping) for _ in range(self.workers)))
+                self._pool = pool
+            return self._pool
+
+    async def run(self, fn, *args, timeout_ms: Optional[int] = None):
+        """
+        Runs fn(*args) in the pool; raises RegexTimeout (after restarting the pool) past the deadline.
+        timeout_ms overrides the per-caption budget for tasks covering several captions.
+        """
+        timeout = (timeout_ms or self.timeout_ms) / 1000
+        await self._ensure_pool()
+        for attempt in (1, 2):
+            async with self._slots:
+                pool = await self._ensure_pool()
+                future = asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+                try:
+                    return await asyncio.wait_for(future, timeout)
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    self._discard(pool)
+                    raise RegexTimeout()
+                except BrokenProcessPool:
+                    # Killed because another task overran; run once more on the fresh pool
+                    self._discard(pool)
+                    if attempt == 2:
+                        raise
+
+    def _discard(self, pool: ProcessPoolExecutor):
+        if self._pool is pool:
+            self._pool = None
+        _kill_pool(pool)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+guard = RegexGuard(config.REGEX_WORKERS, config.REGEX_TIMEOUT_MS)
+
+
+def _plain_entities(entities) -> Optional[list]:
+    if not entities:
+        return None
+    return [
+        SimpleNamespace(type=getattr(e, "type", None), offset=getattr(e, "offset", 0), length=getattr(e, "length", 0))
+        for e in entities
+    ]
+
+
+async def _run_with_ruleset(fn, ruleset, *args, **kwargs):
+    # Most tasks hit the worker's cache, so the spec (keywords, replacements, ...) is only pickled on a miss
+    try:
+        return await guard.run(fn, ruleset.spec_id, None, *args, **kwargs)
+    except UnknownRuleset:
+        return await guard.run(fn, ruleset.spec_id, ruleset.spec, *args, **kwargs)
+
+
+async def run_clean(text: str, ruleset, chat_id: str, user_id, entities, has_spoiler, chat_title) -> str:
+    """Cleans one caption with ruleset in the pool; raises RegexTimeout past the deadline."""
+    args = (text, chat_id, user_id, _plain_entities(entities), has_spoiler, chat_title)
+    cleaned, hits, misses = await _run_with_ruleset(_worker_clean, ruleset, args)
+    line_cache.add_worker_counts(hits, misses)
+    return cleaned
+
+
+async def run_preview(text: str, ruleset, entities, user_id, chat_title):
+    """preview() of one caption in the pool; raises RegexTimeout past the deadline."""
+    args = (text, _plain_entities(entities), user_id, chat_title)
+    return await _run_with_ruleset(_worker_preview, ruleset, args)
+
+
+async def run_preview_bulk(captions: List[str], ruleset, chat_title):
+    """preview_bulk() of a chunk of captions in the pool, with the per-caption budget scaled by the chunk size."""
+    return await _run_with_ruleset(
+        _worker_preview_bulk, ruleset, captions, chat_title, timeout_ms=guard.timeout_ms * len(captions)
+    )
+
+
+async def quarantine_slow_patterns(ruleset, text: str) -> List[str]:
+    """Probes each regex keyword of ruleset against text alone and quarantines those that overrun."""
+    slow = []
+    for word, _ in ruleset.regex_keywords:
+        try:
+            await guard.run(_worker_probe, word, text)
+        except RegexTimeout:
+            slow.append(word)
+            await quarantine(ruleset.chat_id, word)
+    return slow
@@ -0,0 +1,41 @@
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+_END = ""  # Trie key marking that a complete word ends at this node
+
+
+def _trie_pattern(node: dict) -> str:
+    alternatives = [re.escape(ch) + _trie_pattern(child) for ch, child in node.items() if ch != _END]
+    if not alternatives:
+        return ""
+    body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+    # A word ending here makes the longer continuations optional; the greedy "?" tries them first
+    return f"(?:{body})?" if _END in node else body
+
+
+class Replacer:
+    """
+    Applies every /addreplace rule of a chat in one scan with leftmost-longest semantics.
+    The words are folded into a trie, emitted as a single regex, so replaced text is never rewritten again.
+    """
+
+    def __init__(self, replacements: Iterable[Tuple[str, str]]):
+        self.table: Dict[str, str] = {old: new for old, new in replacements if old}
+        self.pattern: Optional[re.Pattern] = None
+        if self.table:
+            root: dict = {}
+            for old in self.table:
+                node = root
+                for ch in old:
+                    node = node.setdefault(ch, {})
+                node[_END] = {}
+            self.pattern = re.compile(_trie_pattern(root))
+
+    def __bool__(self) -> bool:
+        return self.pattern is not None
+
+    def apply(self, text: str) -> str:
+        if self.pattern is None or not text:
+            return text
+        table = self.table
+        return self.pattern.sub(lambda m: table[m.group(0)], text)
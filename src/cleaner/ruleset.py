@@ -0,0 +1,221 @@
+import re
+import asyncio
+import hashlib
+import logging
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
+from src.bot.data.repositories import ChatRepository
+from src.cleaner.cache import clean_cache, line_cache
+from src.cleaner.matcher import KeywordMatcher
+from src.cleaner.regex_guard import is_quarantined
+from src.cleaner.replacer import Replacer
+from src.cleaner.template import compile_template
+
+logger = logging.getLogger(__name__)
+
+_BACKREF_RE = re.compile(r"\\[1-9]|\(\?P=")
+
+# Rule names understood by the cleaning engine (besides maxlen:N)
+KNOWN_RULES = frozenset(
+    {
+        "keep_all",
+        "strip_ad_lines",
+        "clean_lines",
+        "del_ad_lines",
+        "clean_ad_lines",
+        "strip_all_if_links",
+        "clean_links",
+        "remove_at_prefix",
+        "remove_at",
+        "block_keywords",
+        "clean_keywords",
+        "pangu",
+    }
+)
+
+
+def validate_rule(rule: str) -> Optional[str]:
+    """Returns why a rule would be ignored by the engine, or None if it is valid."""
+    if rule.startswith("maxlen:"):
+        value = rule.split(":", 1)[1]
+        if not value.isdigit() or int(value) <= 0:
+            return f"`{rule}` 格式错误，应为 `maxlen:正整数` (如 `maxlen:100`)"
+        return None
+    if rule not in KNOWN_RULES:
+        return f"未知规则 `{rule}`，可用规则: " + ", ".join(f"`{r}`" for r in sorted(KNOWN_RULES)) + ", `maxlen:N`"
+    return None
+
+
+class RuleSet:
+    """
+    Compiled cleaning configuration of a single chat.
+    Built once per config version and reused until ChatRepository reports a write to that chat.
+    Immutable once built, and pickled as its constructor arguments, so it can be shared with thread and process pools.
+    """
+
+    def __init__(
+        self,
+        chat_id: str,
+        version: Tuple[int, int],
+        rules: List[str],
+        keywords: List[Tuple[str, bool]],
+        replacements: List[Tuple[str, str]],
+        footer: Optional[str] = None,
+        template: Optional[str] = None,
+    ):
+        self.chat_id = str(chat_id)
+        self.version = version
+        self.rules = tuple(rules)
+        self.rule_names = frozenset(rules)
+        # Quarantined regex keywords (too slow to evaluate) are skipped
+        self.keywords = tuple((w, bool(r)) for w, r in keywords if not (r and is_quarantined(w)))
+        self.replacements = tuple((o, n) for o, n in replacements)
+        # All /addreplace rules in one leftmost-longest pass, so rule order no longer matters
+        self.replacer = Replacer(self.replacements)
+        self.footer = footer
+        self.template = template
+        # Templates stored before placeholder validation keep unknown placeholders as literal text
+        self.compiled_template = compile_template(template, strict=False) if template else None
+        # Chats with equal fingerprints clean any caption identically; {cid} makes the chat itself part of it
+        self.fingerprint = (
+            self.rules,
+            self.keywords,
+            self.replacements,
+            footer,
+            template,
+            self.chat_id if self.compiled_template and self.compiled_template.uses("cid") else None,
+        )
+
+        self.maxlen: Optional[int] = None
+        for rule in self.rules:
+            if rule.startswith("maxlen:"):
+                try:
+                    limit = int(rule.split(":")[1])
+                except ValueError:
+                    continue
+                self.maxlen = limit if self.maxlen is None else min(self.maxlen, limit)
+
+        self.keyword_matcher = KeywordMatcher(w for w, r in self.keywords if not r)
+        self.regex_keywords: List[Tuple[str, re.Pattern]] = []
+        # Keyword patterns in storage order, used by the default word-level filter
+        self._removal_patterns: List[re.Pattern] = []
+        for word, is_regex in self.keywords:
+            if not word:
+                continue
+            if not is_regex:
+                self._removal_patterns.append(re.compile(re.escape(word), re.IGNORECASE))
+                continue
+            try:
+                pat = re.compile(word, re.IGNORECASE)
+            except re.error as e:
+                logger.warning(f"Invalid regex/keyword '{word}' in chat {self.chat_id}: {e}")
+                continue
+            self.regex_keywords.append((word, pat))
+            self._removal_patterns.append(pat)
+
+        # One alternation over every regex keyword; backreferences would be renumbered, so those stay separate
+        fusable = [w for w, _ in self.regex_keywords if not _BACKREF_RE.search(w)]
+        self._regex_rest = [p for w, p in self.regex_keywords if _BACKREF_RE.search(w)]
+        self.keyword_alternation: Optional[re.Pattern] = None
+        if fusable:
+            try:
+                self.keyword_alternation = re.compile("|".join(f"(?:{w})" for w in fusable), re.IGNORECASE)
+            except re.error:
+                self._regex_rest = [p for _, p in self.regex_keywords]
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"RuleSet is immutable (cannot set {name!r})")
+        super().__setattr__(name, value)
+
+    def __reduce__(self):
+        return RuleSet, self.spec
+
+    @cached_property
+    def spec(self) -> tuple:
+        """Constructor arguments, enough to rebuild this rule set in a worker process."""
+        return (self.chat_id, self.version, self.rules, self.keywords, self.replacements, self.footer, self.template)
+
+    @cached_property
+    def spec_id(self) -> bytes:
+        return hashlib.blake2b(repr(self.spec).encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    @cached_property
+    def pipeline(self):
+        """Cleaning stages enabled by these rules (see src.cleaner.pipeline), compiled on first use."""
+        from src.cleaner.pipeline import compile_pipeline
+
+        return compile_pipeline(self)
+
+    def without_regex(self) -> "RuleSet":
+        """Copy of this rule set with every regex keyword dropped."""
+        plain = [(w, r) for w, r in self.keywords if not r]
+        return RuleSet(self.chat_id, self.version, self.rules, plain, self.replacements, self.footer, self.template)
+
+    def has_rule(self, *names: str) -> bool:
+        return any(n in self.rule_names for n in names)
+
+    def find_keyword(self, text: str) -> bool:
+        """Returns True if any plain or regex keyword occurs in text."""
+        if not text:
+            return False
+        if self.keyword_matcher.search(text) is not None:
+            return True
+        if self.keyword_alternation is not None and self.keyword_alternation.search(text):
+            return True
+        for pat in self._regex_rest:
+            if pat.search(text):
+                return True
+        return False
+
+    def matching_keyword(self, text: str) -> Optional[str]:
+        """The keyword find_keyword would report for text (plain keywords lower-cased), or None."""
+        if not text:
+            return None
+        word = self.keyword_matcher.search(text)
+        if word is not None:
+            return word
+        for word, pat in self.regex_keywords:
+            if pat.search(text):
+                return word
+        return None
+
+    def remove_keywords(self, text: str) -> str:
+        """Deletes every keyword occurrence from text (default word-level filtering)."""
+        for pat in self._removal_patterns:
+            text = pat.sub("", text)
+        return text
+
+
+_rulesets: Dict[str, RuleSet] = {}
+
+
+async def get_ruleset(chat_id: str) -> RuleSet:
+    """Returns the compiled rule set of a chat, rebuilding it only after a config write."""
+    cid = str(chat_id)
+    version = ChatRepository.get_config_version(cid)
+    cached = _rulesets.get(cid)
+    if cached is not None and cached.version == version:
+        return cached
+
+    rules, keywords, replacements, footer, template = await asyncio.gather(
+        ChatRepository.get_chat_rules(cid),
+        ChatRepository.get_keywords(cid),
+        ChatRepository.get_replacements(cid),
+        ChatRepository.get_footer(cid),
+        ChatRepository.get_caption_template(cid),
+    )
+    ruleset = RuleSet(cid, version, rules, keywords, replacements, footer, template)
+    _rulesets[cid] = ruleset
+    return ruleset
+
+
+def invalidate_ruleset(chat_id: Optional[str] = None):
+    """Drops the compiled rule set (and cached results and line verdicts) of a chat, or of every chat."""
+    if chat_id is None:
+        _rulesets.clear()
+    else:
+        _rulesets.pop(str(chat_id), None)
+    clean_cache.clear(chat_id)
+    line_cache.clear(chat_id)
@@ -0,0 +1,67 @@
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Tuple
+
+# Placeholders a caption template may use
+PLACEHOLDERS = ("orig", "title", "cid", "date", "user")
+
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+
+
+class TemplateError(ValueError):
+    """Raised for templates that use unknown placeholders."""
+
+    def __init__(self, unknown: List[str]):
+        super().__init__(f"Unknown placeholder(s): {', '.join(unknown)}")
+        self.unknown = unknown
+
+
+class CompiledTemplate:
+    """A caption template split into literal and placeholder segments; rendering is a single join."""
+
+    def __init__(self, source: str, segments: List[Tuple[bool, str]]):
+        self.source = source
+        self.segments = segments
+        self.placeholders = frozenset(value for is_var, value in segments if is_var)
+
+    def uses(self, name: str) -> bool:
+        return name in self.placeholders
+
+    def render(self, orig: str, title: str, cid: str, user_id: int = 0) -> str:
+        values = {"orig": orig}
+        # Only placeholders present in the template are evaluated
+        if "title" in self.placeholders:
+            values["title"] = title
+        if "cid" in self.placeholders:
+            values["cid"] = str(cid)
+        if "user" in self.placeholders:
+            values["user"] = str(user_id) if user_id else "Unknown"
+        if "date" in self.placeholders:
+            values["date"] = datetime.now().strftime("%Y-%m-%d %H:%M")
+        return "".join(values[value] if is_var else value for is_var, value in self.segments)
+
+
+@lru_cache(maxsize=256)
+def compile_template(source: str, strict: bool = True) -> CompiledTemplate:
+    """
+    Parses a template into segments.
+    Unknown placeholders raise TemplateError, or stay literal text with strict=False (templates saved before validation).
+    """
+    segments: List[Tuple[bool, str]] = []
+    unknown = []
+    pos = 0
+    for m in _PLACEHOLDER_RE.finditer(source):
+        name = m.group(1)
+        if name not in PLACEHOLDERS:
+            unknown.append(m.group(0))
+            continue
+        if m.start() > pos:
+            segments.append((False, source[pos : m.start()]))
+        segments.append((True, name))
+        pos = m.end()
+    if pos < len(source):
+        segments.append((False, source[pos:]))
+    if unknown and strict:
+        raise TemplateError(unknown)
+    return CompiledTemplate(source, segments)
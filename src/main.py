@@ -1,5 +1,6 @@
 import logging
 import sys
+from html import escape
 from pathlib import Path
 
 # Fix: Ensure project root is in sys.path for absolute 'src' imports
@@ -9,6 +10,7 @@ if str(PROJECT_ROOT) not in sys.path:
 
 from telegram.ext import Application, MessageHandler, CommandHandler, CallbackQueryHandler, filters, AIORateLimiter, ContextTypes
 
+from src.bot.core import config
 from src.bot.core.config import BOT_TOKEN, VERSION, UPDATE_NOTES
 from src.bot.core.logger import setup_logging
 from src.bot.data.database import db_manager
@@ -70,6 +72,8 @@ from src.bot.handlers.sys_admin import (
     handle_clear_dlq,
     handle_clear_queue,
     handle_repair_queue,
+    handle_cachestats,
+    handle_dbstats,
 )
 from src.bot.handlers.info import handle_listchats, handle_chatinfo, handle_stats, handle_queue_status, handle_help
 from src.bot.handlers.message import handle_text_message
@@ -77,6 +81,7 @@ from src.bot.handlers.callback import handle_vote_callback
 from src.bot.handlers.extras import handle_edit_caption, send_weekly_report
 
 from src.bot.utils.helpers import log_event
+from src.cleaner import regex_guard
 
 
 async def post_init(application: Application):
@@ -92,12 +97,41 @@ async def post_init(application: Application):
 
     application.job_queue.run_daily(send_weekly_report, time=time(12, 0, 0), days=(6,))
 
+    # Checkpoint the WAL while no writes are coming in, so backlogs do not leave it gigabytes long
+    async def wal_checkpoint(context: ContextTypes.DEFAULT_TYPE):
+        try:
+            await db_manager.idle_checkpoint()
+        except Exception as e:
+            logger.warning(f"⚠️ WAL checkpoint failed: {e}")
+
+    if config.DB_CHECKPOINT_INTERVAL > 0:
+        application.job_queue.run_repeating(
+            wal_checkpoint,
+            interval=config.DB_CHECKPOINT_INTERVAL,
+            first=config.DB_CHECKPOINT_INTERVAL,
+            name="wal_checkpoint",
+        )
+
+    # Regex keywords run in worker processes; slow patterns are quarantined and reported to the log channel
+    async def report_quarantine(chat_id: str, pattern: str, timeout_ms: int):
+        await log_event(
+            application.bot,
+            f"⛔ <b>正则关键词已隔离</b> (超过 {timeout_ms}ms)\n群组: <code>{chat_id}</code>\n"
+            f"规则: <code>{escape(pattern)}</code>\n请使用 /delkw 删除或改写该规则",
+            category="system",
+        )
+
+    regex_guard.set_quarantine_reporter(report_quarantine)
+    await regex_guard.load_quarantine()
+    await regex_guard.guard.start()
+
     logger.info(f"🚀 Bot v{VERSION} initialized with Global Deduplication and Self-Cleaning.")
     await log_event(application.bot, f"Bot started v{VERSION}\n{UPDATE_NOTES}", category="system")
 
 
 async def post_shutdown(application: Application):
     """Graceful shutdown logic."""
+    regex_guard.guard.shutdown()
     await db_manager.close()
 
 
@@ -316,6 +350,8 @@ def main():
     app.add_handler(CommandHandler("clearqueue", handle_clear_queue))
     app.add_handler(CommandHandler("repair_queue", handle_repair_queue))
     app.add_handler(CommandHandler("repair", handle_repair_queue))
+    app.add_handler(CommandHandler("cachestats", handle_cachestats))
+    app.add_handler(CommandHandler("dbstats", handle_dbstats))
 
     # Interaction Handlers
     app.add_handler(CallbackQueryHandler(handle_vote_callback))
@@ -0,0 +1,17 @@
+import asyncio
+import os
+import tempfile
+
+# Keep the suite away from the real data/bot.db
+os.environ.setdefault("DB_FILE", os.path.join(tempfile.mkdtemp(prefix="tgbot-tests-"), "bot.db"))
+# Admin used by the handler tests
+os.environ.setdefault("ADMIN_IDS", "7975947295")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Closes the shared aiosqlite connection and regex worker pool so they do not block interpreter exit."""
+    from src.bot.data.database import db_manager
+    from src.cleaner.regex_guard import guard
+
+    asyncio.run(db_manager.close())
+    guard.shutdown()
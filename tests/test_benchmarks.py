@@ -0,0 +1,21 @@
+import pytest
+from src.benchmarks.suite import MODES, make_keywords, run_suite
+from src.bot.data.repositories import ChatRepository
+
+
+def test_make_keywords_is_deterministic():
+    assert make_keywords(100) == make_keywords(100)
+    assert len({w for w, _ in make_keywords(1000)}) == 1000
+
+
+@pytest.mark.asyncio
+async def test_suite_smoke():
+    get_keywords = ChatRepository.get_keywords
+    report = await run_suite(repeat=1, sizes=[10])
+
+    modes = {r["mode"] for r in report["results"] if r["target"] == "clean_caption"}
+    assert modes == set(MODES)
+    assert all(r["per_sec"] > 0 and r["p99_us"] >= r["p50_us"] for r in report["results"])
+    assert report["corpus"]["version"] and report["corpus"]["digest"]
+    # The repository stubs are removed again
+    assert ChatRepository.get_keywords is get_keywords
@@ -1,12 +1,59 @@
 import asyncio
+import pickle
 import pytest
 from unittest.mock import AsyncMock, patch
-from src.cleaner.engine import clean_caption, restore_all_tags, strip_hidden_chars
+from telegram import MessageEntity
+from src.bot.data.repositories import ChatRepository
+from src.cleaner import engine, regex_guard
+from src.cleaner.cache import LineVerdictCache, clean_cache, line_cache
+from src.cleaner.engine import (
+    clean,
+    clean_caption,
+    clean_caption_for_targets,
+    is_ad_line,
+    match_builtin_ad,
+    restore_all_tags,
+    restore_tags_for_targets,
+    rewrite_caption,
+    strip_hidden_chars,
+    HIDDEN_CHARS,
+)
+from src.cleaner.entities import Utf16Index, remove_spans
+from src.cleaner.matcher import KeywordMatcher
+from src.cleaner.regex_audit import audit_regex, has_nested_quantifier
+from src.cleaner.replacer import Replacer
+from src.cleaner.ruleset import RuleSet, invalidate_ruleset, validate_rule
+from src.cleaner.template import TemplateError, compile_template
+
+
+@pytest.fixture(autouse=True)
+def fresh_rulesets():
+    """Each test patches the repository differently for the same chat id."""
+    invalidate_ruleset()
+    clean_cache.reset_stats()
+    line_cache.reset_stats()
+    yield
+    invalidate_ruleset()
+
 
 def test_strip_hidden_chars():
     text = "Hello\u200bWorld\uFEFF!"
     assert strip_hidden_chars(text) == "HelloWorld!"
 
+def test_strip_hidden_chars_full_coverage():
+    # Soft hyphen, variation selector, tag character, Mongolian FVS, Hangul filler
+    text = "a\u00adb\ufe0fc\U000E0041d\u180be\u3164f"
+    assert strip_hidden_chars(text) == "abcdef"
+    assert strip_hidden_chars("plain ascii") == "plain ascii"
+    assert strip_hidden_chars("") == ""
+
+def test_strip_hidden_chars_long_caption_covers_every_char():
+    # Long captions take the str.replace + probe path instead of the regex; it must miss nothing
+    body = "第08集　高清 👉 https://t.me/x #影视\n" * 10
+    for char in HIDDEN_CHARS:
+        assert strip_hidden_chars(body + char + body) == body + body, hex(ord(char))
+    assert strip_hidden_chars(body) == body
+
 def test_restore_all_tags():
     original = "Hello #world and #python"
     cleaned = "Hello"
@@ -203,6 +250,448 @@ async def test_clean_caption_comment_leads_ads():
         assert result == expected
 
 
+@pytest.mark.asyncio
+async def test_ruleset_cached_until_config_write():
+    rules_mock = AsyncMock(return_value=["block_keywords"])
+    with patch("src.bot.data.repositories.ChatRepository.get_chat_rules", rules_mock), \
+         patch("src.bot.data.repositories.ChatRepository.get_replacements", AsyncMock(return_value=[])), \
+         patch("src.bot.data.repositories.ChatRepository.get_keywords", AsyncMock(return_value=[("spam", False)])), \
+         patch("src.bot.data.repositories.ChatRepository.get_footer", AsyncMock(return_value=None)), \
+         patch("src.bot.data.repositories.ChatRepository.get_caption_template", AsyncMock(return_value=None)):
+
+        assert await clean_caption("spam here", "-100777") == ""
+        assert await clean_caption("clean text", "-100777") == "clean text"
+        assert rules_mock.await_count == 1
+
+        ChatRepository.bump_config_version("-100777")
+        await clean_caption("clean text", "-100777")
+        assert rules_mock.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_clean_caption_for_targets_groups_identical_rules():
+    footers = {"-1001": "页脚", "-1002": "页脚", "-1003": None}
+    templates = {"-1001": None, "-1002": None, "-1003": "{cid}: {orig}"}
+    with patch("src.bot.data.repositories.ChatRepository.get_chat_rules", AsyncMock(return_value=["clean_links"])), \
+         patch("src.bot.data.repositories.ChatRepository.get_replacements", AsyncMock(return_value=[])), \
+         patch("src.bot.data.repositories.ChatRepository.get_keywords", AsyncMock(return_value=[])), \
+         patch("src.bot.data.repositories.ChatRepository.get_footer", AsyncMock(side_effect=footers.get)), \
+         patch("src.bot.data.repositories.ChatRepository.get_caption_template", AsyncMock(side_effect=templates.get)), \
+         patch.object(engine, "_clean_with_ruleset", wraps=engine._clean_with_ruleset) as clean_mock:
+
+        results = await clean_caption_for_targets("好剧 https://t.me/x", ["-1001", "-1002", "-1003", "-1001"])
+
+        assert results == {"-1001": "好剧\n\n页脚", "-1002": "好剧\n\n页脚", "-1003": "-1003: 好剧"}
+        assert clean_mock.call_count == 2
+        for tid in results:
+            assert results[tid] == await clean_caption("好剧 https://t.me/x", tid)
+
+
+@pytest.mark.asyncio
+async def test_clean_cache_hits_until_config_write():
+    templates = {"-1001": None, "-1002": "{date} {orig}"}
+    with patch("src.bot.data.repositories.ChatRepository.get_chat_rules", AsyncMock(return_value=["clean_links"])), \
+         patch("src.bot.data.repositories.ChatRepository.get_replacements", AsyncMock(return_value=[])), \
+         patch("src.bot.data.repositories.ChatRepository.get_keywords", AsyncMock(return_value=[])), \
+         patch("src.bot.data.repositories.ChatRepository.get_footer", AsyncMock(return_value=None)), \
+         patch("src.bot.data.repositories.ChatRepository.get_caption_template", AsyncMock(side_effect=templates.get)), \
+         patch.object(engine, "_run_clean", wraps=engine._run_clean) as run_mock:
+
+        assert await clean_caption("好剧 https://t.me/x", "-1001") == "好剧"
+        assert await clean_caption("好剧 https://t.me/x", "-1001") == "好剧"
+        assert run_mock.call_count == 1
+        assert clean_cache.stats()["hits"] == 1
+
+        ChatRepository.bump_config_version("-1001")
+        await clean_caption("好剧 https://t.me/x", "-1001")
+        assert run_mock.call_count == 2
+
+        # Templates with {date} are never served from the cache
+        await clean_caption("好剧", "-1002")
+        await clean_caption("好剧", "-1002")
+        assert run_mock.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_slow_regex_keyword_is_quarantined():
+    reports = []
+
+    async def reporter(chat_id, pattern, timeout_ms):
+        reports.append((chat_id, pattern))
+
+    regex_guard.set_quarantine_reporter(reporter)
+    keywords = [(r"(a+)+$", True), (r"代开\w+", True)]
+    try:
+        with patch("src.bot.data.repositories.ChatRepository.get_chat_rules", AsyncMock(return_value=[])), \
+             patch("src.bot.data.repositories.ChatRepository.get_replacements", AsyncMock(return_value=[])), \
+             patch("src.bot.data.repositories.ChatRepository.get_keywords", AsyncMock(return_value=keywords)), \
+             patch("src.bot.data.repositories.ChatRepository.get_footer", AsyncMock(return_value=None)), \
+             patch("src.bot.data.repositories.ChatRepository.get_caption_template", AsyncMock(return_value=None)):
+
+            result = await clean_caption("好剧 代开发票 " + "a" * 40 + "!", "-1009")
+
+            assert result == "好剧  " + "a" * 40 + "!"
+            assert reports == [("-1009", r"(a+)+$")]
+            assert regex_guard.quarantined_patterns() == [r"(a+)+$"]
+            # The remaining regex keyword keeps working after the quarantine
+            assert await clean_caption("代开发票", "-1009") == ""
+    finally:
+        regex_guard.set_quarantine_reporter(None)
+        regex_guard._quarantined.clear()
+
+
+@pytest.mark.asyncio
+async def test_quarantine_survives_restart():
+    pattern = r"(b+)+$"
+    await ChatRepository.add_keyword("-1011", pattern, True)
+    try:
+        await regex_guard.quarantine("-1011", pattern)
+        regex_guard._quarantined.clear()  # as after a restart
+        await regex_guard.load_quarantine()
+        assert regex_guard.is_quarantined(pattern)
+        assert RuleSet("-1011", (0, 0), [], [(pattern, True)], []).keywords == ()
+    finally:
+        regex_guard._quarantined.clear()
+        await ChatRepository.delete_keyword("-1011", pattern)
+    assert await ChatRepository.get_quarantined_keywords() == []
+
+
+def test_regex_worker_needs_the_spec_once():
+    ruleset = RuleSet("-1012", (0, 0), [], [(r"代开\w+", True)], [])
+    regex_guard._worker_rulesets.clear()
+    with pytest.raises(regex_guard.UnknownRuleset):
+        regex_guard._worker_clean(ruleset.spec_id, None, ("代开发票\n好剧", "-1012"))
+    assert regex_guard._worker_clean(ruleset.spec_id, ruleset.spec, ("代开发票\n好剧", "-1012"))[0] == "好剧"
+    assert regex_guard._worker_clean(ruleset.spec_id, None, ("代开发票", "-1012"))[0] == ""
+    regex_guard._worker_rulesets.clear()
+
+
+@pytest.mark.asyncio
+async def test_preview_runs_regex_keywords_under_the_guard():
+    from src.cleaner.preview import preview_bulk_guarded, preview_guarded
+
+    keywords = [(r"(a+)+$", True), (r"代开\w+", True)]
+    slow = "好剧 " + "a" * 40 + "!"
+    try:
+        with patch("src.bot.data.repositories.ChatRepository.get_chat_rules", AsyncMock(return_value=[])), \
+             patch("src.bot.data.repositories.ChatRepository.get_replacements", AsyncMock(return_value=[])), \
+             patch("src.bot.data.repositories.ChatRepository.get_keywords", AsyncMock(return_value=keywords)), \
+             patch("src.bot.data.repositories.ChatRepository.get_footer", AsyncMock(return_value=None)), \
+             patch("src.bot.data.repositories.ChatRepository.get_caption_template", AsyncMock(return_value=None)):
+
+            snapshot = await engine.load_snapshot("-1010")
+            result = await preview_guarded(slow + "\n代开发票", snapshot)
+
+            assert result.cleaned == slow
+            assert result.removed == [("代开发票", r"keyword:代开\w+")]
+            assert regex_guard.quarantined_patterns() == [r"(a+)+$"]
+
+            # The stale snapshot still holds the quarantined pattern: the overrunning chunk falls back per caption
+            bulk = await preview_bulk_guarded([slow, "代开发票", "好剧"], snapshot)
+            assert (bulk.captions, bulk.blocked, bulk.unchanged) == (3, 1, 2)
+            assert bulk.reasons == {r"keyword:代开\w+": 1}
+    finally:
+        regex_guard._quarantined.clear()
+
+
+def test_ruleset_compiles_keywords():
+    rs = RuleSet(
+        "1", (0, 0), ["maxlen:20", "maxlen:10"],
+        [("Spam", False), (r"代开\w+", True), (r"(a)\1", True), ("[bad", True)], [],
+    )
+    assert rs.maxlen == 10
+    assert rs.find_keyword("some SPAM")
+    assert rs.find_keyword("代开会员")
+    assert rs.find_keyword("xaax")
+    assert not rs.find_keyword("[bad")
+    assert rs.remove_keywords("spam 代开会员 ok") == "  ok"
+
+
+def test_keyword_matcher_agrees_with_substring_scan():
+    import random
+
+    rng = random.Random(7)
+    alphabet = "abcAB广告代开"
+    words = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(200)]
+    matcher = KeywordMatcher(words)
+    lowered = [w.lower() for w in words]
+    for _ in range(300):
+        text = "".join(rng.choice(alphabet + " ") for _ in range(rng.randint(0, 30)))
+        expected = any(w in text.lower() for w in lowered)
+        assert (matcher.search(text) is not None) == expected
+        if expected:
+            assert matcher.search(text) in text.lower()
+
+    small = KeywordMatcher(["Spam"])
+    assert small.search("SPAM!") == "spam"
+    assert small.search("ham") is None
+    assert not KeywordMatcher([])
+
+
+def test_match_builtin_ad_reports_pattern_name():
+    assert match_builtin_ad("> 103p4v-评论区看全集") == "comment_section"
+    assert match_builtin_ad("解压码见频道置顶") == "extract_code"
+    assert match_builtin_ad("商务合作请联系") == "private_contact"
+    assert match_builtin_ad("主演：张三 / 李四") is None
+    assert is_ad_line("• 留言区领取全集网盘链接", check_kws=False)
+    assert not is_ad_line("• 留言区领取全集网盘链接", check_links=False, check_mentions=False, check_builtin_ads=False)
+
+
+def test_rewrite_caption_uses_entity_offsets():
+    # "加入" appears twice; only the text_link occurrence goes. 🎬 is two UTF-16 units.
+    text = "🎬 加入 频道\u200b 加入 https://t.me/x @spam 完"
+    entities = [
+        MessageEntity(MessageEntity.TEXT_LINK, 3, 2, url="https://t.me/ad"),
+        MessageEntity(MessageEntity.BOLD, 6, 2),
+        MessageEntity(MessageEntity.URL, 13, 14),
+    ]
+    cleaned, rebased = rewrite_caption(text, entities)
+    assert cleaned == "🎬  频道 加入   完"
+    assert [(e.type, e.offset, e.length) for e in rebased] == [(MessageEntity.BOLD, 4, 2)]
+    assert cleaned[Utf16Index(cleaned).to_index(4):][:2] == "频道"
+
+    md, _ = rewrite_caption("看 [点击加入](https://t.me/c) 吧", strip_links=True)
+    assert md == "看 点击加入 吧"
+    kept, _ = rewrite_caption("@name https://t.me/x", strip_links=False)
+    assert kept == " https://t.me/x"
+
+
+def test_remove_spans_shrinks_overlapping_entities():
+    text, ents = remove_spans("abcdef", [(1, 3)], [MessageEntity(MessageEntity.BOLD, 0, 4)])
+    assert text == "adef"
+    assert (ents[0].offset, ents[0].length) == (0, 2)
+
+
+def test_restore_all_tags_dedupes_and_matches_whole_tags():
+    original = "正文 #影视 #影视 #影视剧 #加微看片 #代开发票"
+    restored = restore_all_tags(original, "正文 #影视剧", [("加微", False), (r"代开\w+", True)])
+    assert restored == "正文 #影视剧 #影视"
+
+    caps = restore_tags_for_targets("正文 #好剧", {"-1": "正文", "-2": "正文", "-3": ""})
+    assert caps == {"-1": "正文 #好剧", "-2": "正文 #好剧", "-3": ""}
+
+
+def test_compile_template():
+    tpl = compile_template("【{title}】{orig}\n— {user}")
+    assert tpl.placeholders == {"title", "orig", "user"}
+    # Values are substituted once, so a caption containing "{title}" stays literal
+    assert tpl.render("正文 {title}", "频道", "-100", 42) == "【频道】正文 {title}\n— 42"
+
+    with patch("src.cleaner.template.datetime") as dt:
+        compile_template("{orig}").render("x", "t", "c")
+        assert not dt.now.called
+
+    with pytest.raises(TemplateError) as exc:
+        compile_template("{orig} {views}")
+    assert exc.value.unknown == ["{views}"]
+    assert compile_template("{orig} {views}", strict=False).render("x", "t", "c") == "x {views}"
+
+
+def test_has_nested_quantifier():
+    assert has_nested_quantifier(r"(a+)+$")
+    assert has_nested_quantifier(r"(?:\w+\s?)*x")
+    assert not has_nested_quantifier(r"代开\w+")
+    assert not has_nested_quantifier(r"(评论区|留言区).*?(看|获取)")
+    assert not has_nested_quantifier(r"(?:ab){2}c+")
+
+
+@pytest.mark.asyncio
+async def test_audit_regex_admission():
+    ok = await audit_regex(r"代开\w+")
+    assert not ok.rejected and ok.cost_us is not None
+
+    assert (await audit_regex(r"(a+)+$")).nested
+    assert (await audit_regex("[bad")).error
+    slow = await audit_regex(r"\w*\w*\w*\w*\w*\w*x")
+    assert slow.rejected and (slow.timed_out or slow.cost_us > 0)
+
+
+def test_validate_rule():
+    assert validate_rule("strip_ad_lines") is None
+    assert validate_rule("maxlen:100") is None
+    assert validate_rule("maxlen:abc")
+    assert validate_rule("maxlen:0")
+    assert validate_rule("strip_ads")
+
+
+def test_replacer_leftmost_longest_single_pass():
+    replacer = Replacer([("ab", "X"), ("abc", "Y"), ("b", "Z"), ("高清", "HD"), ("a.b", "点")])
+    assert replacer.apply("abcab b a.b 高清版") == "YX Z 点 HD版"
+    # Replaced text is never matched again, whatever the rule order
+    assert Replacer([("苹果", "香蕉"), ("香蕉", "橙子")]).apply("苹果 香蕉") == "香蕉 橙子"
+    assert Replacer([("香蕉", "橙子"), ("苹果", "香蕉")]).apply("苹果 香蕉") == "香蕉 橙子"
+    assert not Replacer([("", "x")])
+    assert Replacer([]).apply("text") == "text"
+
+
+def test_line_verdict_cache_is_per_chat_and_tagged():
+    cache = LineVerdictCache(2)
+    calls = []
+
+    def classify(line):
+        calls.append(line)
+        return "广告" in line
+
+    assert cache.verdict("1", "v1", "广告位招租", classify)
+    assert cache.verdict("1", "v1", "广告位招租", classify)
+    assert not cache.verdict("2", "v1", "正文", classify)
+    assert cache.verdict("1", "v2", "广告位招租", classify)  # rules changed
+    assert calls == ["广告位招租", "正文", "广告位招租"]
+    assert cache.stats()["hits"] == 1 and cache.stats()["chats"] == 2
+
+    cache.configure(0)
+    cache.verdict("1", "v2", "正文", classify)
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_strip_ad_lines_reuses_line_verdicts():
+    with patch("src.bot.data.repositories.ChatRepository.get_chat_rules", AsyncMock(return_value=["strip_ad_lines"])), \
+         patch("src.bot.data.repositories.ChatRepository.get_replacements", AsyncMock(return_value=[])), \
+         patch("src.bot.data.repositories.ChatRepository.get_keywords", AsyncMock(return_value=[("博彩", False)])), \
+         patch("src.bot.data.repositories.ChatRepository.get_footer", AsyncMock(return_value=None)), \
+         patch("src.bot.data.repositories.ChatRepository.get_caption_template", AsyncMock(return_value=None)):
+
+        promo = "关注频道：https://t.me/mychannel\n加入VIP博彩群请联系客服"
+        assert await clean_caption(f"第01集\n{promo}", "-100888") == "第01集"
+        assert await clean_caption(f"第02集\n{promo}", "-100888") == "第02集"
+        assert line_cache.stats()["hits"] == 2
+
+        ChatRepository.bump_config_version("-100888")
+        assert await clean_caption(f"第03集\n{promo}", "-100888") == "第03集"
+        assert line_cache.stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_regex_worker_line_verdicts_are_counted():
+    with patch("src.bot.data.repositories.ChatRepository.get_chat_rules", AsyncMock(return_value=["strip_ad_lines"])), \
+         patch("src.bot.data.repositories.ChatRepository.get_replacements", AsyncMock(return_value=[])), \
+         patch("src.bot.data.repositories.ChatRepository.get_keywords", AsyncMock(return_value=[(r"博彩\w*", True)])), \
+         patch("src.bot.data.repositories.ChatRepository.get_footer", AsyncMock(return_value=None)), \
+         patch("src.bot.data.repositories.ChatRepository.get_caption_template", AsyncMock(return_value=None)):
+
+        promo = "关注频道：https://t.me/mychannel\n加入VIP博彩群请联系客服"
+        for episode in range(1, 5):
+            assert await clean_caption(f"第0{episode}集\n{promo}", "-100889") == f"第0{episode}集"
+
+    stats = line_cache.stats()
+    # Each worker process misses the two promo lines once at most
+    assert stats["worker_hits"] + stats["worker_misses"] == 12 and stats["worker_hits"] >= 4
+    assert stats["hits"] + stats["misses"] == 0
+
+
+def test_pure_clean_leaves_the_shared_line_cache_alone():
+    snapshot = RuleSet("-100777", (0, 0), ["strip_ad_lines"], [("博彩", False)], [])
+    promo = "第01集\n加入VIP博彩群请联系客服"
+    assert clean(promo, None, snapshot) == clean(promo, None, snapshot) == "第01集"
+    assert line_cache.stats()["hits"] + line_cache.stats()["misses"] == 0
+
+    own = LineVerdictCache(16)
+    assert clean(promo, None, snapshot, verdict_cache=own) == clean(promo, None, snapshot, verdict_cache=own)
+    assert own.stats()["hits"] == 2 and line_cache.stats()["misses"] == 0
+
+
+def test_pure_clean_with_snapshot():
+    snapshot = RuleSet(
+        "-100999", (0, 0), ["clean_links"], [("博彩", False)], [("高清", "HD")], footer="📢 订阅", template=None
+    )
+    text = "高清首发 https://t.me/ad 博彩"
+    expected = "HD首发\n\n📢 订阅"
+    assert clean(text, None, snapshot) == expected
+
+    with pytest.raises(AttributeError):
+        snapshot.footer = None
+    copy = pickle.loads(pickle.dumps(snapshot))
+    assert copy.spec == snapshot.spec and clean(text, None, copy) == expected
+
+
+def test_pipeline_runs_only_enabled_stages():
+    def names(rules, keywords=(), replacements=(), footer=None, template=None):
+        return RuleSet("-1", (0, 0), rules, list(keywords), list(replacements), footer, template).pipeline.names
+
+    assert names(["keep_all"], footer="F") == ("hidden_chars", "footer")
+    assert names([]) == ("hidden_chars", "trim")
+    assert names(["strip_ad_lines", "maxlen:20"], replacements=[("a", "b")]) == (
+        "hidden_chars", "ad_lines", "replacements", "trim", "maxlen",
+    )
+    assert names(["clean_links", "block_keywords", "pangu"], keywords=[("x", False)], template="{orig}!") == (
+        "hidden_chars", "links", "block_keywords", "trim", "pangu", "template",
+    )
+
+    snapshot = RuleSet("-1", (0, 0), ["block_keywords"], [("博彩", False)], [], "F")
+    timings = {}
+    assert clean("正文", None, snapshot, timings=timings) == "正文\n\nF"
+    assert set(timings) == set(snapshot.pipeline.names)
+    timings.clear()
+    assert clean("博彩广告", None, snapshot, timings=timings) == ""
+    assert "footer" not in timings
+
+
+def test_prefilter_keeps_verdicts_identical_on_corpus():
+    from src.cleaner.corpus import load_captions
+
+    def unfiltered(line):
+        line = line.strip()
+        return bool(engine._AD_LINK_RE.search(line) or engine._MENTION_RE.search(line) or match_builtin_ad(line))
+
+    lines = [line for caption in load_captions() for line in caption.split("\n") if line.strip()]
+    lines += [line.upper() for line in lines] + ["看 T.ME/x", "[锚](WWW.example.com)", "加Q 123", "plain @"]
+    for line in lines:
+        assert is_ad_line(line, check_kws=False) == unfiltered(line), line
+        assert is_ad_line(line, check_kws=False, features=engine._scan_features(line)) == unfiltered(line), line
+    assert engine._scan_features("纯文本") == 0
+
+
+def test_preview_explains_removed_lines():
+    from src.cleaner.corpus import iter_caption_file, load_captions
+    from src.cleaner.preview import preview, preview_bulk
+
+    snapshot = RuleSet("-1", (0, 0), ["strip_ad_lines"], [("博彩", False)], [("高清", "HD")])
+    result = preview("第01集 高清\n关注频道：https://t.me/x\n加入博彩群\n评论区看全集", snapshot)
+    assert result.cleaned == "第01集 HD" and result.altered
+    assert [reason for _, reason in result.removed] == ["changed", "link", "keyword:博彩", "builtin:comment_section"]
+    assert list(result.timings) == list(snapshot.pipeline.names)
+
+    blocking = RuleSet("-1", (0, 0), ["block_keywords"], [("博彩", False)], [])
+    result = preview("第01集\n加入博彩群", blocking)
+    assert result.blocked and {reason for _, reason in result.removed} == {"rule:block_keywords (博彩)"}
+
+    bulk = preview_bulk(load_captions(), snapshot)
+    assert bulk.captions == 24 and bulk.blocked + bulk.altered + bulk.unchanged == 24
+    assert bulk.reasons["link"] > 0 and set(bulk.timings) == set(snapshot.pipeline.names)
+
+    assert list(iter_caption_file(['{"text": "a"}', '"b"', "", '{"caption": "c"}'])) == ["a", "b", "c"]
+    assert list(iter_caption_file(["x", "y", "", "", "z"])) == ["x\ny", "z"]
+
+
+@pytest.mark.asyncio
+async def test_preview_command_rebases_entities():
+    from unittest.mock import MagicMock
+    from src.bot.handlers.chat_mgmt import handle_preview
+
+    # The text_link covers "点这里" counted from the start of the whole command; the emoji takes two UTF-16 units
+    text = "/preview -1001 🎬好剧 点这里 看"
+    link = MessageEntity(MessageEntity.TEXT_LINK, offset=text.index("点这里") + 1, length=3, url="https://t.me/x")
+    command = MessageEntity(MessageEntity.BOT_COMMAND, offset=0, length=8)
+    update = MagicMock()
+    update.message = AsyncMock()
+    update.message.reply_to_message = None
+    update.message.text = text
+    update.message.entities = (command, link)
+    update.message.from_user.id = 7975947295
+    context = MagicMock()
+    context.args = text.split()[1:]
+
+    snapshot = RuleSet("-1001", (0, 0), ["clean_links"], [], [])
+    with patch("src.bot.utils.helpers.is_admin", AsyncMock(return_value=True)), \
+         patch("src.bot.handlers.chat_mgmt.check_chat_permission", AsyncMock(return_value=True)), \
+         patch("src.bot.handlers.chat_mgmt.load_snapshot", AsyncMock(return_value=snapshot)):
+        await handle_preview(update, context)
+
+    reply = update.message.reply_text.call_args[0][0]
+    assert reply.startswith("🧹 结果：\n\n🎬好剧  看\n")
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
 
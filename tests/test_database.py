@@ -0,0 +1,208 @@
+import asyncio
+import sqlite3
+import threading
+import uuid
+import aiosqlite
+import pytest
+from src.bot.core import config
+from src.bot.data.database import db_manager, is_read_only
+from src.bot.data.repositories import MediaRepository
+
+
+@pytest.fixture
+async def read_pool(request, monkeypatch):
+    """Reconnects db_manager with DB_READ_POOL_SIZE set to the test's parameter."""
+    monkeypatch.setattr(config, "DB_READ_POOL_SIZE", request.param)
+    await db_manager.close()
+    yield request.param
+    await db_manager.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("read_pool", [0], indirect=True)
+async def test_reads_go_through_the_writer_without_a_pool(read_pool):
+    writer = await db_manager.get_db()
+    assert db_manager._readers == []
+    async with db_manager.reader() as conn:
+        assert conn is writer
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("read_pool", [2], indirect=True)
+async def test_reads_use_read_pool_and_see_committed_writes(read_pool):
+    writer = await db_manager.get_db()
+    assert len(db_manager._readers) == read_pool
+
+    chat, msg = f"-100{uuid.uuid4().int % 10**9}", "42"
+    assert not await MediaRepository.is_outbound_message(chat, msg)
+    await MediaRepository.record_outbound_message(chat, msg)
+    assert await MediaRepository.is_outbound_message(chat, msg)
+
+    async with db_manager.reader() as conn:
+        assert conn is not writer and conn in db_manager._readers
+    with pytest.raises(Exception):
+        # Pool connections are read-only
+        await db_manager.run_in_connection(lambda c: c.execute("DELETE FROM outbound_messages"), write=False)
+
+    # More concurrent reads than pooled connections queue up and hand every connection back
+    results = await asyncio.gather(*(MediaRepository.is_outbound_message(chat, msg) for _ in range(20)))
+    assert all(results)
+    assert db_manager._idle_readers.qsize() == len(db_manager._readers)
+
+
+@pytest.mark.asyncio
+async def test_aiosqlite_internals_used_by_run_in_connection():
+    """DatabaseManager._call relies on private aiosqlite attributes; bumping the pin must re-verify them."""
+    assert aiosqlite.__version__ == "0.21.0", "re-check Connection._execute/_conn before changing the aiosqlite pin"
+    writer = await db_manager.get_db()
+    assert callable(getattr(writer, "_execute", None))
+    assert isinstance(getattr(writer, "_conn", None), sqlite3.Connection)
+    # Units of work run on the connection's own thread, with the raw sqlite3 connection
+    thread, conn = await db_manager._call(writer, lambda c: (threading.get_ident(), c))
+    assert thread != threading.get_ident() and conn is writer._conn
+
+
+@pytest.mark.asyncio
+async def test_statement_routing():
+    assert is_read_only("SELECT updated_at FROM forward_queue")
+    assert is_read_only("  select old_word, new_word FROM replacements WHERE chat_id=?")
+    assert is_read_only("WITH t AS (SELECT 1) SELECT * FROM t")
+    assert not is_read_only("WITH t AS (SELECT 1) DELETE FROM seen WHERE 1 IN t")
+    assert not is_read_only("INSERT OR REPLACE INTO outbound_messages VALUES (?, ?, ?)")
+    assert not is_read_only("PRAGMA wal_checkpoint(PASSIVE)")
+
+    # A unit of work commits as a whole or not at all
+    chat = f"-100{uuid.uuid4().int % 10**9}"
+
+    def insert_then_fail(conn):
+        conn.execute("INSERT INTO outbound_messages (chat_id, message_id, created_at) VALUES (?, '1', 0)", (chat,))
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await db_manager.run_in_connection(insert_then_fail)
+    assert not await MediaRepository.is_outbound_message(chat, "1")
+
+
+@pytest.mark.asyncio
+async def test_group_commit_coalesces_concurrent_writes():
+    await db_manager.get_db()
+    committer = db_manager.group_commit
+    committer.reset_stats()
+
+    chat = f"-100{uuid.uuid4().int % 10**9}"
+    await asyncio.gather(*(MediaRepository.record_outbound_message(chat, str(n)) for n in range(10)))
+    st = committer.stats()
+    assert st["statements"] == 10 and st["commits"] == 1 and st["pending"] == 0
+    assert all(await asyncio.gather(*(MediaRepository.is_outbound_message(chat, str(n)) for n in range(10))))
+
+    # Non-durable writes are committed by the next flush; a failing statement only fails its own future
+    await MediaRepository.log_forward(chat, "1", chat, "7", durable=False)
+    bad = db_manager.submit_write("INSERT INTO no_such_table VALUES (1)")
+    await committer.flush()
+    with pytest.raises(Exception):
+        await bad
+    assert await MediaRepository.is_outbound_message(chat, "7")
+
+
+@pytest.mark.asyncio
+async def test_album_inbound_marks_share_one_commit():
+    await db_manager.get_db()
+    committer = db_manager.group_commit
+    committer.reset_stats()
+
+    chat = f"-100{uuid.uuid4().int % 10**9}"
+    items = [(str(n), f"fu-{chat}-{n}") for n in range(5)]
+    assert await MediaRepository.mark_processed_inbound_many(chat, items, "album") == [True] * 5
+    assert committer.stats()["commits"] == 1
+    # Already marked items report False, like mark_processed_inbound
+    assert await MediaRepository.mark_processed_inbound_many(chat, items[:2] + [("9", None)], "album") == [
+        False, False, True,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_enqueue_dedups_and_fetch_claims_batch():
+    chat = f"-100{uuid.uuid4().int % 10**9}"
+    item = {"fuid": f"fu-{chat}", "mt": "photo", "fid": "file", "cap": "hi", "prio": 100}
+    assert await MediaRepository.add_forward_seen_and_enqueue(chat, item)
+    assert not await MediaRepository.add_forward_seen_and_enqueue(chat, item)
+
+    rows = [r for r in await MediaRepository.fetch_queue_batch(limit=1000) if r[1] == chat]
+    assert len(rows) == 1
+    # Claimed rows are not handed out twice
+    assert not [r for r in await MediaRepository.fetch_queue_batch(limit=1000) if r[1] == chat]
+    await MediaRepository.delete_queue_items([rows[0][0]])
+
+
+@pytest.mark.asyncio
+async def test_pragma_profile_and_idle_checkpoint(monkeypatch):
+    writer = await db_manager.get_db()
+    async with writer.execute("PRAGMA temp_store") as cursor:
+        assert (await cursor.fetchone())[0] == 2  # MEMORY
+    async with writer.execute("PRAGMA journal_size_limit") as cursor:
+        assert (await cursor.fetchone())[0] == config.DB_JOURNAL_SIZE_LIMIT
+
+    await MediaRepository.record_outbound_message(f"-100{uuid.uuid4().int % 10**9}", "1")
+    # Just written: not idle yet
+    assert await db_manager.idle_checkpoint() is None
+
+    monkeypatch.setattr(config, "DB_CHECKPOINT_IDLE_S", 0)
+    monkeypatch.setattr(config, "DB_CHECKPOINT_TRUNCATE_MB", 0)
+    result = await db_manager.idle_checkpoint()
+    assert result["mode"] == "TRUNCATE" and not result["busy"]
+    assert db_manager.wal_size() == 0 and db_manager.last_checkpoint is result
+
+
+@pytest.mark.asyncio
+async def test_clean_expired_data_deletes_rows_only_marked_seen():
+    chat = f"-100{uuid.uuid4().int % 10**9}"
+    old = 1  # created at the epoch, far past any expiry
+    rows = [("seen-old", old, 1, 0), ("both-old", old, 1, 1), ("bare-old", old, 0, 0), ("seen-new", 2**40, 1, 0)]
+    await db_manager.run_in_connection(
+        lambda conn: conn.executemany(
+            "INSERT INTO media_dedup (chat_id, file_unique_id, created_at, seen, forwarded) VALUES (?, ?, ?, ?, ?)",
+            [(chat, *row) for row in rows],
+        )
+    )
+
+    assert await MediaRepository.clean_expired_data(days=365) >= 3
+    left = await db_manager.read(
+        "SELECT file_unique_id, seen, forwarded FROM media_dedup WHERE chat_id=? ORDER BY 1", (chat,), fetchall=True
+    )
+    # Forwarded media stays reserved without the seen flag; rows that marked nothing else are gone
+    assert [tuple(r) for r in left] == [("both-old", 0, 1), ("seen-new", 1, 0)]
+    assert await MediaRepository.check_duplicate_status(chat, "seen-old") == (False, False)
+
+
+@pytest.mark.asyncio
+async def test_restore_reconnects_and_migrates_a_version_0_backup(tmp_path, monkeypatch):
+    from src.bot.data.migrations import SCHEMA_VERSION
+
+    legacy = tmp_path / "backup.db"
+    conn = sqlite3.connect(legacy)
+    conn.executescript(
+        """
+        CREATE TABLE seen (chat_id TEXT, file_unique_id TEXT, created_at INTEGER, PRIMARY KEY (chat_id, file_unique_id));
+        INSERT INTO seen VALUES ('-1', 'restored', 5);
+        """
+    )
+    conn.close()
+
+    await db_manager.close()
+    monkeypatch.setattr(config, "DB_FILE", str(tmp_path / "bot.db"))
+    try:
+        await db_manager.get_db()
+        # A write still waiting for its group commit lands before the swap instead of on the restored file
+        pending = db_manager.submit_write("INSERT INTO outbound_messages VALUES ('-1', '1', 0)")
+        await db_manager.restore(legacy.read_bytes())
+        assert await pending == 1
+
+        version = await db_manager.execute("PRAGMA user_version", fetchone=True)
+        assert version[0] == SCHEMA_VERSION
+        assert await MediaRepository.check_duplicate_status("-1", "restored") == (True, False)
+        assert not await MediaRepository.is_outbound_message("-1", "1")
+
+        with pytest.raises(ValueError):
+            await db_manager.restore(b"not a database")
+    finally:
+        await db_manager.close()
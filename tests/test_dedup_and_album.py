@@ -54,3 +54,22 @@ async def test_atomic_album_deduplication():
     # Second attempt with same items -> returns False because all items are deduplicated
     res2 = await MediaRepository.add_forward_seen_and_enqueue_album(target_chat, items)
     assert res2 is False
+
+
+@pytest.mark.asyncio
+async def test_dedup_flags_share_one_row():
+    await db_manager.get_db()
+    target_chat = f"-100{uuid.uuid4().int % 1000000000}"
+    fuid = f"test_fuid_{uuid.uuid4()}"
+
+    assert await MediaRepository.check_duplicate_status(target_chat, fuid) == (False, False)
+    assert await MediaRepository.add_forward_seen_atomic(target_chat, fuid) is True
+    assert await MediaRepository.check_duplicate_status(target_chat, fuid) == (False, True)
+    # Already reserved: not new, but the seen flag is still recorded on the same row
+    assert await MediaRepository.add_seen_atomic(target_chat, fuid) is False
+    assert await MediaRepository.check_duplicate_status(target_chat, fuid) == (True, True)
+
+    rows = await db_manager.read("SELECT COUNT(*) FROM media_dedup WHERE chat_id=?", (target_chat,), fetchone=True)
+    assert rows[0] == 1
+    stats = dict(await MediaRepository.get_stats())
+    assert stats[target_chat] == 1
@@ -0,0 +1,34 @@
+import sqlite3
+from src.bot.utils.eval_rules import evaluate, load_chat_config
+from src.cleaner.corpus import load_captions
+from src.cleaner.ruleset import RuleSet
+
+
+def test_evaluate_chat_rules_offline(tmp_path):
+    db_file = tmp_path / "bot.db"
+    conn = sqlite3.connect(db_file)
+    conn.executescript(
+        """
+        CREATE TABLE rules (chat_id TEXT, rule TEXT);
+        CREATE TABLE keywords (chat_id TEXT, word TEXT, is_regex INTEGER);
+        CREATE TABLE replacements (chat_id TEXT, old_word TEXT, new_word TEXT);
+        CREATE TABLE footers (chat_id TEXT, text TEXT);
+        INSERT INTO rules VALUES ('-100', 'block_keywords');
+        INSERT INTO keywords VALUES ('-100', '解压码', 0);
+        INSERT INTO replacements VALUES ('-100', '高清', 'HD');
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    rules, keywords, replacements, footer, template = load_chat_config(str(db_file), "-100")
+    assert (rules, keywords, replacements, footer, template) == (
+        ["block_keywords"], [("解压码", False)], [("高清", "HD")], None, None,
+    )
+
+    snapshot = RuleSet("-100", (0, 0), rules, keywords, replacements, footer, template)
+    captions = load_captions() * 3
+    report = evaluate(snapshot, iter(captions), workers=2, chunk_size=7)
+    assert report["captions"] == len(captions)
+    assert report["blocked"] > 0 and report["blocked"] % 3 == 0
+    assert report["blocked"] + report["altered"] + report["unchanged"] == len(captions)
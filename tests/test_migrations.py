@@ -0,0 +1,73 @@
+import sqlite3
+from src.bot.data.migrations import SCHEMA_VERSION, migrate, schema_version
+
+
+def test_fresh_database_migrates_once(tmp_path):
+    conn = sqlite3.connect(tmp_path / "fresh.db")
+    assert migrate(conn) == list(range(1, SCHEMA_VERSION + 1))
+    assert schema_version(conn) == SCHEMA_VERSION
+    # A current database runs nothing
+    assert migrate(conn) == []
+    conn.close()
+
+
+def test_pre_versioning_database_is_patched_and_merged(tmp_path):
+    conn = sqlite3.connect(tmp_path / "legacy.db")
+    conn.executescript(
+        """
+        CREATE TABLE forward_seen (chat_id TEXT, file_unique_id TEXT, PRIMARY KEY (chat_id, file_unique_id));
+        CREATE TABLE seen (chat_id TEXT, file_unique_id TEXT, created_at INTEGER, PRIMARY KEY (chat_id, file_unique_id));
+        INSERT INTO forward_seen VALUES ('-1', 'a');
+        INSERT INTO seen VALUES ('-1', 'b', 5);
+        """
+    )
+    assert schema_version(conn) == 0
+
+    migrate(conn)
+    assert "created_at" in {row[1] for row in conn.execute("PRAGMA table_info(forward_seen)")}
+    # The three dedup tables are merged into one, with the legacy names kept as views
+    rows = conn.execute("SELECT chat_id, file_unique_id, seen, forwarded FROM media_dedup ORDER BY 2").fetchall()
+    assert rows == [("-1", "a", 0, 1), ("-1", "b", 1, 0)]
+    legacy = "SELECT name, type FROM sqlite_master WHERE name IN ('seen', 'forward_seen', 'media_dedup_log')"
+    kinds = dict(conn.execute(legacy))
+    assert kinds == {"seen": "view", "forward_seen": "view", "media_dedup_log": "view"}
+    assert conn.execute("SELECT file_unique_id FROM seen").fetchall() == [("b",)]
+    assert conn.execute("SELECT COUNT(*) FROM media_dedup_log").fetchone()[0] == 2
+
+    # Nothing is merged or backfilled again on the next start
+    assert migrate(conn) == []
+    conn.close()
+
+
+def test_half_patched_legacy_database(tmp_path):
+    from src.bot.data.migrations import _create_base_schema
+
+    conn = sqlite3.connect(tmp_path / "half.db")
+    # An older release's queue (no status/updated_at/priority) holding rows the unique dedup index rejects,
+    # a chats table with rows but no created_at, and one index already in place
+    conn.executescript(
+        """
+        CREATE TABLE forward_queue (id INTEGER PRIMARY KEY AUTOINCREMENT, target_chat_id TEXT, file_unique_id TEXT,
+                                    media_group_id TEXT, caption TEXT);
+        INSERT INTO forward_queue (target_chat_id, file_unique_id) VALUES ('-1', 'a'), ('-1', 'a');
+        CREATE TABLE chats (chat_id TEXT PRIMARY KEY, title TEXT);
+        INSERT INTO chats VALUES ('-1', 'x');
+        CREATE TABLE processed_messages (chat_id TEXT, message_id TEXT, PRIMARY KEY (chat_id, message_id));
+        CREATE INDEX idx_outbound_msg ON processed_messages(chat_id);
+        """
+    )
+
+    assert migrate(conn) == list(range(1, SCHEMA_VERSION + 1))
+    queue = {row[1] for row in conn.execute("PRAGMA table_info(forward_queue)")}
+    assert {"status", "updated_at", "priority", "retry_count"} <= queue
+    assert conn.execute("SELECT status, priority FROM forward_queue").fetchall() == [(0, 0), (0, 0)]
+    assert "created_at" in {row[1] for row in conn.execute("PRAGMA table_info(chats)")}
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_fqueue_status", "idx_fqueue_priority", "idx_proc_fuid"} <= indexes
+    assert "idx_fqueue_dedup" not in indexes
+
+    # Running the base schema again changes nothing
+    before = conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name").fetchall()
+    _create_base_schema(conn)
+    assert conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name").fetchall() == before
+    conn.close()
@@ -48,4 +48,4 @@ async def test_process_single_forward_immediate_deletion():
 
         assert success is True
         # delete_queue_items should have been called despite log_forward throwing an exception
-        mock_delete.assert_called_once_with([101])
+        mock_delete.assert_called_once_with([101], durable=False)